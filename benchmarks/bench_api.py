@@ -0,0 +1,312 @@
+"""
+Latency, query count and allocation benchmark of the API endpoints.
+
+Seeds a social graph into a throwaway database and drives every endpoint through
+the Django test client with real JWT authentication. With --baseline the results
+are compared to a stored run and the command exits with status 1 on a regression:
+more queries than the baseline, or a p95 latency / allocation peak above it by more
+than --tolerance.
+
+benchmarks/baselines/api.json is the committed baseline, generated with the default
+parameters, which it records: comparing against it with other parameters is refused.
+Query counts carry over between machines, latencies and allocations do not, so a CI
+runner should regenerate the file on its own hardware from the commit it trusts and
+commit the refreshed file along with any intended change in the numbers.
+
+    python -m benchmarks.bench_api --save-baseline benchmarks/baselines/api.json
+    python -m benchmarks.bench_api --baseline benchmarks/baselines/api.json
+"""
+import argparse
+import json
+import random
+import sys
+import time
+import tracemalloc
+from datetime import timedelta
+from pathlib import Path
+
+from benchmarks.utils import benchmark_database, percentile, print_table, setup_django
+
+BATCH_SIZE = 10_000
+# the arguments that shape the seeded data and the runs, stored with a baseline
+PARAMETERS = ("users", "follows", "posts", "tags", "likes", "comments", "iterations", "seed")
+WORDS = ("django", "rest", "python", "celery", "redis", "sqlite", "feed", "cursor", "index", "cache")
+
+
+def _bulk_create(model, objects):
+    for start in range(0, len(objects), BATCH_SIZE):
+        model.objects.bulk_create(objects[start:start + BATCH_SIZE], ignore_conflicts=True)
+
+
+def seed(args, rng):
+    from django.conf import settings
+    from django.contrib.auth import get_user_model
+    from django.contrib.auth.hashers import make_password
+    from django.utils import timezone
+
+    from social.counters import reconcile_post_counters
+    from social.models import Comments, Likes, Post, TagPosting, Tags, TimelineEntry
+    from user.counters import reconcile_follow_counters
+    from user.models import Follow
+
+    User = get_user_model()
+    password = make_password("benchmark")
+    _bulk_create(User, [
+        User(email=f"user{index}@mail.com", username=f"user{index}", password=password)
+        for index in range(args.users)
+    ])
+    user_ids = list(User.objects.order_by("pk").values_list("pk", flat=True))
+
+    follows = {
+        (follower, following)
+        for follower in user_ids
+        for following in rng.sample(user_ids, min(args.follows, len(user_ids)))
+        if follower != following
+    }
+    _bulk_create(Follow, [Follow(follower_id=follower, following_id=following) for follower, following in follows])
+
+    tags = [Tags.objects.create(name=f"tag{index}") for index in range(args.tags)]
+    now = timezone.now()
+    _bulk_create(Post, [
+        Post(
+            text=" ".join(rng.choices(WORDS, k=12)),
+            owner_id=owner,
+            date_posted=now - timezone.timedelta(seconds=rng.randrange(30 * 24 * 3600)),
+        )
+        for owner in user_ids
+        for _ in range(args.posts)
+    ])
+    posts = list(Post.objects.values_list("pk", "owner_id", "date_posted"))
+
+    post_tags = [(pk, tag.pk) for pk, _, _ in posts for tag in rng.sample(tags, 2)]
+    _bulk_create(Post.tags.through, [Post.tags.through(post_id=pk, tags_id=tag) for pk, tag in post_tags])
+    dates = {pk: date_posted for pk, _, date_posted in posts}
+    _bulk_create(TagPosting, [TagPosting(post_id=pk, tag_id=tag, date_posted=dates[pk]) for pk, tag in post_tags])
+
+    _bulk_create(Likes, [
+        Likes(user_id=user, post_id=pk)
+        for pk, _, _ in posts
+        for user in rng.sample(user_ids, rng.randint(0, args.likes))
+    ])
+    _bulk_create(Comments, [
+        Comments(user_id=rng.choice(user_ids), post_id=pk, comment=" ".join(rng.choices(WORDS, k=8)))
+        for pk, _, _ in posts
+        for _ in range(rng.randint(0, args.comments))
+    ])
+
+    by_owner = {}
+    for pk, owner, date_posted in sorted(posts, key=lambda post: post[2], reverse=True):
+        by_owner.setdefault(owner, []).append((pk, date_posted))
+    _bulk_create(TimelineEntry, [
+        TimelineEntry(user_id=follower, post_id=pk, date_posted=date_posted)
+        for follower, following in follows
+        for pk, date_posted in by_owner.get(following, [])[:settings.TIMELINE_MAX_LENGTH]
+    ])
+
+    reconcile_post_counters()
+    reconcile_follow_counters()
+    return user_ids, [pk for pk, _, _ in posts], tags
+
+
+def build_cases(viewer, user_ids, post_ids, tags, iterations, rng):
+    from django.urls import reverse
+
+    from social.models import Likes
+    from user.models import Follow
+
+    liked = set(Likes.objects.filter(user=viewer).values_list("post_id", flat=True))
+    to_like = [pk for pk in post_ids if pk not in liked][:iterations]
+    followed = set(Follow.objects.filter(follower=viewer).values_list("following_id", flat=True))
+    to_follow = [pk for pk in user_ids if pk not in followed and pk != viewer.pk][:iterations]
+
+    posts_url = reverse("social:posts-list")
+
+    def post_url(name):
+        return lambda index: reverse(name, args=[rng.choice(post_ids)])
+
+    return [
+        {"name": "posts list", "url": lambda index: posts_url, "cold": True},
+        {"name": "posts list, cached", "url": lambda index: posts_url},
+        {"name": "posts list ?text", "url": lambda index: f"{posts_url}?text={rng.choice(WORDS)}", "cold": True},
+        {"name": "posts list ?tags_any", "url": lambda index: f"{posts_url}?tags_any={rng.choice(tags).pk}", "cold": True},
+        {
+            "name": "posts list ?tags_all",
+            "url": lambda index: f"{posts_url}?tags_all={','.join(str(tag.pk) for tag in rng.sample(tags, 2))}",
+            "cold": True,
+        },
+        {"name": "posts list ?date_gt", "url": lambda index: f"{posts_url}?date_gt=01.01.2000", "cold": True},
+        {"name": "posts list ?owner", "url": lambda index: f"{posts_url}?owner={rng.choice(user_ids)}", "cold": True},
+        {"name": "posts search", "url": lambda index: f"{reverse('social:posts-search')}?q={rng.choice(WORDS)}"},
+        {"name": "subscribed_posts", "url": lambda index: reverse("social:posts-subscribed-posts")},
+        {"name": "liked_posts", "url": lambda index: reverse("social:posts-liked-posts")},
+        {"name": "my_posts", "url": lambda index: reverse("social:posts-my-posts")},
+        {"name": "post detail", "url": post_url("social:posts-detail")},
+        {"name": "post comments", "url": post_url("social:posts-comments")},
+        {"name": "post likes", "url": post_url("social:posts-likes")},
+        {
+            "name": "like",
+            "method": "post",
+            "status": 201,
+            "runs": len(to_like),
+            "url": lambda index: reverse("social:posts-like", args=[to_like[index]]),
+        },
+        {
+            "name": "unlike",
+            "method": "post",
+            "status": 204,
+            "runs": len(to_like),
+            "url": lambda index: reverse("social:posts-unlike", args=[to_like[index]]),
+        },
+        {
+            "name": "follow",
+            "method": "post",
+            "status": 201,
+            "runs": len(to_follow),
+            "url": lambda index: reverse("user:users-follow", args=[to_follow[index]]),
+        },
+        {
+            "name": "unfollow",
+            "method": "post",
+            "status": 204,
+            "runs": len(to_follow),
+            "url": lambda index: reverse("user:users-unfollow", args=[to_follow[index]]),
+        },
+        {"name": "user followers", "url": lambda index: reverse("user:users-followers", args=[rng.choice(user_ids)])},
+        {"name": "user following", "url": lambda index: reverse("user:users-following", args=[rng.choice(user_ids)])},
+        {"name": "users list", "url": lambda index: reverse("user:users-list")},
+        {"name": "me", "url": lambda index: reverse("user:users-me")},
+    ]
+
+
+def run_case(client, case, iterations):
+    from django.core.cache import cache
+    from django.db import connection
+    from django.test.utils import CaptureQueriesContext
+
+    method = getattr(client, case.get("method", "get"))
+    expected = case.get("status", 200)
+    runs = min(iterations, case.get("runs", iterations))
+    durations, queries = [], []
+
+    # stateful cases (like, follow) take their first half for timing and second half for tracing
+    traced_runs = min(3, runs // 2) if "runs" in case else 3
+    for index in range(runs - traced_runs if "runs" in case else runs):
+        if case.get("cold"):
+            cache.clear()
+        url = case["url"](index)
+        with CaptureQueriesContext(connection) as context:
+            start = time.perf_counter()
+            response = method(url)
+            durations.append(time.perf_counter() - start)
+        if response.status_code != expected:
+            raise SystemExit(f"{case['name']}: {url} returned {response.status_code}, expected {expected}")
+        queries.append(len(context.captured_queries))
+
+    peaks = []
+    tracemalloc.start()
+    for index in range(runs - traced_runs if "runs" in case else 0, runs if "runs" in case else traced_runs):
+        if case.get("cold"):
+            cache.clear()
+        url = case["url"](index)
+        tracemalloc.reset_peak()
+        before = tracemalloc.get_traced_memory()[0]
+        method(url)
+        peaks.append(tracemalloc.get_traced_memory()[1] - before)
+    tracemalloc.stop()
+
+    return {
+        "case": case["name"],
+        "runs": len(durations),
+        "p50_ms": percentile(durations, 0.50) * 1000,
+        "p95_ms": percentile(durations, 0.95) * 1000,
+        "p99_ms": percentile(durations, 0.99) * 1000,
+        "queries": max(queries),
+        "alloc_kib": max(peaks, default=0) / 1024,
+    }
+
+
+def compare(rows, baseline, tolerance):
+    """mark and return the rows that regressed against the baseline"""
+    regressions = []
+    for row in rows:
+        base = baseline.get(row["case"])
+        if base is None:
+            continue
+        reasons = []
+        if row["queries"] > base["queries"]:
+            reasons.append(f"queries {base['queries']}->{row['queries']}")
+        if row["p95_ms"] > base["p95_ms"] * (1 + tolerance):
+            reasons.append(f"p95 {base['p95_ms']:.1f}->{row['p95_ms']:.1f}ms")
+        if row["alloc_kib"] > base["alloc_kib"] * (1 + tolerance):
+            reasons.append(f"alloc {base['alloc_kib']:.0f}->{row['alloc_kib']:.0f}KiB")
+        row["regression"] = ", ".join(reasons)
+        if reasons:
+            regressions.append(row)
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--users", type=int, default=500)
+    parser.add_argument("--follows", type=int, default=30, help="accounts followed by every user")
+    parser.add_argument("--posts", type=int, default=20, help="posts per user")
+    parser.add_argument("--tags", type=int, default=50)
+    parser.add_argument("--likes", type=int, default=20, help="maximum likes per post")
+    parser.add_argument("--comments", type=int, default=5, help="maximum comments per post")
+    parser.add_argument("--iterations", type=int, default=50)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--baseline", type=Path, help="fail when a case regressed against this baseline")
+    parser.add_argument("--save-baseline", type=Path, help="write the results as a new baseline")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="allowed latency/allocation growth")
+    args = parser.parse_args()
+
+    parameters = {name: getattr(args, name) for name in PARAMETERS}
+    baseline = None
+    if args.baseline:
+        baseline = json.loads(args.baseline.read_text())
+        if baseline["parameters"] != parameters:
+            parser.error(f"{args.baseline} was generated with {baseline['parameters']}, not {parameters}")
+
+    setup_django()
+
+    from django.contrib.auth import get_user_model
+    from rest_framework.test import APIClient
+    from rest_framework_simplejwt.tokens import AccessToken
+
+    rng = random.Random(args.seed)
+    with benchmark_database():
+        print(f"seeding {args.users} users with {args.posts} posts each...")
+        user_ids, post_ids, tags = seed(args, rng)
+
+        viewer = get_user_model().objects.get(pk=user_ids[0])
+        client = APIClient()
+        token = AccessToken.for_user(viewer)
+        # a full run outlasts the default five minute access token
+        token.set_exp(lifetime=timedelta(hours=2))
+        client.credentials(HTTP_AUTHORIZATION=f"Bearer {token}")
+        client.get("/api/users/me/")
+
+        cases = build_cases(viewer, user_ids, post_ids, tags, args.iterations, rng)
+        rows = [run_case(client, case, args.iterations) for case in cases]
+
+    columns = ["case", "runs", "p50_ms", "p95_ms", "p99_ms", "queries", "alloc_kib"]
+    regressions = []
+    if baseline:
+        regressions = compare(rows, baseline["cases"], args.tolerance)
+        columns.append("regression")
+    print_table(rows, columns)
+
+    if args.save_baseline:
+        args.save_baseline.parent.mkdir(parents=True, exist_ok=True)
+        cases = {row["case"]: {key: row[key] for key in ("p50_ms", "p95_ms", "p99_ms", "queries", "alloc_kib")}
+                 for row in rows}
+        args.save_baseline.write_text(json.dumps({"parameters": parameters, "cases": cases}, indent=2) + "\n")
+        print(f"\nbaseline saved to {args.save_baseline}")
+
+    if regressions:
+        print(f"\n{len(regressions)} case(s) regressed against {args.baseline}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,283 @@
+"""
+Throughput and latency of the read-heavy endpoints under WSGI and under ASGI.
+
+Seeds a synthetic social graph (social.synthetic) into an SQLite file and serves it,
+in process, three ways:
+
+    wsgi       WSGIHandler behind --threads worker threads, like a threaded WSGI server
+    asgi-sync  ASGIHandler with the synchronous views
+    asgi       ASGIHandler with the async variants of the views (ASYNC_VIEWS, as asgi.py sets it)
+
+--concurrency clients send requests one after another, rotating over the post list,
+the subscribed feed, a post detail, the user list and `me` with real JWT
+authentication, and read every response --client-delay ms late, like slow mobile
+clients. A WSGI worker thread is busy until its client has read the response. Every
+server runs in its own process on a copy of the seeded file.
+
+    python -m benchmarks.bench_asgi --concurrency 64 --requests 2000 --client-delay 50
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import shutil
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+from benchmarks.utils import percentile, print_table, setup_django, use_sqlite_file
+
+SERVERS = ("wsgi", "asgi-sync", "asgi")
+# not an INTERNAL_IPS address, so the debug toolbar stays out of the measurements
+CLIENT_ADDRESS = "198.51.100.1"
+
+
+def seed(path, args):
+    from django.core.management import call_command
+
+    from social.synthetic import SocialGraphGenerator
+
+    use_sqlite_file(path)
+    call_command("migrate", verbosity=0)
+    SocialGraphGenerator(seed=args.seed).generate(
+        users=args.users,
+        follows=args.users * 20,
+        posts=args.users * 10,
+        likes=args.users * 50,
+        comments=args.users * 10,
+        tags=100,
+    )
+
+
+def build_requests(args):
+    """(path, query string, access token) of every request, the same for every server"""
+    from django.contrib.auth import get_user_model
+    from rest_framework_simplejwt.tokens import AccessToken
+
+    from social.models import Post
+
+    rng = random.Random(args.seed)
+    user_ids = list(get_user_model().objects.order_by("pk").values_list("pk", flat=True))
+    viewers = get_user_model().objects.filter(pk__in=rng.sample(user_ids, min(args.viewers, len(user_ids))))
+    tokens = [str(AccessToken.for_user(viewer)) for viewer in viewers.order_by("pk")]
+    post_ids = list(Post.objects.order_by("pk").values_list("pk", flat=True))
+
+    endpoints = (
+        lambda: ("/api/social/posts/", ""),
+        lambda: ("/api/social/posts/subscribed_posts/", ""),
+        lambda: (f"/api/social/posts/{rng.choice(post_ids)}/", ""),
+        lambda: ("/api/users/", f"username=user{rng.randrange(100, 1000)}"),
+        lambda: ("/api/users/me/", ""),
+    )
+    return [(*endpoints[index % len(endpoints)](), rng.choice(tokens)) for index in range(args.requests)]
+
+
+class ThreadSampler:
+    """peak number of live threads while the server runs"""
+
+    def __init__(self):
+        self.peak = threading.active_count()
+        self.running = True
+        self.thread = threading.Thread(target=self.sample, daemon=True)
+
+    def sample(self):
+        while self.running:
+            self.peak = max(self.peak, threading.active_count())
+            time.sleep(0.005)
+
+    def __enter__(self):
+        self.thread.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.running = False
+        self.thread.join()
+
+
+def serve_wsgi(requests, args):
+    from django.core.handlers.wsgi import WSGIHandler
+    from django.test.client import FakePayload
+
+    handler = WSGIHandler()
+
+    def handle(path, query, token):
+        environ = {
+            "REQUEST_METHOD": "GET",
+            "PATH_INFO": path,
+            "QUERY_STRING": query,
+            "SCRIPT_NAME": "",
+            "SERVER_NAME": "localhost",
+            "SERVER_PORT": "80",
+            "SERVER_PROTOCOL": "HTTP/1.1",
+            "REMOTE_ADDR": CLIENT_ADDRESS,
+            "HTTP_HOST": "localhost",
+            "HTTP_AUTHORIZATION": f"Bearer {token}",
+            "wsgi.version": (1, 0),
+            "wsgi.url_scheme": "http",
+            "wsgi.input": FakePayload(b""),
+            "wsgi.errors": sys.stderr,
+            "wsgi.multithread": True,
+            "wsgi.multiprocess": False,
+            "wsgi.run_once": False,
+        }
+        status = []
+        body = handler(environ, lambda line, headers, exc_info=None: status.append(line))
+        try:
+            for _ in body:
+                pass
+            time.sleep(args.client_delay / 1000)
+        finally:
+            body.close()
+        return int(status[0].split()[0])
+
+    pending = iter(requests)
+    lock = threading.Lock()
+    results = []
+
+    def client(workers):
+        while True:
+            with lock:
+                request = next(pending, None)
+            if request is None:
+                return
+            start = time.perf_counter()
+            status = workers.submit(handle, *request).result()
+            results.append((status, time.perf_counter() - start))
+
+    with ThreadPoolExecutor(max_workers=args.threads) as workers:
+        clients = [threading.Thread(target=client, args=(workers,)) for _ in range(args.concurrency)]
+        for thread in clients:
+            thread.start()
+        for thread in clients:
+            thread.join()
+    return results
+
+
+def serve_asgi(requests, args):
+    from django.core.handlers.asgi import ASGIHandler
+
+    application = ASGIHandler()
+
+    async def handle(path, query, token):
+        scope = {
+            "type": "http",
+            "asgi": {"version": "3.0"},
+            "http_version": "1.1",
+            "method": "GET",
+            "scheme": "http",
+            "path": path,
+            "raw_path": path.encode(),
+            "query_string": query.encode(),
+            "root_path": "",
+            "headers": [(b"host", b"localhost"), (b"authorization", f"Bearer {token}".encode())],
+            "client": (CLIENT_ADDRESS, 50000),
+            "server": ("localhost", 80),
+        }
+        sent_request = asyncio.Event()
+        status = []
+
+        async def receive():
+            if not sent_request.is_set():
+                sent_request.set()
+                return {"type": "http.request", "body": b"", "more_body": False}
+            # the client stays connected; Django cancels this once the response is sent
+            await asyncio.Future()
+
+        async def send(message):
+            if message["type"] == "http.response.start":
+                status.append(message["status"])
+            elif not message.get("more_body"):
+                await asyncio.sleep(args.client_delay / 1000)
+
+        await application(scope, receive, send)
+        return status[0]
+
+    async def run():
+        pending = iter(requests)
+        results = []
+
+        async def client():
+            for request in pending:
+                start = time.perf_counter()
+                status = await handle(*request)
+                results.append((status, time.perf_counter() - start))
+
+        await asyncio.gather(*(client() for _ in range(args.concurrency)))
+        return results
+
+    return asyncio.run(run())
+
+
+def serve(args):
+    """the server process: replay the requests and print the results as JSON"""
+    setup_django()
+    use_sqlite_file(args.database)
+    requests = build_requests(args)
+
+    with ThreadSampler() as threads:
+        start = time.perf_counter()
+        results = serve_wsgi(requests, args) if args.serve == "wsgi" else serve_asgi(requests, args)
+        elapsed = time.perf_counter() - start
+
+    durations = [duration for _, duration in results]
+    print(json.dumps({
+        "server": args.serve,
+        "clients": args.concurrency,
+        "requests": len(results),
+        "errors": sum(status != 200 for status, _ in results),
+        "req_per_s": len(results) / elapsed,
+        "p50_ms": percentile(durations, 0.50) * 1000,
+        "p95_ms": percentile(durations, 0.95) * 1000,
+        "p99_ms": percentile(durations, 0.99) * 1000,
+        "peak_threads": threads.peak,
+    }))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--users", type=int, default=2_000)
+    parser.add_argument("--viewers", type=int, default=100, help="distinct users sending the requests")
+    parser.add_argument("--requests", type=int, default=2_000)
+    parser.add_argument("--concurrency", type=int, default=64, help="clients connected at the same time")
+    parser.add_argument("--threads", type=int, default=16, help="worker threads of the WSGI server")
+    parser.add_argument("--client-delay", type=float, default=50, help="ms every client takes to read a response")
+    parser.add_argument("--servers", nargs="+", choices=SERVERS, default=list(SERVERS))
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--serve", choices=SERVERS, help=argparse.SUPPRESS)
+    parser.add_argument("--database", type=Path, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.serve:
+        return serve(args)
+
+    setup_django()
+    directory = Path(tempfile.mkdtemp(prefix="bench_asgi_"))
+    try:
+        template = directory / "template.sqlite3"
+        print(f"seeding {args.users} users...")
+        seed(template, args)
+
+        rows = []
+        for server in args.servers:
+            database = directory / f"{server}.sqlite3"
+            shutil.copy(template, database)
+            env = {**os.environ, "ASYNC_VIEWS": "true" if server == "asgi" else ""}
+            output = subprocess.run(
+                [sys.executable, "-m", "benchmarks.bench_asgi", *sys.argv[1:], "--serve", server, "--database", database],
+                env=env, check=True, capture_output=True, text=True,
+            ).stdout
+            rows.append(json.loads(output.splitlines()[-1]))
+    finally:
+        shutil.rmtree(directory)
+
+    print_table(rows, ["server", "clients", "requests", "errors", "req_per_s", "p50_ms", "p95_ms", "p99_ms",
+                       "peak_threads"])
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,79 @@
+"""
+Compare the Bloom-filter front of the token blacklist with the plain table lookup.
+
+    python -m benchmarks.bench_blacklist --blacklisted 200000 --error-rate 0.001
+"""
+import argparse
+import random
+import uuid
+
+from benchmarks.utils import benchmark_database, measure, print_table, setup_django, summarize
+
+BATCH_SIZE = 10_000
+
+
+def seed(blacklisted):
+    from django.contrib.auth import get_user_model
+    from django.utils import timezone
+    from rest_framework_simplejwt.token_blacklist.models import BlacklistedToken, OutstandingToken
+
+    user = get_user_model().objects.create(email="bench@mail.com", username="bench")
+    expires_at = timezone.now() + timezone.timedelta(days=1)
+    jtis = [uuid.uuid4().hex for _ in range(blacklisted)]
+
+    for start in range(0, blacklisted, BATCH_SIZE):
+        tokens = OutstandingToken.objects.bulk_create([
+            OutstandingToken(user=user, jti=jti, token=jti, expires_at=expires_at)
+            for jti in jtis[start:start + BATCH_SIZE]
+        ])
+        BlacklistedToken.objects.bulk_create([BlacklistedToken(token=token) for token in tokens])
+    return jtis
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--blacklisted", type=int, default=200_000)
+    parser.add_argument("--error-rate", type=float, default=0.001)
+    parser.add_argument("--checks", type=int, default=10_000)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    setup_django()
+
+    from django.test import override_settings
+    from rest_framework_simplejwt.token_blacklist.models import BlacklistedToken
+
+    from user.blacklist import blacklist_filter
+
+    rng = random.Random(args.seed)
+    with benchmark_database(), override_settings(
+        TOKEN_BLACKLIST_BLOOM_ERROR_RATE=args.error_rate, TOKEN_BLACKLIST_CACHE_ALIAS="default"
+    ):
+        print(f"seeding {args.blacklisted} blacklisted tokens...")
+        jtis = seed(args.blacklisted)
+
+        rebuild = summarize(measure(blacklist_filter.rebuild, 1))
+        clean = iter([uuid.uuid4().hex for _ in range(args.checks * 2)])
+        revoked = iter(rng.choices(jtis, k=args.checks * 2))
+
+        cases = {
+            "table, clean token": lambda: BlacklistedToken.objects.filter(token__jti=next(clean)).exists(),
+            "bloom, clean token": lambda: blacklist_filter.is_blacklisted(next(clean)),
+            "table, blacklisted token": lambda: BlacklistedToken.objects.filter(token__jti=next(revoked)).exists(),
+            "bloom, blacklisted token": lambda: blacklist_filter.is_blacklisted(next(revoked)),
+        }
+        rows = [{"case": name, **summarize(measure(case, args.checks))} for name, case in cases.items()]
+
+        probes = [uuid.uuid4().hex for _ in range(args.checks)]
+        false_positives = sum(blacklist_filter.might_contain(jti) for jti in probes)
+        bloom = blacklist_filter.bloom
+
+    print_table(rows, ["case", "mean_ms", "p50_ms", "p95_ms", "p99_ms"])
+    print()
+    print(f"rebuild: {rebuild['mean_ms']:.0f} ms, {len(bloom.bits) / 1024:.0f} KiB, {bloom.hash_count} hashes")
+    print(f"false positives: {false_positives}/{args.checks} "
+          f"({false_positives / args.checks:.4%}, configured {args.error_rate:.4%})")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,90 @@
+"""
+Compare the FTS5 post index with the `text__icontains` scan it replaced.
+
+    python -m benchmarks.bench_search --posts 1000000
+"""
+import argparse
+import random
+
+from benchmarks.utils import benchmark_database, measure, print_table, setup_django, summarize
+
+VOCABULARY_SIZE = 20_000
+WORDS_PER_POST = (5, 40)
+# a word in half of the posts: ranking it costs what the most frequent query terms cost,
+# which the rare vocabulary words alone hide
+COMMON_WORD = "common"
+COMMON_SHARE = 0.5
+BATCH_SIZE = 10_000
+
+
+def seed(posts, rng):
+    from django.contrib.auth import get_user_model
+    from django.utils import timezone
+
+    from social.models import Post
+
+    vocabulary = [f"w{index:05d}" for index in range(VOCABULARY_SIZE)]
+    owner = get_user_model().objects.create(email="bench@mail.com", username="bench")
+    now = timezone.now()
+
+    batch = []
+    for index in range(posts):
+        words = rng.choices(vocabulary, k=rng.randint(*WORDS_PER_POST))
+        if rng.random() < COMMON_SHARE:
+            words.append(COMMON_WORD)
+        batch.append(Post(text=" ".join(words), owner=owner, date_posted=now - timezone.timedelta(seconds=index)))
+        if len(batch) == BATCH_SIZE:
+            Post.objects.bulk_create(batch)
+            batch = []
+    Post.objects.bulk_create(batch)
+    return vocabulary
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--posts", type=int, default=1_000_000)
+    parser.add_argument("--queries", type=int, default=50)
+    parser.add_argument("--page-size", type=int, default=20)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    setup_django()
+
+    from social import search
+    from social.models import Post
+
+    rng = random.Random(args.seed)
+    with benchmark_database():
+        print(f"seeding {args.posts} posts...")
+        vocabulary = seed(args.posts, rng)
+        terms = iter(rng.choices(vocabulary, k=args.queries * 5))
+        published = Post.objects.order_by("-date_posted", "-id")
+
+        cases = {
+            "icontains, newest page": lambda: list(
+                published.filter(text__icontains=next(terms)).values_list("pk", flat=True)[:args.page_size]
+            ),
+            "fts5, newest page": lambda: list(
+                search.filter_by_text(published, next(terms)).values_list("pk", flat=True)[:args.page_size]
+            ),
+            "icontains, count": lambda: published.filter(text__icontains=next(terms)).count(),
+            "fts5, count": lambda: search.filter_by_text(published, next(terms)).count(),
+            "fts5 ranked, top page": lambda: list(
+                search.search(Post.objects.all(), next(terms)).order_by("search_rank", "-id").values_list(
+                    "pk", flat=True
+                )[:args.page_size]
+            ),
+            "fts5 ranked, common term top page": lambda: list(
+                search.search(Post.objects.all(), COMMON_WORD).order_by("search_rank", "-id").values_list(
+                    "pk", flat=True
+                )[:args.page_size]
+            ),
+        }
+
+        rows = [{"case": name, **summarize(measure(case, args.queries))} for name, case in cases.items()]
+
+    print_table(rows, ["case", "mean_ms", "p50_ms", "p95_ms", "p99_ms"])
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,162 @@
+"""
+Rows per second of the post and user lists through the DRF serializers versus the
+`.values()` row serializers (social_media_api.rows).
+
+Every run serializes --rows posts or users as the list endpoints load them, with an
+authenticated viewer so posts carry `is_liked`, queries and JSON rendering included,
+and checks that both paths render byte-identical JSON.
+
+    python -m benchmarks.bench_serialization --rows 20 100 1000 --repeat 20
+"""
+import argparse
+import random
+
+from benchmarks.utils import benchmark_database, measure, print_table, setup_django, summarize
+
+BATCH_SIZE = 5_000
+
+
+def seed(users, posts, seed):
+    from django.contrib.auth import get_user_model
+    from django.utils import timezone
+
+    from social.models import Post, PostImage, Tags
+    from user.models import Follow
+
+    rng = random.Random(seed)
+    User = get_user_model()
+    User.objects.bulk_create(
+        [
+            User(email=f"user{index}@mail.com", username=f"user{index}", first_name="John", city="Kyiv", bio="bio " * 20)
+            for index in range(users)
+        ],
+        batch_size=BATCH_SIZE,
+    )
+    user_ids = list(User.objects.order_by("pk").values_list("pk", flat=True))
+    Follow.objects.bulk_create(
+        [
+            Follow(follower_id=follower, following_id=following)
+            for follower in user_ids
+            for following in rng.sample(user_ids, 5)
+            if following != follower
+        ],
+        batch_size=BATCH_SIZE,
+        ignore_conflicts=True,
+    )
+
+    tags = Tags.objects.bulk_create([Tags(name=f"tag{index}") for index in range(50)])
+    now = timezone.now()
+    created = Post.objects.bulk_create(
+        [
+            Post(
+                text="lorem ipsum " * 20,
+                owner_id=rng.choice(user_ids),
+                date_posted=now - timezone.timedelta(seconds=index),
+                likes_count=rng.randrange(100),
+            )
+            for index in range(posts)
+        ],
+        batch_size=BATCH_SIZE,
+    )
+    Post.tags.through.objects.bulk_create(
+        [Post.tags.through(post_id=post.pk, tags_id=tag.pk) for post in created for tag in rng.sample(tags, 3)],
+        batch_size=BATCH_SIZE,
+    )
+    PostImage.objects.bulk_create(
+        [
+            PostImage(
+                post=post,
+                image=f"uploads/posts/{post.pk}.jpg",
+                variants={
+                    variant: {"name": f"uploads/posts/variants/{post.pk}-{variant}.webp", "width": width, "height": width}
+                    for variant, width in (("thumbnail", 160), ("feed", 720), ("full", 1440))
+                },
+            )
+            for post in created[::3]
+        ],
+        batch_size=BATCH_SIZE,
+    )
+    return User.objects.get(pk=user_ids[0])
+
+
+def view_for(viewset, path, viewer):
+    from rest_framework.request import Request
+    from rest_framework.test import APIRequestFactory
+
+    request = Request(APIRequestFactory().get(path))
+    request.user = viewer
+    return viewset(action="list", request=request, format_kwarg=None)
+
+
+def post_renderers(viewer, rows):
+    from rest_framework.renderers import JSONRenderer
+
+    from social.serializers import PostListRowSerializer, PostListSerializer
+    from social.views import PostViewSet
+
+    view = view_for(PostViewSet, "/api/social/posts/", viewer)
+    queryset = view.get_queryset().order_by("-date_posted", "-id")
+    context = view.get_serializer_context()
+
+    def drf():
+        return JSONRenderer().render(PostListSerializer(queryset[:rows], many=True, context=context).data)
+
+    def values():
+        return JSONRenderer().render(PostListRowSerializer(view.post_rows(queryset)[:rows], context=context).data)
+
+    return drf, values
+
+
+def user_renderers(viewer, rows):
+    from rest_framework.renderers import JSONRenderer
+
+    from user.serializers import UserListRowSerializer, UserListSerializer
+    from user.views import UserViewSet
+
+    view = view_for(UserViewSet, "/api/users/", viewer)
+    queryset = view.filter_queryset(view.get_queryset()).order_by("pk")
+    context = view.get_serializer_context()
+
+    def drf():
+        return JSONRenderer().render(UserListSerializer(queryset[:rows], many=True, context=context).data)
+
+    def values():
+        return JSONRenderer().render(UserListRowSerializer(view.list_rows()[:rows], context=context).data)
+
+    return drf, values
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--users", type=int, default=2_000)
+    parser.add_argument("--posts", type=int, default=5_000)
+    parser.add_argument("--rows", type=int, nargs="+", default=[20, 100, 1_000], help="rows serialized per run")
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    setup_django()
+
+    results = []
+    with benchmark_database():
+        viewer = seed(args.users, args.posts, args.seed)
+        for endpoint, renderers in (("posts", post_renderers), ("users", user_renderers)):
+            for rows in args.rows:
+                drf, values = renderers(viewer, rows)
+                identical = drf() == values()
+                for mode, render in (("drf", drf), ("values", values)):
+                    durations = measure(render, args.repeat)
+                    results.append({
+                        "endpoint": endpoint,
+                        "rows": rows,
+                        "mode": mode,
+                        "rows_per_s": rows * len(durations) / sum(durations),
+                        **summarize(durations),
+                        "identical": identical,
+                    })
+
+    print_table(results, ["endpoint", "rows", "mode", "rows_per_s", "mean_ms", "p50_ms", "p95_ms", "identical"])
+
+
+if __name__ == "__main__":
+    main()
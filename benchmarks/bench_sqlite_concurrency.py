@@ -0,0 +1,135 @@
+"""
+Concurrent write throughput of SQLite under the development and production profiles.
+
+Every thread stands for a request worker: it likes and comments on posts as its own
+user, with the same transactions and signal handlers as the API views. The development
+profile is the plain SQLite file; the production profile adds SQLITE_PRODUCTION_OPTIONS
+(WAL, BEGIN IMMEDIATE, busy timeout) and routes every write through serialized_write,
+as the write-heavy views do. Both start from a copy of the same seeded database file.
+
+    python -m benchmarks.bench_sqlite_concurrency --threads 16 --writes 50
+"""
+import argparse
+import shutil
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+from benchmarks.utils import percentile, print_table, setup_django, use_sqlite_file
+
+
+def build_template(path, threads, writes):
+    from django.contrib.auth import get_user_model
+    from django.contrib.auth.hashers import make_password
+    from django.core.management import call_command
+    from django.utils import timezone
+
+    from social.models import Post
+
+    use_sqlite_file(path, {})
+    call_command("migrate", verbosity=0)
+    password = make_password("password")
+    users = get_user_model().objects.bulk_create([
+        get_user_model()(email=f"writer{number}@example.com", username=f"writer{number}", password=password)
+        for number in range(threads + 1)
+    ])
+    Post.objects.bulk_create([
+        Post(text=f"post {number}", owner=users[-1], date_posted=timezone.now()) for number in range(writes)
+    ])
+
+
+def writer(user_id, post_ids, serialize, barrier, results):
+    from django.db import OperationalError, connections, transaction
+
+    from social.models import Comments, Likes
+    from social_media_api.database import serialized_write
+
+    def like_and_comment(post_id):
+        with transaction.atomic():
+            Likes.objects.create(user_id=user_id, post_id=post_id)
+        with transaction.atomic():
+            Comments.objects.create(user_id=user_id, post_id=post_id, comment="benchmark")
+
+    write = serialized_write(like_and_comment) if serialize else like_and_comment
+    durations, errors = [], 0
+    barrier.wait()
+    for post_id in post_ids:
+        start = time.perf_counter()
+        try:
+            write(post_id)
+        except OperationalError:
+            errors += 1
+        durations.append(time.perf_counter() - start)
+    connections.close_all()
+    results.append((durations, errors))
+
+
+def run(profile, path, options, serialize, args):
+    from django.contrib.auth import get_user_model
+
+    from social.models import Post
+
+    use_sqlite_file(path, options)
+    user_ids = list(get_user_model().objects.order_by("pk").values_list("pk", flat=True)[:args.threads])
+    post_ids = list(Post.objects.order_by("pk").values_list("pk", flat=True))
+
+    barrier = threading.Barrier(args.threads + 1)
+    results = []
+    threads = [
+        threading.Thread(target=writer, args=(user_id, post_ids, serialize, barrier, results))
+        for user_id in user_ids
+    ]
+    for thread in threads:
+        thread.start()
+    barrier.wait()
+    start = time.perf_counter()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - start
+
+    durations = [duration for thread_durations, _ in results for duration in thread_durations]
+    errors = sum(thread_errors for _, thread_errors in results)
+    return {
+        "profile": profile,
+        "threads": args.threads,
+        "requests": len(durations),
+        "failed": errors,
+        "ok_per_s": (len(durations) - errors) / elapsed,
+        "p50_ms": percentile(durations, 0.50) * 1000,
+        "p95_ms": percentile(durations, 0.95) * 1000,
+        "p99_ms": percentile(durations, 0.99) * 1000,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--threads", type=int, default=16)
+    parser.add_argument("--writes", type=int, default=50, help="like + comment requests per thread")
+    args = parser.parse_args()
+
+    setup_django()
+    from django.conf import settings
+
+    directory = Path(tempfile.mkdtemp(prefix="bench_sqlite_"))
+    try:
+        template = directory / "template.sqlite3"
+        build_template(template, args.threads, args.writes)
+
+        rows = []
+        for profile, options, serialize in (
+            ("development", {}, False),
+            ("production", settings.SQLITE_PRODUCTION_OPTIONS, True),
+        ):
+            path = directory / f"{profile}.sqlite3"
+            shutil.copy(template, path)
+            rows.append(run(profile, path, options, serialize, args))
+        use_sqlite_file(template, {})
+    finally:
+        shutil.rmtree(directory)
+
+    print_table(rows, ["profile", "threads", "requests", "failed", "ok_per_s", "p50_ms", "p95_ms", "p99_ms"])
+
+
+if __name__ == "__main__":
+    main()
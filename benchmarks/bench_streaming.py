@@ -0,0 +1,94 @@
+"""
+Peak Python memory of a fully rendered post list versus the streamed response.
+
+    python -m benchmarks.bench_streaming --posts 5000 20000 50000
+"""
+import argparse
+import time
+import tracemalloc
+
+from benchmarks.utils import benchmark_database, print_table, setup_django
+
+BATCH_SIZE = 5_000
+
+
+def seed(posts):
+    from django.contrib.auth import get_user_model
+    from django.utils import timezone
+
+    from social.models import Post, Tags
+
+    owner, _ = get_user_model().objects.get_or_create(email="bench@mail.com", username="bench")
+    tags = [Tags.objects.get_or_create(name=f"tag{index}")[0] for index in range(10)]
+    now = timezone.now()
+    existing = Post.objects.count()
+
+    batch = []
+    for index in range(existing, posts):
+        batch.append(Post(text="lorem ipsum " * 20, owner=owner, date_posted=now - timezone.timedelta(seconds=index)))
+        if len(batch) == BATCH_SIZE:
+            _create(batch, tags)
+            batch = []
+    _create(batch, tags)
+
+
+def _create(posts, tags):
+    from social.models import Post
+
+    Post.objects.bulk_create(posts)
+    Post.tags.through.objects.bulk_create(
+        [Post.tags.through(post_id=post.pk, tags_id=tags[post.pk % len(tags)].pk) for post in posts]
+    )
+
+
+def traced(func):
+    tracemalloc.start()
+    start = time.perf_counter()
+    size = func()
+    elapsed = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return {"seconds": elapsed, "peak_mb": peak / 2 ** 20, "bytes": size}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--posts", type=int, nargs="+", default=[5_000, 20_000, 50_000])
+    args = parser.parse_args()
+
+    setup_django()
+
+    from rest_framework.renderers import JSONRenderer
+    from rest_framework.request import Request
+    from rest_framework.test import APIRequestFactory
+
+    from social.models import Post
+    from social.serializers import PostListSerializer
+    from social_media_api.streaming import streaming_list_response
+
+    rows = []
+    with benchmark_database():
+        for posts in sorted(args.posts):
+            seed(posts)
+            request = Request(APIRequestFactory().get("/api/social/posts/my_posts/"))
+            queryset = Post.objects.select_related("owner").prefetch_related("images", "tags").order_by(
+                "-date_posted", "-id"
+            )
+
+            def rendered():
+                serializer = PostListSerializer(queryset.all(), many=True, context={"request": request})
+                return len(JSONRenderer().render(serializer.data))
+
+            def streamed():
+                serializer = PostListSerializer(context={"request": request})
+                response = streaming_list_response(queryset.all(), serializer)
+                return sum(len(chunk) for chunk in response.streaming_content)
+
+            rows.append({"posts": posts, "mode": "rendered", **traced(rendered)})
+            rows.append({"posts": posts, "mode": "streamed", **traced(streamed)})
+
+    print_table(rows, ["posts", "mode", "seconds", "peak_mb", "bytes"])
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,78 @@
+import os
+import statistics
+import time
+from contextlib import contextmanager
+
+
+def setup_django():
+    os.environ.setdefault("DJANGO_SETTINGS_MODULE", "social_media_api.settings")
+    os.environ.setdefault("SECRET_KEY", "benchmark")
+
+    import django
+    from django.conf import settings
+
+    # with DEBUG on, the toolbar decides per request whether to show itself, which can
+    # include a DNS lookup of the docker host that stalls for seconds off docker
+    settings.MIDDLEWARE = [name for name in settings.MIDDLEWARE if not name.startswith("debug_toolbar.")]
+    django.setup()
+
+
+@contextmanager
+def benchmark_database(verbosity=0):
+    """a throwaway test database, so benchmarks never touch db.sqlite3"""
+    from django.db import connection
+    from django.test.utils import setup_test_environment, teardown_test_environment
+
+    setup_test_environment()
+    old_name = connection.creation.create_test_db(verbosity=verbosity, autoclobber=True)
+    try:
+        yield connection
+    finally:
+        connection.creation.destroy_test_db(old_name, verbosity=verbosity)
+        teardown_test_environment()
+
+
+def use_sqlite_file(path, options=None):
+    """point the default alias at an SQLite file; every thread connects to it with `options`"""
+    from django.db import connections
+
+    connections["default"].close()
+    del connections["default"]
+    connections.settings["default"] = {**connections.settings["default"], "NAME": str(path), "OPTIONS": options or {}}
+
+
+def measure(func, repeat):
+    durations = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        durations.append(time.perf_counter() - start)
+    return durations
+
+
+def percentile(values, fraction):
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, round(fraction * (len(ordered) - 1))))
+    return ordered[index]
+
+
+def summarize(durations):
+    return {
+        "mean_ms": statistics.fmean(durations) * 1000,
+        "p50_ms": percentile(durations, 0.50) * 1000,
+        "p95_ms": percentile(durations, 0.95) * 1000,
+        "p99_ms": percentile(durations, 0.99) * 1000,
+    }
+
+
+def print_table(rows, columns):
+    widths = [max(len(str(column)), *(len(_format(row.get(column))) for row in rows)) for column in columns]
+    print("  ".join(str(column).ljust(width) for column, width in zip(columns, widths)))
+    for row in rows:
+        print("  ".join(_format(row.get(column)).ljust(width) for column, width in zip(columns, widths)))
+
+
+def _format(value):
+    if isinstance(value, float):
+        return f"{value:.2f}"
+    return "" if value is None else str(value)
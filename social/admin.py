@@ -24,7 +24,8 @@ class CommentsInline(admin.TabularInline):
 
 @admin.register(Post)
 class PostAdmin(admin.ModelAdmin):
-    list_display = ("text", "get_tags")
+    list_display = ("text", "get_tags", "likes_count", "comments_count")
+    readonly_fields = ("likes_count", "comments_count")
     inlines = [LikesInline, ImagesPostInline, CommentsInline]
 
     def get_tags(self, obj):
@@ -0,0 +1,107 @@
+"""
+Cached post feed pages with scoped invalidation.
+
+A page's key carries a global generation, bumped only when the set or content of
+posts changes (a post is published, edited, deleted or retagged), which can move
+any post into or out of any page. Likes and comments only change the posts they
+belong to: each post has its own generation, a cached page records those of the
+posts it shows, and a page is only served while none of them changed.
+"""
+import hashlib
+import json
+import time
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import transaction
+from rest_framework.renderers import JSONRenderer
+
+GENERATION_KEY = "posts:feed:generation"
+POST_GENERATION_KEY = "posts:feed:post:{}"
+
+
+def _cache():
+    return caches[settings.POST_FEED_CACHE_ALIAS]
+
+
+def feed_generation():
+    """
+    Version number baked into every cached feed key.
+
+    Bumping it orphans every cached feed at once; it starts from the clock so that
+    an evicted counter never comes back with a value an old entry was stored under.
+    """
+    cache = _cache()
+    generation = cache.get(GENERATION_KEY)
+    if generation is None:
+        cache.add(GENERATION_KEY, time.time_ns(), timeout=None)
+        generation = cache.get(GENERATION_KEY)
+    return generation
+
+
+def post_generations(post_ids):
+    """the generations of the given posts, in order, started from the clock where missing"""
+    cache = _cache()
+    keys = [POST_GENERATION_KEY.format(post_id) for post_id in post_ids]
+    generations = cache.get_many(keys)
+    missing = [key for key in keys if key not in generations]
+    if missing:
+        for key in missing:
+            cache.add(key, time.time_ns(), timeout=None)
+        generations.update(cache.get_many(missing))
+    return [generations.get(key) for key in keys]
+
+
+def _bump(key):
+    cache = _cache()
+    try:
+        cache.incr(key)
+    except ValueError:
+        cache.add(key, time.time_ns(), timeout=None)
+
+
+def _bump_posts(post_ids):
+    for post_id in post_ids:
+        _bump(POST_GENERATION_KEY.format(post_id))
+
+
+def invalidate_feeds():
+    """drop every cached page, for changes that can move posts between pages"""
+    # bump now so this request sees its own write, and again after commit so a feed
+    # cached by a concurrent reader before the commit does not outlive it
+    _bump(GENERATION_KEY)
+    transaction.on_commit(lambda: _bump(GENERATION_KEY))
+
+
+def invalidate_posts(post_ids):
+    """drop the cached pages showing any of the posts, for changes of their likes or comments"""
+    post_ids = list(post_ids)
+    _bump_posts(post_ids)
+    transaction.on_commit(lambda: _bump_posts(post_ids))
+
+
+def cache_key(request):
+    principal = request.user.pk if request.user.is_authenticated else None
+    params = sorted((key, sorted(values)) for key, values in request.query_params.lists())
+    raw = json.dumps([principal, request.accepted_media_type, params], default=str)
+    return f"posts:feed:{feed_generation()}:{hashlib.sha1(raw.encode()).hexdigest()}"
+
+
+def get(key):
+    """a cached page, unless one of its posts changed since it was stored"""
+    entry = _cache().get(key)
+    if entry is None or post_generations(entry["posts"]) != entry["generations"]:
+        return None
+    return entry
+
+
+def store(key, request, data, post_ids):
+    """cache a feed page showing `post_ids` and return it together with its strong ETag"""
+    # a like committed (and its generations bumped) between the page query and this read
+    # is missed; such a page is served stale for at most POST_FEED_CACHE_TIMEOUT
+    generations = post_generations(post_ids)
+    content = JSONRenderer().render(data)
+    digest = hashlib.sha1(request.accepted_media_type.encode() + b"\0" + content).hexdigest()
+    entry = {"data": data, "etag": f'"{digest}"', "posts": list(post_ids), "generations": generations}
+    _cache().set(key, entry, settings.POST_FEED_CACHE_TIMEOUT)
+    return entry
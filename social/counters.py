@@ -0,0 +1,49 @@
+from django.db.models import Count, F, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+from social.models import Post, Likes, Comments
+
+RECONCILE_BATCH_SIZE = 1000
+
+
+def _count_subquery(model):
+    return Coalesce(Subquery(
+        model.objects.filter(post=OuterRef("pk")).order_by().values("post").annotate(
+            total=Count("pk")
+        ).values("total")
+    ), 0)
+
+
+def drifted_posts(post_ids=None):
+    """posts whose stored likes/comments counters disagree with the relation tables"""
+    queryset = Post.objects.all()
+    if post_ids is not None:
+        queryset = queryset.filter(pk__in=post_ids)
+
+    return queryset.annotate(
+        actual_likes=_count_subquery(Likes),
+        actual_comments=_count_subquery(Comments),
+    ).exclude(
+        likes_count=F("actual_likes"),
+        comments_count=F("actual_comments"),
+    )
+
+
+def reconcile_post_counters(post_ids=None, dry_run=False):
+    """recount likes_count and comments_count, returns the number of posts that were off"""
+    repaired = 0
+    batch = []
+    rows = drifted_posts(post_ids).values_list("pk", "actual_likes", "actual_comments")
+    for pk, likes, comments in list(rows):
+        batch.append(Post(pk=pk, likes_count=likes, comments_count=comments))
+        if len(batch) >= RECONCILE_BATCH_SIZE:
+            repaired += _save(batch, dry_run)
+            batch = []
+    repaired += _save(batch, dry_run)
+    return repaired
+
+
+def _save(batch, dry_run):
+    if batch and not dry_run:
+        Post.objects.bulk_update(batch, ["likes_count", "comments_count"])
+    return len(batch)
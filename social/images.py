@@ -0,0 +1,70 @@
+import os
+from io import BytesIO
+
+from PIL import Image, ImageOps
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+
+# longest side in pixels of every derivative generated for a PostImage
+VARIANTS = {
+    "thumbnail": 160,
+    "feed": 720,
+    "full": 1440,
+}
+VARIANT_FORMAT = "WEBP"
+VARIANT_EXTENSION = ".webp"
+VARIANT_QUALITY = 80
+FEED_VARIANT = "feed"
+
+
+def _normalized(image):
+    image = ImageOps.exif_transpose(image)
+    if image.mode in ("RGBA", "LA") or (image.mode == "P" and "transparency" in image.info):
+        return image.convert("RGBA")
+    return image.convert("RGB")
+
+
+def _variant_name(original_name, variant):
+    stem, _ = os.path.splitext(os.path.basename(original_name))
+    return os.path.join("uploads/posts/variants/", f"{stem}-{variant}{VARIANT_EXTENSION}")
+
+
+def generate_variants(post_image):
+    """
+    Write resized WebP copies of the uploaded image and record them on the model.
+
+    The copies are re-encoded from pixels only, so EXIF/GPS and other metadata of
+    the original never reach the clients.
+    """
+    with post_image.image.open("rb") as file:
+        original = Image.open(file)
+        original.load()
+
+    original = _normalized(original)
+    variants = {}
+    for variant, longest_side in VARIANTS.items():
+        resized = original.copy()
+        resized.thumbnail((longest_side, longest_side), Image.Resampling.LANCZOS)
+
+        buffer = BytesIO()
+        resized.save(buffer, VARIANT_FORMAT, quality=VARIANT_QUALITY, method=6)
+        name = default_storage.save(_variant_name(post_image.image.name, variant), ContentFile(buffer.getvalue()))
+        variants[variant] = {"name": name, "width": resized.width, "height": resized.height}
+
+    post_image.width, post_image.height = original.size
+    post_image.variants = variants
+    post_image.save(update_fields=["width", "height", "variants"])
+    return variants
+
+
+def srcset(post_image, build_url):
+    """`srcset` attribute value listing every generated variant by width"""
+    variants = sorted(post_image.variants.values(), key=lambda variant: variant["width"])
+    return ", ".join(f"{build_url(default_storage.url(variant['name']))} {variant['width']}w" for variant in variants)
+
+
+def variant_url(post_image, variant, build_url):
+    """URL of a variant, or of the original while the variants are still being generated"""
+    if variant in post_image.variants:
+        return build_url(default_storage.url(post_image.variants[variant]["name"]))
+    return build_url(post_image.image.url)
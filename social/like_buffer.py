@@ -0,0 +1,215 @@
+"""
+Write-behind buffer for like/unlike taps.
+
+With LIKES_WRITE_BEHIND on, the like/unlike endpoints only record the user's latest
+intent per post (a later tap overwrites an earlier one) and flush_like_buffer moves
+the intents into the Likes table in bulk. Until then the acting user sees their own
+intents overlaid on `is_liked` and the like counter of the posts they read.
+"""
+import threading
+from contextlib import contextmanager
+from contextvars import ContextVar
+from functools import lru_cache
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.db import transaction
+from django.db.models import Q
+
+from social import cache as feed_cache, ranking, trending
+from social.counters import reconcile_post_counters
+from social.models import Post, Likes
+
+USERS_KEY = "likes:buffer:users"
+USER_KEY = "likes:buffer:user:{}"
+FLUSH_BATCH_SIZE = 1000
+# every pair is two bound parameters in the OR-ed DELETE condition
+DELETE_BATCH_SIZE = 400
+FLUSH_MAX_USERS = 5000
+
+LIKED, UNLIKED = "1", "0"
+
+# set while apply_intents writes Likes rows, whose counters, trending counts and
+# affinities it settles itself (and record() already counted the trending side)
+_applying = ContextVar("like_buffer_applying", default=False)
+
+# drop the flushed fields that were not overwritten meanwhile, and the user once nothing is left
+DISCARD_SCRIPT = """
+for i = 2, #ARGV, 2 do
+    if redis.call('HGET', KEYS[1], ARGV[i]) == ARGV[i + 1] then
+        redis.call('HDEL', KEYS[1], ARGV[i])
+    end
+end
+if redis.call('HLEN', KEYS[1]) == 0 then
+    redis.call('SREM', KEYS[2], ARGV[1])
+end
+"""
+
+
+class RedisLikeBuffer:
+    """one hash of post id -> intent per user, plus the set of users with pending intents"""
+
+    def __init__(self, url):
+        import redis
+
+        self.redis = redis.Redis.from_url(url, decode_responses=True)
+        self.discard_script = self.redis.register_script(DISCARD_SCRIPT)
+
+    def record(self, user_id, post_id, liked):
+        pipeline = self.redis.pipeline()
+        pipeline.hset(USER_KEY.format(user_id), post_id, LIKED if liked else UNLIKED)
+        pipeline.sadd(USERS_KEY, user_id)
+        pipeline.execute()
+
+    def user_intents(self, user_id):
+        return {int(post_id): value == LIKED for post_id, value in self.redis.hgetall(USER_KEY.format(user_id)).items()}
+
+    def pending(self, max_users):
+        for user_id in self.redis.srandmember(USERS_KEY, max_users):
+            yield int(user_id), self.user_intents(user_id)
+
+    def discard(self, user_id, intents):
+        args = [user_id]
+        for post_id, liked in intents.items():
+            args += [post_id, LIKED if liked else UNLIKED]
+        self.discard_script(keys=[USER_KEY.format(user_id), USERS_KEY], args=args)
+
+
+class LocalLikeBuffer:
+    """in-process stand-in for development and tests, only consistent within one process"""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.intents = {}
+
+    def record(self, user_id, post_id, liked):
+        with self.lock:
+            self.intents.setdefault(user_id, {})[post_id] = liked
+
+    def user_intents(self, user_id):
+        with self.lock:
+            return dict(self.intents.get(user_id, {}))
+
+    def pending(self, max_users):
+        with self.lock:
+            users = list(self.intents.items())[:max_users]
+            return [(user_id, dict(intents)) for user_id, intents in users]
+
+    def discard(self, user_id, intents):
+        with self.lock:
+            pending = self.intents.get(user_id, {})
+            for post_id, liked in intents.items():
+                if pending.get(post_id) == liked:
+                    del pending[post_id]
+            if not pending:
+                self.intents.pop(user_id, None)
+
+
+@lru_cache
+def _buffer(url):
+    return RedisLikeBuffer(url) if url else LocalLikeBuffer()
+
+
+def get_buffer():
+    return _buffer(settings.LIKE_BUFFER_REDIS_URL)
+
+
+def is_enabled():
+    return settings.LIKES_WRITE_BEHIND
+
+
+def record(user, post, liked):
+    get_buffer().record(user.pk, post.pk, liked)
+    trending.record_like(post.pk, liked)
+    feed_cache.invalidate_posts([post.pk])
+
+
+def user_intents(user):
+    if not is_enabled() or not user.is_authenticated:
+        return {}
+    return get_buffer().user_intents(user.pk)
+
+
+def overlay(user, posts):
+    """apply the user's unflushed intents to `is_liked` and `likes_count` of loaded posts or `.values()` rows"""
+    intents = user_intents(user)
+    if not intents:
+        return posts
+
+    for post in posts:
+        values = post if isinstance(post, dict) else vars(post)
+        liked = intents.get(values["id"])
+        is_liked = values.get("is_liked")
+        if liked is None or is_liked is None or liked == is_liked:
+            continue
+        values["is_liked"] = liked
+        values["likes_count"] = max(values["likes_count"] + (1 if liked else -1), 0)
+    return posts
+
+
+def is_applying():
+    """whether the Likes rows being deleted come from a flush, so their receivers must not count them again"""
+    return _applying.get()
+
+
+@contextmanager
+def _applying_intents():
+    token = _applying.set(True)
+    try:
+        yield
+    finally:
+        _applying.reset(token)
+
+
+def _batches(items, size=FLUSH_BATCH_SIZE):
+    for start in range(0, len(items), size):
+        yield items[start:start + size]
+
+
+def apply_intents(intents):
+    """write (user_id, post_id) -> liked intents to the Likes table, returns the ids of the posts touched"""
+    post_ids = set(Post.objects.filter(pk__in={post_id for _, post_id in intents}).values_list("pk", flat=True))
+    user_ids = set(get_user_model().objects.filter(pk__in={user_id for user_id, _ in intents}).values_list(
+        "pk", flat=True
+    ))
+    likes = [
+        (user_id, post_id) for (user_id, post_id), liked in intents.items()
+        if liked and user_id in user_ids and post_id in post_ids
+    ]
+    unlikes = [(user_id, post_id) for (user_id, post_id), liked in intents.items() if not liked]
+
+    with transaction.atomic(), _applying_intents():
+        for batch in _batches(likes):
+            Likes.objects.bulk_create(
+                [Likes(user_id=user_id, post_id=post_id) for user_id, post_id in batch],
+                ignore_conflicts=True
+            )
+        for batch in _batches(unlikes, DELETE_BATCH_SIZE):
+            condition = Q()
+            for user_id, post_id in batch:
+                condition |= Q(user_id=user_id, post_id=post_id)
+            # the counting receivers skip these rows, the recount below replaces them
+            Likes.objects.filter(condition).delete()
+
+        reconcile_post_counters(post_ids=post_ids)
+        ranking.apply_like_changes(list(intents))
+    return post_ids
+
+
+def flush(max_users=FLUSH_MAX_USERS):
+    """move pending intents into the database, returns the number of intents written"""
+    buffer = get_buffer()
+    pending = list(buffer.pending(max_users))
+    intents = {
+        (user_id, post_id): liked
+        for user_id, user_pending in pending
+        for post_id, liked in user_pending.items()
+    }
+    if not intents:
+        return 0
+
+    apply_intents(intents)
+    for user_id, user_pending in pending:
+        buffer.discard(user_id, user_pending)
+    feed_cache.invalidate_posts({post_id for _, post_id in intents})
+    return len(intents)
@@ -0,0 +1,46 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from social.synthetic import SocialGraphGenerator
+
+
+class Command(BaseCommand):
+    help = "Generate a deterministic, power-law distributed social graph of users, follows, posts, likes and comments"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--users", type=int, default=100_000)
+        parser.add_argument("--follows", type=int, default=2_000_000, help="follow rows to attempt")
+        parser.add_argument("--posts", type=int, default=1_000_000)
+        parser.add_argument("--likes", type=int, default=5_000_000, help="like rows to attempt")
+        parser.add_argument("--comments", type=int, default=1_000_000)
+        parser.add_argument("--tags", type=int, default=1_000)
+        parser.add_argument("--seed", type=int, default=0)
+        parser.add_argument("--batch-size", type=int, default=10_000)
+        parser.add_argument("--prefix", default="user", help="username/email prefix of the generated users")
+        parser.add_argument("--password", default="password", help="password shared by every generated user")
+        parser.add_argument("--days", type=int, default=365, help="posts are spread over this many past days")
+        parser.add_argument("--zipf-exponent", type=float, default=1.0, help="skew of account popularity")
+        parser.add_argument("--burst-hours", type=float, default=6, help="mean delay of a like after posting")
+
+    def handle(self, *args, **options):
+        generator = SocialGraphGenerator(
+            seed=options["seed"],
+            batch_size=options["batch_size"],
+            prefix=options["prefix"],
+            password=options["password"],
+            days=options["days"],
+            zipf_exponent=options["zipf_exponent"],
+            burst_hours=options["burst_hours"],
+            log=self.stdout.write,
+        )
+        try:
+            generator.generate(
+                users=options["users"],
+                follows=options["follows"],
+                posts=options["posts"],
+                likes=options["likes"],
+                comments=options["comments"],
+                tags=options["tags"],
+            )
+        except ValueError as error:
+            raise CommandError(error)
+        self.stdout.write(self.style.SUCCESS("social graph generated"))
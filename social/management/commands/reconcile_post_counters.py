@@ -0,0 +1,18 @@
+from django.core.management.base import BaseCommand
+
+from social.counters import reconcile_post_counters
+
+
+class Command(BaseCommand):
+    help = "Recount Post.likes_count and Post.comments_count from the Likes and Comments tables"
+
+    def add_arguments(self, parser):
+        parser.add_argument("post_ids", nargs="*", type=int, help="only check these posts")
+        parser.add_argument("--dry-run", action="store_true", help="report drifted posts without fixing them")
+
+    def handle(self, *args, **options):
+        repaired = reconcile_post_counters(options["post_ids"] or None, dry_run=options["dry_run"])
+        if options["dry_run"]:
+            self.stdout.write(f"{repaired} post(s) have drifted counters")
+        else:
+            self.stdout.write(self.style.SUCCESS(f"{repaired} post(s) repaired"))
@@ -0,0 +1,12 @@
+from django.core.management.base import BaseCommand
+
+from social import ranking
+
+
+class Command(BaseCommand):
+    help = "Recompute Post.feed_score and the affinity and score of every timeline entry"
+
+    def handle(self, *args, **options):
+        posts = ranking.rescore_posts()
+        entries = ranking.rescore_timelines()
+        self.stdout.write(self.style.SUCCESS(f"{posts} post(s) and {entries} timeline entr(ies) rescored"))
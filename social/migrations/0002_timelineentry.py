@@ -0,0 +1,47 @@
+# Generated by Django 5.1.2 on 2026-10-18 03:36
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+def backfill_timelines(apps, schema_editor):
+    Follow = apps.get_model("user", "Follow")
+    Post = apps.get_model("social", "Post")
+    TimelineEntry = apps.get_model("social", "TimelineEntry")
+
+    for follower_id, following_id in Follow.objects.values_list("follower_id", "following_id").iterator():
+        posts = Post.objects.filter(
+            owner_id=following_id,
+            date_posted__isnull=False
+        ).order_by("-date_posted", "-id").values_list("pk", "date_posted")[:settings.TIMELINE_MAX_LENGTH]
+        TimelineEntry.objects.bulk_create(
+            [TimelineEntry(user_id=follower_id, post_id=pk, date_posted=date_posted) for pk, date_posted in posts],
+            ignore_conflicts=True
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('social', '0001_initial'),
+        ('user', '0001_initial'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TimelineEntry',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date_posted', models.DateTimeField()),
+                ('post', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='timeline_entries', to='social.post')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='timeline_entries', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['user', '-date_posted', '-post'], name='timeline_user_date_idx')],
+                'unique_together': {('user', 'post')},
+            },
+        ),
+        migrations.RunPython(backfill_timelines, migrations.RunPython.noop),
+    ]
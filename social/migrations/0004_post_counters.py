@@ -0,0 +1,41 @@
+# Generated by Django 5.1.2 on 2026-10-18 03:39
+
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+
+def populate_counters(apps, schema_editor):
+    Post = apps.get_model("social", "Post")
+    Likes = apps.get_model("social", "Likes")
+    Comments = apps.get_model("social", "Comments")
+
+    def count(model):
+        return Coalesce(Subquery(
+            model.objects.filter(post=OuterRef("pk")).order_by().values("post").annotate(
+                total=Count("pk")
+            ).values("total")
+        ), 0)
+
+    Post.objects.update(likes_count=count(Likes), comments_count=count(Comments))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('social', '0003_post_date_posted_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='post',
+            name='comments_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='post',
+            name='likes_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.RunPython(populate_counters, migrations.RunPython.noop),
+    ]
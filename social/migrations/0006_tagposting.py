@@ -0,0 +1,42 @@
+# Generated by Django 5.1.2 on 2026-10-18 03:43
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+def backfill_postings(apps, schema_editor):
+    Post = apps.get_model("social", "Post")
+    TagPosting = apps.get_model("social", "TagPosting")
+
+    postings = Post.tags.through.objects.values_list("tags_id", "post_id", "post__date_posted")
+    batch = []
+    for tag_id, post_id, date_posted in postings.iterator(chunk_size=1000):
+        batch.append(TagPosting(tag_id=tag_id, post_id=post_id, date_posted=date_posted))
+        if len(batch) >= 1000:
+            TagPosting.objects.bulk_create(batch, ignore_conflicts=True)
+            batch = []
+    TagPosting.objects.bulk_create(batch, ignore_conflicts=True)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('social', '0005_post_search_index'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TagPosting',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date_posted', models.DateTimeField(null=True)),
+                ('post', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='tag_postings', to='social.post')),
+                ('tag', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='postings', to='social.tags')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['tag', '-date_posted', '-post'], name='tag_posting_tag_date_idx')],
+                'unique_together': {('tag', 'post')},
+            },
+        ),
+        migrations.RunPython(backfill_postings, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 5.1.2 on 2026-10-18 03:54
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('social', '0007_postimage_variants'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='comments',
+            index=models.Index(fields=['post', '-date_posted', '-id'], name='comments_post_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='likes',
+            index=models.Index(fields=['post', '-liked_at', '-id'], name='likes_post_liked_at_idx'),
+        ),
+    ]
@@ -0,0 +1,34 @@
+# Generated by Django 5.1.2 on 2026-10-18 04:20
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('social', '0009_trending_activity'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='post',
+            name='feed_score',
+            field=models.FloatField(default=0),
+        ),
+        migrations.AddField(
+            model_name='timelineentry',
+            name='affinity',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='timelineentry',
+            name='score',
+            field=models.FloatField(default=0),
+        ),
+        migrations.AddIndex(
+            model_name='timelineentry',
+            index=models.Index(fields=['user', '-score', '-post'], name='timeline_user_score_idx'),
+        ),
+    ]
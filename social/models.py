@@ -19,6 +19,9 @@ class PostImage(models.Model):
     post = models.ForeignKey("Post", on_delete=models.CASCADE, related_name="images")
     image = models.ImageField(upload_to=post_image_file_path)
     uploaded_at = models.DateTimeField(auto_now_add=True)
+    width = models.PositiveIntegerField(null=True, blank=True)
+    height = models.PositiveIntegerField(null=True, blank=True)
+    variants = models.JSONField(default=dict, blank=True)
 
 
 class Tags(models.Model):
@@ -34,6 +37,16 @@ class Post(models.Model):
     date_posted = models.DateTimeField(null=True)
     tags = models.ManyToManyField(Tags, related_name="tag_post")
     scheduled_time = models.DateTimeField(null=True, blank=True)
+    likes_count = models.PositiveIntegerField(default=0)
+    comments_count = models.PositiveIntegerField(default=0)
+    # ranked timeline score before the reader's affinity, see social.ranking
+    feed_score = models.FloatField(default=0)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["-date_posted", "-id"], name="post_date_posted_idx"),
+            models.Index(fields=["owner", "-date_posted", "-id"], name="post_owner_date_posted_idx"),
+        ]
 
     def is_published(self):
         return self.date_posted is not None and self.date_posted < timezone.now()
@@ -45,9 +58,106 @@ class Likes(models.Model):
 
     class Meta:
         unique_together = (('user', 'post'),)
+        indexes = [
+            models.Index(fields=["post", "-liked_at", "-id"], name="likes_post_liked_at_idx"),
+        ]
 
 class Comments(models.Model):
     user = models.ForeignKey(get_user_model(), on_delete=models.CASCADE, related_name='user_comments')
     post = models.ForeignKey(Post, on_delete=models.CASCADE, related_name='post_comments')
     comment = models.TextField(max_length=500)
     date_posted = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["post", "-date_posted", "-id"], name="comments_post_date_idx"),
+        ]
+
+
+class TimelineEntry(models.Model):
+    user = models.ForeignKey(get_user_model(), on_delete=models.CASCADE, related_name="timeline_entries")
+    post = models.ForeignKey(Post, on_delete=models.CASCADE, related_name="timeline_entries")
+    date_posted = models.DateTimeField()
+    # likes the user gave the post's author, and the post's rank in the user's ranked timeline
+    affinity = models.PositiveIntegerField(default=0)
+    score = models.FloatField(default=0)
+
+    class Meta:
+        unique_together = (("user", "post"),)
+        indexes = [
+            models.Index(fields=["user", "-date_posted", "-post"], name="timeline_user_date_idx"),
+            models.Index(fields=["user", "-score", "-post"], name="timeline_user_score_idx"),
+        ]
+
+
+class TagPosting(models.Model):
+    tag = models.ForeignKey(Tags, on_delete=models.CASCADE, related_name="postings")
+    post = models.ForeignKey(Post, on_delete=models.CASCADE, related_name="tag_postings")
+    date_posted = models.DateTimeField(null=True)
+
+    class Meta:
+        unique_together = (("tag", "post"),)
+        indexes = [
+            models.Index(fields=["tag", "-date_posted", "-post"], name="tag_posting_tag_date_idx"),
+        ]
+
+
+class PostActivity(models.Model):
+    """weighted likes and comments a post received during one trending time bucket"""
+    post = models.ForeignKey(Post, on_delete=models.CASCADE, related_name="activity")
+    bucket = models.PositiveIntegerField()
+    weight = models.FloatField(default=0)
+
+    class Meta:
+        unique_together = (("post", "bucket"),)
+        indexes = [
+            models.Index(fields=["bucket"], name="post_activity_bucket_idx"),
+        ]
+
+
+class TagActivity(models.Model):
+    """weighted publications with a tag during one trending time bucket"""
+    tag = models.ForeignKey(Tags, on_delete=models.CASCADE, related_name="activity")
+    bucket = models.PositiveIntegerField()
+    weight = models.FloatField(default=0)
+
+    class Meta:
+        unique_together = (("tag", "bucket"),)
+        indexes = [
+            models.Index(fields=["bucket"], name="tag_activity_bucket_idx"),
+        ]
+
+
+class TrendingPost(models.Model):
+    post = models.OneToOneField(Post, on_delete=models.CASCADE, primary_key=True, related_name="trending")
+    score = models.FloatField()
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["-score"], name="trending_post_score_idx"),
+        ]
+
+
+class TrendingTag(models.Model):
+    tag = models.OneToOneField(Tags, on_delete=models.CASCADE, primary_key=True, related_name="trending")
+    score = models.FloatField()
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["-score"], name="trending_tag_score_idx"),
+        ]
+
+
+class PostSearchEntry(models.Model):
+    """a row of the FTS5 post index (social.search), read through joins from Post"""
+    post = models.OneToOneField(
+        Post, on_delete=models.DO_NOTHING, primary_key=True, db_column="rowid", db_constraint=False,
+        related_name="search_entry",
+    )
+    text = models.TextField()
+    # the FTS5 hidden column holding the bm25 relevance of the row under the MATCH of the query
+    rank = models.FloatField()
+
+    class Meta:
+        managed = False
+        db_table = "social_post_fts"
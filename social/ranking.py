@@ -0,0 +1,149 @@
+"""
+Precomputed scores for the ranked home timeline (`subscribed_posts?ranking=score`).
+
+A score is the sum of three terms in log2 units:
+
+* recency: date_posted / FEED_RANKING_HALF_LIFE, so a post one half-life older needs
+  twice the engagement to rank level. Adding time rather than decaying the score keeps
+  stored scores comparable with each other, nothing is rescored as time passes;
+* engagement: log2(1 + likes + FEED_RANKING_COMMENT_WEIGHT * comments), rounded down
+  to 1/ENGAGEMENT_STEPS, so a post is rescored a few dozen times over its life rather
+  than on every like;
+* affinity: FEED_RANKING_AFFINITY_WEIGHT * log2(1 + likes the reader gave the author).
+
+Post.feed_score holds the reader independent part. TimelineEntry.score adds the
+reader's affinity and is indexed per user, so a ranked page is an index range read.
+"""
+import math
+from collections import defaultdict
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Count, F
+from django.db.models.functions import Greatest, Log
+
+from social.models import Likes, Post, TimelineEntry
+
+ENGAGEMENT_STEPS = 4
+RESCORE_BATCH_SIZE = 1000
+
+
+def post_score(date_posted, likes, comments):
+    engagement = math.log2(1 + likes + settings.FEED_RANKING_COMMENT_WEIGHT * comments)
+    return (
+        date_posted.timestamp() / settings.FEED_RANKING_HALF_LIFE
+        + math.floor(engagement * ENGAGEMENT_STEPS) / ENGAGEMENT_STEPS
+    )
+
+
+def affinity_score(affinity):
+    return settings.FEED_RANKING_AFFINITY_WEIGHT * math.log2(1 + affinity)
+
+
+def _affinity_expression(affinity):
+    return settings.FEED_RANKING_AFFINITY_WEIGHT * Log(2, affinity + 1)
+
+
+def affinities(user_ids, author_id):
+    """{user id: number of the author's posts the user liked}, users without likes are left out"""
+    return dict(
+        Likes.objects.filter(post__owner_id=author_id, user_id__in=user_ids).order_by().values("user_id").annotate(
+            total=Count("pk")
+        ).values_list("user_id", "total")
+    )
+
+
+def score_published_post(post):
+    post.feed_score = post_score(post.date_posted, post.likes_count, post.comments_count)
+    Post.objects.filter(pk=post.pk).update(feed_score=post.feed_score)
+
+
+def rescore_post(post_id):
+    """follow a change of likes or comments, returns whether the post's engagement step moved"""
+    row = Post.objects.filter(pk=post_id, date_posted__isnull=False).values_list(
+        "date_posted", "likes_count", "comments_count", "feed_score"
+    ).first()
+    if row is None:
+        return False
+
+    date_posted, likes, comments, current = row
+    score = post_score(date_posted, likes, comments)
+    if math.isclose(score, current):
+        return False
+
+    Post.objects.filter(pk=post_id).update(feed_score=score)
+    TimelineEntry.objects.filter(post_id=post_id).update(score=score + _affinity_expression(F("affinity")))
+    return True
+
+
+def change_affinity(user_id, author_id, delta):
+    """shift the user's affinity for an author by `delta` likes across the user's timeline"""
+    affinity = Greatest(F("affinity") + delta, 0)
+    TimelineEntry.objects.filter(user_id=user_id, post__owner_id=author_id).update(
+        affinity=affinity,
+        score=F("score") + _affinity_expression(affinity) - _affinity_expression(F("affinity")),
+    )
+
+
+def refresh_affinity(user_id, author_id):
+    """recount the user's affinity for an author, for likes written without signals"""
+    affinity = Likes.objects.filter(user_id=user_id, post__owner_id=author_id).count()
+    TimelineEntry.objects.filter(user_id=user_id, post__owner_id=author_id).update(
+        affinity=affinity,
+        score=F("score") + affinity_score(affinity) - _affinity_expression(F("affinity")),
+    )
+
+
+def rescore_posts():
+    """recompute Post.feed_score of every published post, returns the number of posts"""
+    rows = Post.objects.filter(date_posted__isnull=False).values_list(
+        "pk", "date_posted", "likes_count", "comments_count"
+    )
+    batch, total = [], 0
+    for pk, date_posted, likes, comments in rows.iterator(chunk_size=RESCORE_BATCH_SIZE):
+        batch.append(Post(pk=pk, feed_score=post_score(date_posted, likes, comments)))
+        if len(batch) >= RESCORE_BATCH_SIZE:
+            total += _bulk_update(Post, batch, ["feed_score"])
+            batch = []
+    return total + _bulk_update(Post, batch, ["feed_score"])
+
+
+def rescore_timelines():
+    """recompute the affinity and score of every timeline entry from Post.feed_score, returns the entries"""
+    total = 0
+    user_ids = TimelineEntry.objects.order_by("user_id").values_list("user_id", flat=True).distinct()
+    for user_id in list(user_ids):
+        liked = dict(
+            Likes.objects.filter(user_id=user_id).order_by().values("post__owner_id").annotate(
+                total=Count("pk")
+            ).values_list("post__owner_id", "total")
+        )
+        entries = TimelineEntry.objects.filter(user_id=user_id).values_list("pk", "post__owner_id", "post__feed_score")
+        entries = [
+            TimelineEntry(pk=pk, affinity=liked.get(owner_id, 0), score=score + affinity_score(liked.get(owner_id, 0)))
+            for pk, owner_id, score in entries
+        ]
+        total += _bulk_update(TimelineEntry, entries, ["affinity", "score"])
+    return total
+
+
+def _bulk_update(model, objects, fields):
+    if objects:
+        with transaction.atomic():
+            model.objects.bulk_update(objects, fields, batch_size=RESCORE_BATCH_SIZE)
+    return len(objects)
+
+
+def apply_like_changes(user_post_pairs):
+    """rescore after likes were written or removed in bulk, bypassing the signals"""
+    owners = dict(Post.objects.filter(pk__in={post_id for _, post_id in user_post_pairs}).values_list("pk", "owner_id"))
+    authors = defaultdict(set)
+    for user_id, post_id in user_post_pairs:
+        if post_id in owners:
+            authors[user_id].add(owners[post_id])
+
+    for post_id in owners:
+        rescore_post(post_id)
+    for user_id, author_ids in authors.items():
+        for author_id in author_ids:
+            refresh_affinity(user_id, author_id)
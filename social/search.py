@@ -0,0 +1,105 @@
+import re
+
+from django.db import connections
+from django.db.models import F, FloatField, Lookup
+from django.db.models.expressions import RawSQL
+
+from social.models import PostSearchEntry
+
+FTS_TABLE = "social_post_fts"
+
+# FTS5 external-content index over social_post.text, kept in sync by triggers so that
+# bulk inserts/updates made outside the ORM signals are indexed as well
+CREATE_INDEX_SQL = (
+    f"""
+    CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE} USING fts5(
+        text, content='social_post', content_rowid='id', tokenize='unicode61 remove_diacritics 2'
+    )
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_ai AFTER INSERT ON social_post BEGIN
+        INSERT INTO {FTS_TABLE}(rowid, text) VALUES (new.id, new.text);
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_ad AFTER DELETE ON social_post BEGIN
+        INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, text) VALUES ('delete', old.id, old.text);
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_au AFTER UPDATE OF text ON social_post BEGIN
+        INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, text) VALUES ('delete', old.id, old.text);
+        INSERT INTO {FTS_TABLE}(rowid, text) VALUES (new.id, new.text);
+    END
+    """,
+)
+
+DROP_INDEX_SQL = (
+    f"DROP TRIGGER IF EXISTS {FTS_TABLE}_ai",
+    f"DROP TRIGGER IF EXISTS {FTS_TABLE}_ad",
+    f"DROP TRIGGER IF EXISTS {FTS_TABLE}_au",
+    f"DROP TABLE IF EXISTS {FTS_TABLE}",
+)
+
+
+class Match(Lookup):
+    """`<index column> MATCH <FTS5 query>`, evaluated once by the index for the whole query"""
+    lookup_name = "match"
+
+    def as_sql(self, compiler, connection):
+        lhs, lhs_params = self.process_lhs(compiler, connection)
+        rhs, rhs_params = self.process_rhs(compiler, connection)
+        return f"{lhs} MATCH {rhs}", [*lhs_params, *rhs_params]
+
+
+PostSearchEntry._meta.get_field("text").register_lookup(Match)
+
+
+def is_supported(using="default"):
+    return connections[using].vendor == "sqlite"
+
+
+def create_search_index(connection, rebuild=True):
+    """create the index and its triggers if they are missing, optionally reindexing every post"""
+    if connection.vendor != "sqlite":
+        return
+    with connection.cursor() as cursor:
+        for statement in CREATE_INDEX_SQL:
+            cursor.execute(statement)
+        if rebuild:
+            cursor.execute(f"INSERT INTO {FTS_TABLE}({FTS_TABLE}) VALUES ('rebuild')")
+
+
+def drop_search_index(connection):
+    if connection.vendor != "sqlite":
+        return
+    with connection.cursor() as cursor:
+        for statement in DROP_INDEX_SQL:
+            cursor.execute(statement)
+
+
+def match_expression(text):
+    """FTS5 query matching every word of `text`, each word also as a prefix"""
+    return " ".join(f'"{word}"*' for word in re.findall(r"\w+", text.lower()))
+
+
+def filter_by_text(queryset, text):
+    expression = match_expression(text)
+    if not expression or not is_supported(queryset.db):
+        return queryset.filter(text__icontains=text)
+
+    return queryset.filter(
+        pk__in=RawSQL(f"SELECT rowid FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH %s", [expression])
+    )
+
+
+def search(queryset, text):
+    """posts matching `text`, annotated with `search_rank` (bm25, lower is more relevant)"""
+    expression = match_expression(text)
+    if not expression or not is_supported(queryset.db):
+        return queryset.filter(text__icontains=text).annotate(
+            search_rank=RawSQL("0", [], output_field=FloatField())
+        )
+
+    # one join with the index: its MATCH drives the query and its `rank` column holds bm25
+    return queryset.filter(search_entry__text__match=expression).annotate(search_rank=F("search_entry__rank"))
@@ -1,13 +1,66 @@
+from collections import defaultdict
+
+from django.contrib.auth import get_user_model
+from django.db.models import Prefetch
 from django.utils import timezone
 from rest_framework import serializers
 
+from social import images
 from social.models import Post, Likes, PostImage, Tags, Comments
+from social.tasks import schedule_image_variants, schedule_publication
+from social_media_api.fieldsets import DynamicFieldsMixin
+from social_media_api.rows import RowSerializer
+
+LATEST_PREVIEW_SIZE = 3
+LATEST_LIKES_ATTR = "latest_likes_preview"
+LATEST_COMMENTS_ATTR = "latest_comments_preview"
+
+
+def newest_likes(queryset):
+    return queryset.select_related("user").order_by("-liked_at", "-id")[:LATEST_PREVIEW_SIZE]
+
+
+def newest_comments(queryset):
+    return queryset.select_related("user").order_by("-date_posted", "-id")[:LATEST_PREVIEW_SIZE]
+
+
+def latest_preview_prefetches():
+    """bounded prefetches of the newest likes and comments shown on the post detail"""
+    return (
+        Prefetch("post_likes", queryset=newest_likes(Likes.objects.all()), to_attr=LATEST_LIKES_ATTR),
+        Prefetch("post_comments", queryset=newest_comments(Comments.objects.all()), to_attr=LATEST_COMMENTS_ATTR),
+    )
+
+
+def _url_builder(context):
+    request = context.get("request")
+    if request is None:
+        return lambda url: url
+    return request.build_absolute_uri
+
+
+def image_representation(post_image, variant, build_url):
+    return {
+        "url": images.variant_url(post_image, variant, build_url),
+        "width": post_image.variants.get(variant, {}).get("width"),
+        "height": post_image.variants.get(variant, {}).get("height"),
+        "srcset": images.srcset(post_image, build_url),
+    }
 
 
 class ImagePostSerializer(serializers.ModelSerializer):
+    url = serializers.SerializerMethodField()
+    srcset = serializers.SerializerMethodField()
+
     class Meta:
         model = PostImage
-        fields = ("image", "uploaded_at")
+        fields = ("image", "url", "width", "height", "srcset", "uploaded_at")
+
+    def get_url(self, obj):
+        return images.variant_url(obj, "full", _url_builder(self.context))
+
+    def get_srcset(self, obj):
+        return images.srcset(obj, _url_builder(self.context))
 
 
 class LikesSerializer(serializers.ModelSerializer):
@@ -24,10 +77,24 @@ class TagsSerializer(serializers.ModelSerializer):
         fields = ("name",)
 
 
-class PostListSerializer(serializers.ModelSerializer):
+class TrendingTagSerializer(serializers.ModelSerializer):
+    score = serializers.FloatField(read_only=True)
+
+    class Meta:
+        model = Tags
+        fields = ("id", "name", "score")
+
+
+class PostOwnerSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = get_user_model()
+        fields = ("id", "username", "image")
+
+
+class PostListSerializer(DynamicFieldsMixin, serializers.ModelSerializer):
     images = serializers.SerializerMethodField()
     owner = serializers.ReadOnlyField(source="owner.username")
-    likes = serializers.SerializerMethodField(source="likes")
+    likes = serializers.IntegerField(source="likes_count", read_only=True)
     tags = serializers.SlugRelatedField(many=True, queryset=Tags.objects.all(), slug_field="name")
     is_liked = serializers.BooleanField(read_only=True)
     date_posted = serializers.DateTimeField(read_only=True)
@@ -37,12 +104,77 @@ class PostListSerializer(serializers.ModelSerializer):
         model = Post
         fields = ("id", "text", "images", "likes", "tags", "is_liked", "date_posted", "owner", "scheduled_time")
 
-    def get_images(self, obj):
-        request = self.context.get("request")
-        return [request.build_absolute_uri(image.image.url) for image in obj.images.all()]
+    expandable_fields = {
+        "owner": (PostOwnerSerializer, {"read_only": True}),
+    }
 
-    def get_likes(self, obj):
-        return obj.post_likes.count()
+    def get_images(self, obj):
+        build_url = _url_builder(self.context)
+        return [image_representation(image, images.FEED_VARIANT, build_url) for image in obj.images.all()]
+
+    def update(self, instance, validated_data):
+        rescheduled = (
+            "scheduled_time" in validated_data
+            and validated_data["scheduled_time"] != instance.scheduled_time
+        )
+        instance = super().update(instance, validated_data)
+        if rescheduled:
+            schedule_publication(instance)
+        return instance
+
+
+class PostListRowSerializer(RowSerializer):
+    """PostListSerializer output of `.values()` rows, with one query for the images and one for the tags of a page"""
+    serializer_class = PostListSerializer
+    fields = ("id", "text", "images", "likes", "tags", "is_liked", "date_posted", "owner")
+    optional_fields = ("is_liked",)
+
+    @classmethod
+    def columns(cls, fieldset):
+        # date_posted and id also make the pagination cursor
+        columns = ["id", "text", "likes_count", "date_posted"]
+        if fieldset.expands("owner"):
+            columns += ["owner_id", "owner__username", "owner__image"]
+        elif fieldset.includes("owner"):
+            columns.append("owner__username")
+        return columns
+
+    def load(self, rows):
+        ids = [row["id"] for row in rows]
+        self.images = defaultdict(list)
+        self.tags = defaultdict(list)
+        if not ids:
+            return
+
+        if self.fieldset.includes("images"):
+            for image in PostImage.objects.filter(post_id__in=ids).order_by("pk"):
+                self.images[image.post_id].append(image)
+        if self.fieldset.includes("tags"):
+            # the join of the `tags` prefetch, which reads the tags in the same order
+            tags = Tags.objects.filter(tag_post__in=ids).values_list("tag_post", "name")
+            for post_id, name in tags:
+                self.tags[post_id].append(name)
+
+    def get_images(self, row):
+        build_url = _url_builder(self.context)
+        return [image_representation(image, images.FEED_VARIANT, build_url) for image in self.images[row["id"]]]
+
+    def get_likes(self, row):
+        return row["likes_count"]
+
+    def get_tags(self, row):
+        return self.tags[row["id"]]
+
+    def get_is_liked(self, row):
+        return bool(row["is_liked"])
+
+    def get_date_posted(self, row):
+        return self.datetime_field.to_representation(row["date_posted"])
+
+    def get_owner(self, row):
+        if self.fieldset.expands("owner"):
+            return {"id": row["owner_id"], "username": row["owner__username"], "image": self.file_url(row["owner__image"])}
+        return row["owner__username"]
 
 
 class PostCreateSerializer(serializers.ModelSerializer):
@@ -68,8 +200,9 @@ class PostCreateSerializer(serializers.ModelSerializer):
         post.tags.set(tags)
 
         for image_data in images_data:
-            PostImage.objects.create(post=post, image=image_data)
+            schedule_image_variants(PostImage.objects.create(post=post, image=image_data))
 
+        schedule_publication(post)
         return post
 
 
@@ -94,10 +227,27 @@ class PostDetailSerializer(serializers.ModelSerializer):
     images = ImagePostSerializer(many=True, read_only=True)
     owner = serializers.ReadOnlyField(source="owner.username")
     tags = serializers.SlugRelatedField(many=True, queryset=Tags.objects.all(), slug_field="name")
-    likes = LikesSerializer(source="post_likes", many=True, read_only=True)
+    likes = serializers.IntegerField(source="likes_count", read_only=True)
+    latest_likes = serializers.SerializerMethodField()
     is_liked = serializers.BooleanField()
-    comments = CommentsSerializer(source="post_comments", many=True)
+    comments_count = serializers.IntegerField(read_only=True)
+    latest_comments = serializers.SerializerMethodField()
 
     class Meta:
         model = Post
-        fields = ("id", "text", "images", "owner", "likes", "date_posted", "tags", "is_liked", "comments")
+        fields = (
+            "id", "text", "images", "owner", "likes", "latest_likes", "date_posted", "tags", "is_liked",
+            "comments_count", "latest_comments",
+        )
+
+    def get_latest_likes(self, obj):
+        likes = getattr(obj, LATEST_LIKES_ATTR, None)
+        if likes is None:
+            likes = newest_likes(obj.post_likes.all())
+        return LikesSerializer(likes, many=True, context=self.context).data
+
+    def get_latest_comments(self, obj):
+        comments = getattr(obj, LATEST_COMMENTS_ATTR, None)
+        if comments is None:
+            comments = newest_comments(obj.post_comments.all())
+        return CommentsSerializer(comments, many=True, context=self.context).data
@@ -0,0 +1,173 @@
+from django.db import connections
+from django.db.models import F
+from django.db.models.signals import post_save, post_delete, post_migrate, m2m_changed
+from django.dispatch import Signal, receiver
+from django.utils import timezone
+
+from social import cache as feed_cache, like_buffer, ranking, search, tag_index, timeline, trending
+from social.models import Post, Likes, Comments
+from user.models import Follow
+
+# sent once a post becomes visible, either on creation or when its scheduled time comes
+post_published = Signal()
+
+
+@receiver(post_save, sender=Post)
+def send_post_published(sender, instance, created, update_fields=None, **kwargs):
+    if instance.date_posted is None:
+        return
+    if created or (update_fields and "date_posted" in update_fields):
+        post_published.send(sender=sender, post=instance)
+
+
+@receiver(post_published)
+def score_published_post(sender, post, **kwargs):
+    ranking.score_published_post(post)
+
+
+@receiver(post_published)
+def fan_out_post(sender, post, **kwargs):
+    timeline.fan_out_post(post)
+
+
+@receiver(post_published)
+@receiver(post_save, sender=Post)
+@receiver(post_delete, sender=Post)
+@receiver(m2m_changed, sender=Post.tags.through)
+def invalidate_feeds(sender, **kwargs):
+    feed_cache.invalidate_feeds()
+
+
+@receiver(post_save, sender=Likes)
+@receiver(post_delete, sender=Likes)
+@receiver(post_save, sender=Comments)
+@receiver(post_delete, sender=Comments)
+def invalidate_post_feeds(sender, instance, **kwargs):
+    feed_cache.invalidate_posts([instance.post_id])
+
+
+@receiver(post_published)
+def publish_tag_postings(sender, post, **kwargs):
+    tag_index.publish_postings(post)
+
+
+@receiver(m2m_changed, sender=Post.tags.through)
+def sync_tag_postings(sender, instance, action, reverse, pk_set, **kwargs):
+    if action == "post_add":
+        if reverse:
+            tag_index.add_postings(pk_set, [instance.pk])
+        else:
+            tag_index.add_postings([instance.pk], pk_set)
+    elif action == "post_remove":
+        if reverse:
+            tag_index.remove_postings(post_ids=pk_set, tag_ids=[instance.pk])
+        else:
+            tag_index.remove_postings(post_ids=[instance.pk], tag_ids=pk_set)
+    elif action == "post_clear":
+        if reverse:
+            tag_index.remove_postings(tag_ids=[instance.pk])
+        else:
+            tag_index.remove_postings(post_ids=[instance.pk])
+
+
+@receiver(post_published)
+def count_trending_publication(sender, post, **kwargs):
+    trending.record_publication(post.tags.values_list("pk", flat=True))
+
+
+@receiver(m2m_changed, sender=Post.tags.through)
+def count_trending_tags(sender, instance, action, reverse, pk_set, **kwargs):
+    # tags added to a post that is already out; a scheduled post counts once it is published
+    if action != "post_add":
+        return
+    if reverse:
+        published = Post.objects.filter(pk__in=pk_set, date_posted__lte=timezone.now()).count()
+        trending.record_publication([instance.pk], posts=published)
+    elif instance.is_published():
+        trending.record_publication(pk_set)
+
+
+@receiver(post_save, sender=Likes)
+def count_trending_like(sender, instance, created, **kwargs):
+    if created:
+        trending.record_like(instance.post_id)
+
+
+@receiver(post_delete, sender=Likes)
+def uncount_trending_like(sender, instance, origin=None, **kwargs):
+    if trending.deleted_directly(origin, Likes) and not like_buffer.is_applying():
+        trending.record_like(instance.post_id, liked=False)
+
+
+@receiver(post_save, sender=Comments)
+def count_trending_comment(sender, instance, created, **kwargs):
+    if created:
+        trending.record_comment(instance.post_id)
+
+
+@receiver(post_delete, sender=Comments)
+def uncount_trending_comment(sender, instance, origin=None, **kwargs):
+    if trending.deleted_directly(origin, Comments):
+        trending.record_comment(instance.post_id, added=False)
+
+
+@receiver(post_save, sender=Follow)
+def backfill_timeline(sender, instance, created, **kwargs):
+    if created:
+        timeline.backfill_timeline(instance.follower_id, instance.following_id)
+
+
+@receiver(post_delete, sender=Follow)
+def remove_author_from_timeline(sender, instance, **kwargs):
+    timeline.remove_author_from_timeline(instance.follower_id, instance.following_id)
+
+
+@receiver(post_save, sender=Likes)
+def increment_likes_count(sender, instance, created, **kwargs):
+    if created:
+        Post.objects.filter(pk=instance.post_id).update(likes_count=F("likes_count") + 1)
+
+
+@receiver(post_delete, sender=Likes)
+def decrement_likes_count(sender, instance, **kwargs):
+    if like_buffer.is_applying():
+        return
+    Post.objects.filter(pk=instance.post_id, likes_count__gt=0).update(likes_count=F("likes_count") - 1)
+
+
+@receiver(post_save, sender=Comments)
+def increment_comments_count(sender, instance, created, **kwargs):
+    if created:
+        Post.objects.filter(pk=instance.post_id).update(comments_count=F("comments_count") + 1)
+
+
+@receiver(post_delete, sender=Comments)
+def decrement_comments_count(sender, instance, **kwargs):
+    Post.objects.filter(pk=instance.post_id, comments_count__gt=0).update(comments_count=F("comments_count") - 1)
+
+
+@receiver(post_save, sender=Likes)
+@receiver(post_delete, sender=Likes)
+def rerank_liked_post(sender, instance, created=None, **kwargs):
+    # runs after the counter receivers above, so rescore_post sees the new likes_count
+    if created is False or like_buffer.is_applying():
+        return
+    ranking.rescore_post(instance.post_id)
+    author_id = Post.objects.filter(pk=instance.post_id).values_list("owner_id", flat=True).first()
+    if author_id is not None:
+        ranking.change_affinity(instance.user_id, author_id, 1 if created else -1)
+
+
+@receiver(post_save, sender=Comments)
+@receiver(post_delete, sender=Comments)
+def rerank_commented_post(sender, instance, created=None, **kwargs):
+    if created is not False:
+        ranking.rescore_post(instance.post_id)
+
+
+@receiver(post_migrate)
+def ensure_search_index(sender, using, **kwargs):
+    # sqlite rebuilds a table on most schema changes, which silently drops its triggers
+    connection = connections[using]
+    if sender.name == "social" and "social_post" in connection.introspection.table_names():
+        search.create_search_index(connection, rebuild=False)
@@ -0,0 +1,278 @@
+"""
+Deterministic synthetic social graph for load testing at production scale.
+
+Popularity follows a Zipf law over a shuffled ranking, so a handful of celebrity
+accounts collect most follows and likes. How much a user follows, posts, likes and
+comments follows a Pareto law, so a long tail of accounts does almost nothing. Likes
+and comments arrive in bursts shortly after a post is published.
+
+Everything is derived from one seeded random generator and written with chunked
+bulk_create. Users share one password hash, and derived tables (counters, feed scores,
+timelines, tag postings) are filled in bulk instead of by the per-row signals.
+"""
+import itertools
+import random
+import string
+import time
+from array import array
+from collections import Counter
+from contextlib import contextmanager
+from datetime import datetime, timezone as dt_timezone
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.db import connection, transaction
+from django.utils import timezone
+
+from social import ranking
+from social.counters import reconcile_post_counters
+from social.models import Comments, Likes, Post, TagPosting, Tags, TimelineEntry
+from social.tasks import trim_timelines
+from user.counters import reconcile_follow_counters
+from user.models import Follow
+
+VOCABULARY_SIZE = 5_000
+TAGS_PER_POST_WEIGHTS = (30, 40, 20, 10)
+PARETO_ALPHA = 1.3
+
+
+@contextmanager
+def explicit_timestamps(*fields):
+    """let bulk_create keep the timestamps we generated instead of auto_now_add overwriting them"""
+    for field in fields:
+        field.auto_now_add = False
+    try:
+        yield
+    finally:
+        for field in fields:
+            field.auto_now_add = True
+
+
+class SocialGraphGenerator:
+    def __init__(self, seed=0, batch_size=10_000, prefix="user", password="password", days=365,
+                 zipf_exponent=1.0, burst_hours=6, log=None):
+        self.rng = random.Random(seed)
+        self.batch_size = batch_size
+        self.prefix = prefix
+        self.password = password
+        self.days = days
+        self.zipf_exponent = zipf_exponent
+        self.burst_seconds = burst_hours * 3600
+        self.log = log or (lambda message: None)
+        self.now = timezone.now()
+
+        self.user_ids = array("q")
+        self.popularity = []
+        self.activity = []
+        self.tag_ids = []
+        self.tag_weights = []
+        self.vocabulary = []
+        self.word_weights = []
+        # posts are laid out author by author: author -> (first index, count) into post_ids/post_times
+        self.post_ids = array("q")
+        self.post_times = array("d")
+        self.authors = []
+        self.author_popularity = []
+        self.author_posts = {}
+
+    def _batches(self, total):
+        for start in range(0, total, self.batch_size):
+            yield min(self.batch_size, total - start)
+
+    def _zipf_weights(self, count):
+        ranks = list(range(1, count + 1))
+        self.rng.shuffle(ranks)
+        return list(itertools.accumulate(1 / rank ** self.zipf_exponent for rank in ranks))
+
+    def _pareto_weights(self, count):
+        return list(itertools.accumulate(self.rng.paretovariate(PARETO_ALPHA) for _ in range(count)))
+
+    def _timestamp(self, seconds):
+        return datetime.fromtimestamp(seconds, tz=dt_timezone.utc)
+
+    def _text(self, words):
+        return " ".join(self.rng.choices(self.vocabulary, cum_weights=self.word_weights, k=words))
+
+    def _step(self, name, func, *args):
+        start = time.perf_counter()
+        created = func(*args)
+        self.log(f"{name}: {created} in {time.perf_counter() - start:.1f}s")
+        return created
+
+    def generate(self, users, follows, posts, likes, comments, tags):
+        self.vocabulary = [
+            "".join(self.rng.choices(string.ascii_lowercase, k=self.rng.randint(3, 9)))
+            for _ in range(VOCABULARY_SIZE)
+        ]
+        self.word_weights = self._zipf_weights(VOCABULARY_SIZE)
+
+        with transaction.atomic():
+            self._step("users", self.create_users, users)
+            self._step("tags", self.create_tags, tags)
+            self._step("follows", self.create_follows, follows)
+            self._step("posts", self.create_posts, posts)
+            self._step("likes", self.create_likes, likes)
+            self._step("comments", self.create_comments, comments)
+            self._step("follow counters", reconcile_follow_counters)
+            self._step("post counters", reconcile_post_counters)
+            self._step("post scores", ranking.rescore_posts)
+            self._step("timeline entries", self.create_timelines)
+            self._step("timeline scores", ranking.rescore_timelines)
+
+    def create_users(self, total):
+        User = get_user_model()
+        if User.objects.filter(username__startswith=self.prefix, email__endswith="@example.com").exists():
+            raise ValueError(f"users with the prefix {self.prefix!r} already exist")
+
+        password = make_password(self.password)
+        index = 0
+        for size in self._batches(total):
+            created = User.objects.bulk_create([
+                User(email=f"{self.prefix}{number}@example.com", username=f"{self.prefix}{number}", password=password)
+                for number in range(index, index + size)
+            ])
+            self.user_ids.extend(user.pk for user in created)
+            index += size
+
+        self.popularity = self._zipf_weights(total)
+        self.activity = self._pareto_weights(total)
+        return total
+
+    def create_tags(self, total):
+        existing = Tags.objects.count()
+        created = Tags.objects.bulk_create([Tags(name=f"{self.prefix}-tag{number}") for number in range(total)])
+        self.tag_ids = [tag.pk for tag in created]
+        self.tag_weights = self._zipf_weights(total) if total else []
+        return Tags.objects.count() - existing
+
+    def create_follows(self, total):
+        existing = Follow.objects.count()
+        with explicit_timestamps(Follow._meta.get_field("created_at")):
+            for size in self._batches(total):
+                followers = self.rng.choices(self.user_ids, cum_weights=self.activity, k=size)
+                followings = self.rng.choices(self.user_ids, cum_weights=self.popularity, k=size)
+                Follow.objects.bulk_create(
+                    [
+                        Follow(
+                            follower_id=follower,
+                            following_id=following,
+                            created_at=self._timestamp(self.now.timestamp() - self.rng.uniform(0, self.days * 86400)),
+                        )
+                        for follower, following in zip(followers, followings)
+                        if follower != following
+                    ],
+                    ignore_conflicts=True
+                )
+        return Follow.objects.count() - existing
+
+    def create_posts(self, total):
+        per_author = Counter()
+        for size in self._batches(total):
+            per_author.update(self.rng.choices(range(len(self.user_ids)), cum_weights=self.activity, k=size))
+
+        popularity = [weight - previous for previous, weight in zip([0, *self.popularity], self.popularity)]
+        owners, times = [], []
+        for author_index in sorted(per_author):
+            author, count = self.user_ids[author_index], per_author[author_index]
+            self.author_posts[author] = (len(self.post_ids) + len(owners), count)
+            self.authors.append(author)
+            self.author_popularity.append(popularity[author_index])
+            for _ in range(count):
+                owners.append(author)
+                times.append(self.now.timestamp() - self.rng.uniform(0, self.days * 86400))
+                if len(owners) >= self.batch_size:
+                    self._create_posts(owners, times)
+                    owners, times = [], []
+        self._create_posts(owners, times)
+
+        self.author_popularity = list(itertools.accumulate(self.author_popularity))
+        return len(self.post_ids)
+
+    def _create_posts(self, owners, times):
+        if not owners:
+            return
+        posts = Post.objects.bulk_create([
+            Post(text=self._text(self.rng.randint(5, 40)), owner_id=owner, date_posted=self._timestamp(seconds))
+            for owner, seconds in zip(owners, times)
+        ])
+        self.post_ids.extend(post.pk for post in posts)
+        self.post_times.extend(times)
+        self._create_post_tags(posts)
+
+    def _create_post_tags(self, posts):
+        if not self.tag_ids:
+            return
+        through, postings = [], []
+        for post in posts:
+            count = self.rng.choices(range(len(TAGS_PER_POST_WEIGHTS)), weights=TAGS_PER_POST_WEIGHTS)[0]
+            for tag_id in set(self.rng.choices(self.tag_ids, cum_weights=self.tag_weights, k=count)):
+                through.append(Post.tags.through(post_id=post.pk, tags_id=tag_id))
+                postings.append(TagPosting(tag_id=tag_id, post_id=post.pk, date_posted=post.date_posted))
+        Post.tags.through.objects.bulk_create(through, batch_size=self.batch_size)
+        TagPosting.objects.bulk_create(postings, batch_size=self.batch_size)
+
+    def _reactions(self, size):
+        """(user, post index, reaction time) triples: active users reacting to popular authors, soon after posting"""
+        users = self.rng.choices(self.user_ids, cum_weights=self.activity, k=size)
+        authors = self.rng.choices(self.authors, cum_weights=self.author_popularity, k=size)
+        now = self.now.timestamp()
+        for user, author in zip(users, authors):
+            first, count = self.author_posts[author]
+            index = first + self.rng.randrange(count)
+            reacted = min(self.post_times[index] + self.rng.expovariate(1 / self.burst_seconds), now)
+            yield user, index, self._timestamp(reacted)
+
+    def create_likes(self, total):
+        if not self.post_ids:
+            return 0
+        existing = Likes.objects.count()
+        with explicit_timestamps(Likes._meta.get_field("liked_at")):
+            for size in self._batches(total):
+                Likes.objects.bulk_create(
+                    [
+                        Likes(user_id=user, post_id=self.post_ids[index], liked_at=liked_at)
+                        for user, index, liked_at in self._reactions(size)
+                    ],
+                    ignore_conflicts=True
+                )
+        return Likes.objects.count() - existing
+
+    def create_comments(self, total):
+        if not self.post_ids:
+            return 0
+        with explicit_timestamps(Comments._meta.get_field("date_posted")):
+            for size in self._batches(total):
+                Comments.objects.bulk_create([
+                    Comments(
+                        user_id=user,
+                        post_id=self.post_ids[index],
+                        comment=self._text(self.rng.randint(3, 30)),
+                        date_posted=date_posted,
+                    )
+                    for user, index, date_posted in self._reactions(size)
+                ])
+        return total
+
+    def create_timelines(self):
+        """materialize the home timelines in SQL, then cap them at TIMELINE_MAX_LENGTH"""
+        timeline = TimelineEntry._meta.db_table
+        follow = Follow._meta.db_table
+        post = Post._meta.db_table
+        user = get_user_model()._meta.db_table
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f"""
+                INSERT INTO {timeline} (user_id, post_id, date_posted, affinity, score)
+                SELECT f.follower_id, p.id, p.date_posted, 0, p.feed_score
+                FROM {follow} f
+                JOIN {post} p ON p.owner_id = f.following_id
+                JOIN {user} u ON u.id = f.following_id
+                WHERE p.date_posted IS NOT NULL AND u.followers_count < %s
+                ON CONFLICT DO NOTHING
+                """,
+                [settings.TIMELINE_FANOUT_FOLLOWER_LIMIT],
+            )
+            created = cursor.rowcount
+        trim_timelines()
+        return created
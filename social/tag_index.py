@@ -0,0 +1,47 @@
+from django.db.models import Count
+from django.utils import timezone
+
+from social.models import Post, TagPosting
+
+
+def add_postings(post_ids, tag_ids):
+    dates = dict(Post.objects.filter(pk__in=post_ids).values_list("pk", "date_posted"))
+    TagPosting.objects.bulk_create(
+        [
+            TagPosting(tag_id=tag_id, post_id=post_id, date_posted=date_posted)
+            for post_id, date_posted in dates.items()
+            for tag_id in tag_ids
+        ],
+        ignore_conflicts=True
+    )
+
+
+def remove_postings(post_ids=None, tag_ids=None):
+    postings = TagPosting.objects.all()
+    if post_ids is not None:
+        postings = postings.filter(post_id__in=post_ids)
+    if tag_ids is not None:
+        postings = postings.filter(tag_id__in=tag_ids)
+    postings.delete()
+
+
+def publish_postings(post):
+    TagPosting.objects.filter(post_id=post.pk).update(date_posted=post.date_posted)
+
+
+def _published_postings(tag_ids):
+    return TagPosting.objects.filter(tag_id__in=tag_ids, date_posted__lte=timezone.now())
+
+
+def filter_any(queryset, tag_ids):
+    """posts carrying at least one of the tags"""
+    return queryset.filter(pk__in=_published_postings(tag_ids).values("post_id"))
+
+
+def filter_all(queryset, tag_ids):
+    """posts carrying every one of the tags"""
+    tag_ids = set(tag_ids)
+    matched = _published_postings(tag_ids).values("post_id").annotate(
+        matched=Count("tag_id")
+    ).filter(matched=len(tag_ids)).values("post_id")
+    return queryset.filter(pk__in=matched)
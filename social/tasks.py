@@ -1,13 +1,112 @@
 from celery import shared_task
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Count, F
 from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from social import images, like_buffer, timeline, trending
+from social.signals import post_published
+from .models import Post, PostImage, TimelineEntry
+
+PUBLISH_BATCH_SIZE = 500
+PUBLISH_MAX_BATCHES = 20
+
+
+def schedule_publication(post):
+    """enqueue publish_post to run at the post's scheduled_time once the current transaction commits"""
+    if post.date_posted is not None or post.scheduled_time is None:
+        return
+
+    post_id, scheduled_time = post.pk, post.scheduled_time
+    transaction.on_commit(
+        lambda: publish_post.apply_async(args=[post_id, scheduled_time.isoformat()], eta=scheduled_time)
+    )
+
+
+def schedule_image_variants(post_image):
+    post_image_id = post_image.pk
+    transaction.on_commit(lambda: generate_image_variants.delay(post_image_id))
+
+
+def _announce(post_ids):
+    for post in Post.objects.filter(pk__in=post_ids):
+        post_published.send(sender=Post, post=post)
+
+
+def _claim(post_id):
+    """publish a due post, true only for the caller whose update actually published it"""
+    return bool(Post.objects.filter(pk=post_id, date_posted__isnull=True).update(date_posted=F("scheduled_time")))
+
+
+@shared_task
+def publish_post(post_id, scheduled_time):
+    """publish one post at its ETA; a no-op when it was rescheduled, unscheduled or already published"""
+    published = Post.objects.filter(
+        pk=post_id,
+        date_posted__isnull=True,
+        scheduled_time=parse_datetime(scheduled_time),
+    ).update(date_posted=F("scheduled_time"))
+
+    if published:
+        _announce([post_id])
+    return published
 
-from .models import Post
 
 @shared_task
-def publish_scheduled_posts():
+def publish_scheduled_posts(batch_size=PUBLISH_BATCH_SIZE, max_batches=PUBLISH_MAX_BATCHES):
+    """catch-up sweep for scheduled posts whose publish_post never ran, e.g. after downtime"""
     now = timezone.now()
-    scheduled_posts = Post.objects.filter(scheduled_time__lte=now, date_posted__isnull=True)
+    published = 0
 
-    for post in scheduled_posts:
-        post.date_posted = now
-        post.save()
+    for _ in range(max_batches):
+        post_ids = list(
+            Post.objects.filter(
+                scheduled_time__lte=now,
+                date_posted__isnull=True
+            ).order_by("scheduled_time", "pk").values_list("pk", flat=True)[:batch_size]
+        )
+        if not post_ids:
+            break
+
+        # one conditional update per post, so a post that publish_post published meanwhile
+        # is neither counted nor announced a second time
+        with transaction.atomic():
+            claimed = [post_id for post_id in post_ids if _claim(post_id)]
+        _announce(claimed)
+        published += len(claimed)
+
+    return published
+
+
+@shared_task
+def generate_image_variants(post_image_id):
+    post_image = PostImage.objects.filter(pk=post_image_id).first()
+    if post_image is None:
+        return None
+    return images.generate_variants(post_image)
+
+
+@shared_task
+def flush_like_buffer(max_users=like_buffer.FLUSH_MAX_USERS):
+    """write the buffered like/unlike intents to the database"""
+    if not like_buffer.is_enabled():
+        return 0
+    return like_buffer.flush(max_users)
+
+
+@shared_task
+def trim_timelines():
+    """cap every home timeline that grew past TIMELINE_MAX_LENGTH since the last run"""
+    oversized = list(TimelineEntry.objects.values("user_id").annotate(
+        total=Count("pk")
+    ).filter(total__gt=settings.TIMELINE_MAX_LENGTH).values_list("user_id", flat=True))
+
+    for user_id in oversized:
+        timeline.trim_timeline(user_id)
+
+
+@shared_task
+def refresh_trending():
+    """rescore the trending posts and tags from the activity of the current window"""
+    return trending.refresh_trending()
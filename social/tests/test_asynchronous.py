@@ -0,0 +1,126 @@
+from asgiref.sync import async_to_sync, iscoroutinefunction
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from django.urls import path
+from django.utils import timezone
+
+from rest_framework import status
+from rest_framework.test import APIRequestFactory, force_authenticate
+from rest_framework_simplejwt.tokens import AccessToken
+
+from social.models import Comments, Likes, Post, Tags
+from social.views import PostViewSet
+from social_media_api import metrics
+from user.models import Follow
+
+factory = APIRequestFactory()
+
+# the async views behind the whole middleware stack, for AsyncClient
+urlpatterns = [
+    path("posts/", PostViewSet.as_view({"get": "list"}, serve_async=True), name="async-posts"),
+]
+
+
+class AsyncPostViewTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = get_user_model().objects.create_user(email="test@mail.com", username="test")
+        self.author = get_user_model().objects.create_user(email="author@mail.com", username="author")
+        Follow.objects.create(follower=self.user, following=self.author)
+
+        tag = Tags.objects.create(name="python")
+        self.posts = []
+        for number in range(3):
+            post = Post.objects.create(text=f"post {number}", owner=self.author, date_posted=timezone.now())
+            post.tags.add(tag)
+            self.posts.append(post)
+        Likes.objects.create(user=self.user, post=self.posts[0])
+        Comments.objects.create(user=self.author, post=self.posts[0], comment="first")
+
+    def call(self, actions, serve_async, data=None, method="get", user=None, **kwargs):
+        cache.clear()
+        request = getattr(factory, method)("/api/social/posts/", data)
+        if user is not None:
+            force_authenticate(request, user=user)
+        view = PostViewSet.as_view(actions, serve_async=serve_async)
+        response = async_to_sync(view)(request, **kwargs) if serve_async else view(request, **kwargs)
+        return response.render()
+
+    def assertSameResponse(self, actions, data=None, user=None, **kwargs):
+        expected = self.call(actions, False, data, user=user, **kwargs)
+        response = self.call(actions, True, data, user=user, **kwargs)
+
+        self.assertEqual(response.status_code, expected.status_code)
+        self.assertEqual(response.content, expected.content)
+        self.assertEqual(response.get("ETag"), expected.get("ETag"))
+        return response
+
+    def test_list(self):
+        response = self.assertSameResponse({"get": "list"}, {"page_size": 2}, user=self.user)
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(response.data["results"]), 2)
+        self.assertIsNotNone(response.data["next"])
+
+    def test_list_anonymous(self):
+        self.assertSameResponse({"get": "list"})
+
+    def test_retrieve(self):
+        response = self.assertSameResponse({"get": "retrieve"}, user=self.user, pk=self.posts[0].pk)
+
+        self.assertTrue(response.data["is_liked"])
+        self.assertEqual(response.data["latest_comments"][0]["comment"], "first")
+
+    def test_retrieve_missing_post(self):
+        response = self.assertSameResponse({"get": "retrieve"}, user=self.user, pk=0)
+
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_subscribed_posts(self):
+        for ranking in ("date", "score"):
+            with self.subTest(ranking=ranking):
+                response = self.assertSameResponse({"get": "subscribed_posts"}, {"ranking": ranking}, user=self.user)
+                self.assertEqual(len(response.data["results"]), 3)
+
+        response = self.assertSameResponse({"get": "subscribed_posts"}, {"ranking": "hot"}, user=self.user)
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_permissions_are_checked(self):
+        response = self.assertSameResponse({"get": "subscribed_posts"})
+
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_methods_without_async_variant_run_synchronously(self):
+        response = self.call(
+            {"get": "list", "post": "create"}, True, {"text": "new", "tags": ["python"]}, method="post", user=self.user
+        )
+
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertTrue(Post.objects.filter(text="new").exists())
+
+    def test_only_routes_with_async_variants_are_async(self):
+        self.assertFalse(iscoroutinefunction(PostViewSet.as_view({"get": "list"})))
+        with override_settings(ASYNC_VIEWS=True):
+            self.assertTrue(iscoroutinefunction(PostViewSet.as_view({"get": "list", "post": "create"})))
+            self.assertFalse(iscoroutinefunction(PostViewSet.as_view({"post": "like"})))
+
+
+@override_settings(ROOT_URLCONF=__name__)
+class AsyncMiddlewareTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        metrics.registry.clear()
+        self.user = get_user_model().objects.create_user(email="test@mail.com", username="test")
+        Post.objects.create(text="test", owner=self.user, date_posted=timezone.now())
+
+    async def test_async_view_behind_the_middleware(self):
+        response = await self.async_client.get(
+            "/posts/", headers={"Authorization": f"Bearer {AccessToken.for_user(self.user)}"}
+        )
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.json()["results"][0]["text"], "test")
+        self.assertEqual(metrics.REQUESTS.values[("PostViewSet.list", "GET", "200")], 1)
+        _, queries = metrics.DB_QUERIES.values[("PostViewSet.list",)]
+        self.assertGreater(queries, 0)
@@ -0,0 +1,112 @@
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.test import TestCase
+from django.utils import timezone
+
+from social.counters import drifted_posts
+from social.models import Post, Likes, Comments, TagPosting, TimelineEntry
+from user.counters import drifted_users
+from user.models import Follow
+
+
+class ReconcilePostCountersTest(TestCase):
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(email="test@mail.com", username="test")
+        self.post = Post.objects.create(text="test", owner=self.user, date_posted=timezone.now())
+        Likes.objects.create(user=self.user, post=self.post)
+        Comments.objects.create(user=self.user, post=self.post, comment="test comment")
+
+    def test_repairs_drifted_counters(self):
+        Post.objects.filter(pk=self.post.pk).update(likes_count=10, comments_count=0)
+
+        out = StringIO()
+        call_command("reconcile_post_counters", stdout=out)
+
+        self.post.refresh_from_db()
+        self.assertEqual((self.post.likes_count, self.post.comments_count), (1, 1))
+        self.assertIn("1 post(s) repaired", out.getvalue())
+
+    def test_dry_run_leaves_counters(self):
+        Post.objects.filter(pk=self.post.pk).update(likes_count=10)
+
+        call_command("reconcile_post_counters", "--dry-run", stdout=StringIO())
+
+        self.post.refresh_from_db()
+        self.assertEqual(self.post.likes_count, 10)
+
+
+class RescoreFeedsTest(TestCase):
+    def setUp(self):
+        self.user_1 = get_user_model().objects.create_user(email="user_1@mail.com", username="user_1")
+        self.user_2 = get_user_model().objects.create_user(email="user_2@mail.com", username="user_2")
+        Follow.objects.create(follower=self.user_1, following=self.user_2)
+        self.post = Post.objects.create(text="test", owner=self.user_2, date_posted=timezone.now())
+
+    def test_rescores_posts_and_timelines(self):
+        expected = TimelineEntry.objects.get().score
+        Post.objects.update(feed_score=0)
+        TimelineEntry.objects.update(score=0)
+
+        out = StringIO()
+        call_command("rescore_feeds", stdout=out)
+
+        self.assertAlmostEqual(TimelineEntry.objects.get().score, expected)
+        self.assertIn("1 post(s) and 1 timeline entr(ies) rescored", out.getvalue())
+
+
+class GenerateSocialGraphTest(TestCase):
+    def generate(self, prefix, seed=1):
+        call_command(
+            "generate_social_graph",
+            "--users=60", "--follows=600", "--posts=300", "--likes=1500", "--comments=200", "--tags=10",
+            f"--seed={seed}", f"--prefix={prefix}", "--batch-size=100",
+            stdout=StringIO(),
+        )
+
+    def follow_graph(self, prefix):
+        return sorted(
+            (follower[len(prefix):], following[len(prefix):])
+            for follower, following in Follow.objects.filter(follower__username__startswith=prefix).values_list(
+                "follower__username", "following__username"
+            )
+        )
+
+    def test_generates_consistent_graph(self):
+        self.generate("a")
+
+        self.assertEqual(get_user_model().objects.count(), 60)
+        self.assertEqual(Post.objects.count(), 300)
+        self.assertEqual(Comments.objects.count(), 200)
+        self.assertGreater(Likes.objects.count(), 0)
+        self.assertFalse(drifted_posts().exists())
+        self.assertFalse(drifted_users().exists())
+        self.assertTrue(TimelineEntry.objects.exists())
+        self.assertFalse(TimelineEntry.objects.filter(score=0).exists())
+        self.assertEqual(
+            TagPosting.objects.count(), Post.tags.through.objects.count()
+        )
+        self.assertTrue(all(
+            liked_at >= date_posted
+            for liked_at, date_posted in Likes.objects.values_list("liked_at", "post__date_posted")
+        ))
+
+    def test_follow_counts_are_skewed(self):
+        self.generate("a")
+
+        counts = sorted(get_user_model().objects.values_list("followers_count", flat=True), reverse=True)
+        self.assertGreater(sum(counts[:6]), sum(counts) / 3)
+
+    def test_same_seed_generates_same_graph(self):
+        self.generate("a")
+        self.generate("b")
+
+        self.assertEqual(self.follow_graph("a"), self.follow_graph("b"))
+
+    def test_refuses_existing_prefix(self):
+        self.generate("a")
+
+        with self.assertRaises(CommandError):
+            self.generate("a")
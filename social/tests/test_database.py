@@ -0,0 +1,78 @@
+import os
+import tempfile
+
+from django.conf import settings
+from django.db import OperationalError, connections
+from django.db.backends.sqlite3.base import DatabaseWrapper
+from django.test import SimpleTestCase, override_settings
+
+from social_media_api.database import serialized_write
+
+
+@override_settings(DATABASE_WRITE_RETRIES=2, DATABASE_WRITE_RETRY_DELAY=0)
+class SerializedWriteTest(SimpleTestCase):
+    def writer(self, *errors):
+        calls = []
+        errors = list(errors)
+
+        @serialized_write
+        def write():
+            calls.append(1)
+            if errors:
+                raise errors.pop(0)
+            return "written"
+
+        return write, calls
+
+    def test_retries_locked_writes(self):
+        write, calls = self.writer(OperationalError("database is locked"))
+
+        self.assertEqual(write(), "written")
+        self.assertEqual(len(calls), 2)
+
+    def test_gives_up_after_the_retries(self):
+        write, calls = self.writer(*[OperationalError("database is locked")] * 3)
+
+        with self.assertRaises(OperationalError):
+            write()
+        self.assertEqual(len(calls), 3)
+
+    def test_other_errors_are_not_retried(self):
+        write, calls = self.writer(OperationalError("no such table: social_post"))
+
+        with self.assertRaises(OperationalError):
+            write()
+        self.assertEqual(len(calls), 1)
+
+    def test_no_retry_inside_a_transaction(self):
+        write, calls = self.writer(OperationalError("database is locked"))
+        connection = connections["default"]
+        connection.in_atomic_block = True
+        try:
+            with self.assertRaises(OperationalError):
+                write()
+        finally:
+            connection.in_atomic_block = False
+        self.assertEqual(len(calls), 1)
+
+
+class ProductionProfileTest(SimpleTestCase):
+    def test_sqlite_options_apply_on_connect(self):
+        handle, path = tempfile.mkstemp(suffix=".sqlite3")
+        os.close(handle)
+        wrapper = DatabaseWrapper(
+            {**connections.settings["default"], "NAME": path, "OPTIONS": settings.SQLITE_PRODUCTION_OPTIONS},
+            alias="production",
+        )
+        connection = wrapper.get_new_connection(wrapper.get_connection_params())
+        try:
+            pragmas = {
+                pragma: connection.execute(f"PRAGMA {pragma}").fetchone()[0]
+                for pragma in ("journal_mode", "synchronous", "temp_store", "busy_timeout")
+            }
+        finally:
+            connection.close()
+            os.remove(path)
+
+        self.assertEqual(pragmas, {"journal_mode": "wal", "synchronous": 1, "temp_store": 2, "busy_timeout": 20000})
+        self.assertEqual(wrapper.transaction_mode, "IMMEDIATE")
@@ -0,0 +1,73 @@
+from unittest import skipUnless
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import TransactionTestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from rest_framework import status
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import AccessToken
+
+from social.models import Post
+from social_media_api import db_router
+from user.authentication import clear as clear_user_cache
+
+# declared by social_media_api.test_settings, an unmirrored test database next to the test primary
+REPLICA = "replica"
+HAS_REPLICA = REPLICA in settings.DATABASES
+USER_URL = reverse("user:users-list")
+
+
+@skipUnless(HAS_REPLICA, "run with --settings=social_media_api.test_settings")
+@override_settings(DATABASE_REPLICAS=[REPLICA])
+class ReplicaRoutingTest(TransactionTestCase):
+    """rows created only in the replica show where reads went"""
+    databases = {"default", REPLICA} if HAS_REPLICA else {"default"}
+
+    def setUp(self):
+        cache.clear()
+        clear_user_cache()
+        self.user = get_user_model().objects.create_user(email="test@mail.com", username="test")
+        self.other = get_user_model().objects.create_user(email="other@mail.com", username="other")
+        for user in (self.user, self.other):
+            get_user_model().objects.using(REPLICA).create(pk=user.pk, email=user.email, username=user.username)
+        self.ghost = get_user_model().objects.using(REPLICA).create(email="ghost@mail.com", username="ghost")
+
+        self.client = APIClient()
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {AccessToken.for_user(self.user)}")
+
+    def listed_usernames(self):
+        response = self.client.get(USER_URL)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return {user["username"] for user in response.data}
+
+    def test_listed_endpoints_read_the_replica(self):
+        self.assertIn("ghost", self.listed_usernames())
+
+        post = Post.objects.using(REPLICA).create(text="replica only", owner_id=self.ghost.pk)
+        Post.objects.using(REPLICA).filter(pk=post.pk).update(date_posted=timezone.now())
+        response = self.client.get(reverse("social:posts-list"))
+        self.assertEqual([post["text"] for post in response.data["results"]], ["replica only"])
+
+    def test_other_endpoints_read_the_primary(self):
+        response = self.client.get(reverse("user:users-detail", args=[self.ghost.pk]))
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_writes_pin_the_user_to_the_primary(self):
+        response = self.client.post(reverse("user:users-follow", args=[self.other.pk]))
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+
+        self.assertTrue(db_router.is_pinned(self.user.pk))
+        self.assertNotIn("ghost", self.listed_usernames())
+
+    def test_failed_writes_do_not_pin(self):
+        self.client.post(reverse("user:users-follow", args=[self.user.pk]))
+
+        self.assertFalse(db_router.is_pinned(self.user.pk))
+
+    def test_reads_outside_requests_use_the_primary(self):
+        self.assertEqual(db_router.ReplicaRouter().db_for_read(Post), "default")
+        self.assertFalse(get_user_model().objects.filter(username="ghost").exists())
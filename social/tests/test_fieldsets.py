@@ -0,0 +1,100 @@
+import json
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from social.models import Likes, Post, Tags
+
+POST_URL = reverse("social:posts-list")
+
+
+class PostFieldsetTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = get_user_model().objects.create_user(email="test@mail.com", username="test")
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user)
+
+        self.post = Post.objects.create(text="test", owner=self.user, date_posted=timezone.now())
+        self.post.tags.add(Tags.objects.create(name="python"))
+        Likes.objects.create(user=self.user, post=self.post)
+
+    def get(self, url, params):
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.get(url, params)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return response, [query["sql"] for query in context.captured_queries]
+
+    def test_full_representation_by_default(self):
+        response, _ = self.get(POST_URL, {})
+
+        self.assertEqual(
+            set(response.data["results"][0]),
+            {"id", "text", "images", "likes", "tags", "is_liked", "date_posted", "owner"},
+        )
+
+    def test_sparse_fields_skip_joins_prefetches_and_annotations(self):
+        response, queries = self.get(POST_URL, {"fields": "id,text,likes"})
+
+        self.assertEqual(response.data["results"], [{"id": self.post.id, "text": "test", "likes": 1}])
+        self.assertEqual(len(queries), 1)
+        self.assertNotIn("social_likes", queries[0])
+        self.assertNotIn("user_user", queries[0])
+
+    def test_requested_fields_are_loaded(self):
+        response, queries = self.get(POST_URL, {"fields": "id,tags,is_liked"})
+
+        self.assertEqual(response.data["results"], [{"id": self.post.id, "tags": ["python"], "is_liked": True}])
+        self.assertEqual(len(queries), 2)
+        self.assertIn("social_likes", queries[0])
+        self.assertIn("social_tags", queries[1])
+
+    def test_expand_owner(self):
+        response, _ = self.get(POST_URL, {"expand": "owner"})
+
+        self.assertEqual(response.data["results"][0]["owner"], {"id": self.user.id, "username": "test", "image": None})
+
+    def test_expand_only_applies_to_requested_fields(self):
+        response, _ = self.get(POST_URL, {"fields": "id", "expand": "owner"})
+
+        self.assertEqual(response.data["results"], [{"id": self.post.id}])
+
+    def test_unknown_fields_are_rejected(self):
+        for params in ({"fields": "id,secret"}, {"expand": "tags"}):
+            with self.subTest(params=params):
+                response = self.client.get(POST_URL, params)
+                self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_actions_serializing_post_lists(self):
+        for name in ("posts-subscribed-posts", "posts-my-posts", "posts-liked-posts"):
+            with self.subTest(name=name):
+                response = self.client.get(reverse(f"social:{name}"), {"fields": "id"})
+                self.assertEqual(response.status_code, status.HTTP_200_OK)
+                self.assertTrue(all(set(post) == {"id"} for post in response.data["results"]))
+
+        response = self.client.get(reverse("social:posts-my-posts"), {"fields": "id", "stream": "true"})
+        self.assertEqual(json.loads(b"".join(response.streaming_content)), [{"id": self.post.id}])
+
+    def test_detail_ignores_fieldsets(self):
+        response = self.client.get(reverse("social:posts-detail", args=[self.post.id]), {"fields": "id"})
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertIn("latest_comments", response.data)
+        self.assertTrue(response.data["is_liked"])
+
+    def test_writes_return_the_full_representation(self):
+        response = self.client.patch(
+            f"{reverse('social:posts-detail', args=[self.post.id])}?fields=id", {"text": "edited"}, format="json"
+        )
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data["text"], "edited")
+        self.assertIn("tags", response.data)
@@ -0,0 +1,71 @@
+import shutil
+import tempfile
+from io import BytesIO
+
+from PIL import Image
+from django.contrib.auth import get_user_model
+from django.core.files.storage import default_storage
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+from rest_framework.test import APIRequestFactory
+
+from social.models import Post, PostImage
+from social.serializers import PostListSerializer
+from social.tasks import generate_image_variants
+
+MEDIA_ROOT = tempfile.mkdtemp()
+
+
+@override_settings(MEDIA_ROOT=MEDIA_ROOT)
+class ImageVariantsTest(TestCase):
+    @classmethod
+    def tearDownClass(cls):
+        shutil.rmtree(MEDIA_ROOT, ignore_errors=True)
+        super().tearDownClass()
+
+    def setUp(self):
+        user = get_user_model().objects.create_user(email="test@mail.com", username="test")
+        self.post = Post.objects.create(text="test", owner=user, date_posted=timezone.now())
+
+        buffer = BytesIO()
+        exif = Image.Exif()
+        exif[0x010F] = "Camera maker"
+        Image.new("RGB", (2000, 1000), color=(50, 50, 50)).save(buffer, format="JPEG", exif=exif)
+        upload = SimpleUploadedFile("photo.jpg", buffer.getvalue(), content_type="image/jpeg")
+        self.post_image = PostImage.objects.create(post=self.post, image=upload)
+
+    def test_generates_resized_webp_variants(self):
+        generate_image_variants(self.post_image.pk)
+        self.post_image.refresh_from_db()
+
+        self.assertEqual((self.post_image.width, self.post_image.height), (2000, 1000))
+        self.assertEqual(set(self.post_image.variants), {"thumbnail", "feed", "full"})
+
+        feed = self.post_image.variants["feed"]
+        self.assertEqual((feed["width"], feed["height"]), (720, 360))
+        with default_storage.open(feed["name"]) as file:
+            variant = Image.open(file)
+            self.assertEqual(variant.format, "WEBP")
+            self.assertEqual(dict(variant.getexif()), {})
+
+    def test_list_serializer_returns_feed_variant_with_srcset(self):
+        generate_image_variants(self.post_image.pk)
+        self.post_image.refresh_from_db()
+
+        request = APIRequestFactory().get("/")
+        images = PostListSerializer(self.post, context={"request": request}).data["images"]
+
+        self.assertEqual(len(images), 1)
+        self.assertTrue(images[0]["url"].endswith("-feed.webp"))
+        self.assertEqual((images[0]["width"], images[0]["height"]), (720, 360))
+        self.assertEqual(len(images[0]["srcset"].split(", ")), 3)
+        self.assertIn("720w", images[0]["srcset"])
+
+    def test_list_serializer_falls_back_to_original(self):
+        request = APIRequestFactory().get("/")
+        images = PostListSerializer(self.post, context={"request": request}).data["images"]
+
+        self.assertTrue(images[0]["url"].endswith(".jpg"))
+        self.assertEqual(images[0]["srcset"], "")
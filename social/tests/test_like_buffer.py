@@ -0,0 +1,120 @@
+import json
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db.models import Sum
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from social import like_buffer
+from social.models import Post, PostActivity, Likes
+from social.tasks import flush_like_buffer
+
+
+@override_settings(LIKES_WRITE_BEHIND=True, LIKE_BUFFER_REDIS_URL=None)
+class WriteBehindLikeTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        like_buffer._buffer.cache_clear()
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(email="test@mail.com", username="test")
+        self.other = get_user_model().objects.create_user(email="other@mail.com", username="other")
+        self.client.force_authenticate(user=self.user)
+        self.post = Post.objects.create(text="test", owner=self.other, date_posted=timezone.now())
+
+    def like(self):
+        return self.client.post(reverse("social:posts-like", args=[self.post.id]))
+
+    def unlike(self):
+        return self.client.post(reverse("social:posts-unlike", args=[self.post.id]))
+
+    def detail(self):
+        return self.client.get(reverse("social:posts-detail", args=[self.post.id])).data
+
+    def test_like_is_buffered_until_flush(self):
+        self.assertEqual(self.like().status_code, status.HTTP_201_CREATED)
+        self.assertFalse(Likes.objects.exists())
+
+        self.assertEqual(flush_like_buffer(), 1)
+
+        self.assertTrue(Likes.objects.filter(user=self.user, post=self.post).exists())
+        self.post.refresh_from_db()
+        self.assertEqual(self.post.likes_count, 1)
+        self.assertEqual(like_buffer.get_buffer().user_intents(self.user.pk), {})
+
+    def test_acting_user_reads_own_pending_like(self):
+        self.like()
+
+        detail = self.detail()
+        self.assertTrue(detail["is_liked"])
+        self.assertEqual(detail["likes"], 1)
+
+        posts = self.client.get(reverse("social:posts-list")).data["results"]
+        self.assertEqual((posts[0]["is_liked"], posts[0]["likes"]), (True, 1))
+
+        liked = self.client.get(reverse("social:posts-liked-posts")).data["results"]
+        self.assertEqual([post["id"] for post in liked], [self.post.id])
+
+        self.assertEqual(self.like().status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_streamed_lists_overlay_pending_likes(self):
+        self.like()
+
+        url = reverse("social:posts-liked-posts")
+        paged = self.client.get(url).data["results"]
+        streamed = json.loads(b"".join(self.client.get(url, {"stream": "true"}).streaming_content))
+
+        self.assertEqual([(post["id"], post["is_liked"], post["likes"]) for post in streamed], [(self.post.id, True, 1)])
+        self.assertEqual(
+            [(post["id"], post["is_liked"], post["likes"]) for post in streamed],
+            [(post["id"], post["is_liked"], post["likes"]) for post in paged],
+        )
+
+    def test_like_then_unlike_collapses_to_nothing(self):
+        self.like()
+        self.assertEqual(self.unlike().status_code, status.HTTP_204_NO_CONTENT)
+
+        self.assertEqual(self.detail()["likes"], 0)
+        self.assertEqual(flush_like_buffer(), 1)
+        self.assertFalse(Likes.objects.exists())
+
+    def test_unlike_is_buffered_until_flush(self):
+        Likes.objects.create(user=self.user, post=self.post)
+
+        self.assertEqual(self.unlike().status_code, status.HTTP_204_NO_CONTENT)
+        detail = self.detail()
+        self.assertEqual((detail["is_liked"], detail["likes"]), (False, 0))
+        self.assertEqual(self.client.get(reverse("social:posts-liked-posts")).data["results"], [])
+
+        flush_like_buffer()
+
+        self.assertFalse(Likes.objects.exists())
+        self.post.refresh_from_db()
+        self.assertEqual(self.post.likes_count, 0)
+
+    def test_flushed_unlike_is_counted_once(self):
+        Likes.objects.create(user=self.user, post=self.post)
+        self.unlike()
+
+        flush_like_buffer()
+
+        self.assertFalse(Likes.objects.exists())
+        activity = PostActivity.objects.filter(post=self.post).aggregate(weight=Sum("weight"))["weight"]
+        self.assertEqual(activity, 0)
+        self.post.refresh_from_db()
+        self.assertEqual(self.post.likes_count, 0)
+
+    def test_flush_skips_deleted_posts(self):
+        self.like()
+        self.post.delete()
+
+        self.assertEqual(flush_like_buffer(), 1)
+        self.assertFalse(Likes.objects.exists())
+
+    @override_settings(LIKES_WRITE_BEHIND=False)
+    def test_flush_is_a_no_op_when_disabled(self):
+        self.assertEqual(flush_like_buffer(), 0)
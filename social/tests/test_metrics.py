@@ -0,0 +1,64 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import TestCase
+from django.urls import reverse
+from django.utils import timezone
+
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from social.models import Post
+from social_media_api import metrics
+
+
+def sample(text, line_start):
+    for line in text.splitlines():
+        if line.startswith(line_start):
+            return float(line.rsplit(" ", 1)[1])
+    return None
+
+
+class MetricsTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        metrics.registry.clear()
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(email="test@mail.com", username="test")
+        self.client.force_authenticate(user=self.user)
+        self.post = Post.objects.create(text="test", owner=self.user, date_posted=timezone.now())
+
+    def scrape(self):
+        response = self.client.get(reverse("metrics"))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertTrue(response["Content-Type"].startswith("text/plain; version=0.0.4"))
+        return response.content.decode()
+
+    def test_records_per_action_metrics(self):
+        self.client.get(reverse("social:posts-list"))
+        self.client.get(reverse("social:posts-list"))
+        self.client.get(reverse("social:posts-detail", args=[self.post.id]))
+
+        text = self.scrape()
+
+        self.assertEqual(
+            sample(text, 'http_requests_total{endpoint="PostViewSet.list",method="GET",status="200"}'), 2
+        )
+        self.assertEqual(sample(text, 'http_request_db_queries_count{endpoint="PostViewSet.list"}'), 2)
+        self.assertGreater(sample(text, 'http_request_db_queries_sum{endpoint="PostViewSet.list"}'), 0)
+        self.assertEqual(sample(text, 'http_response_render_seconds_count{endpoint="PostViewSet.retrieve"}'), 1)
+        self.assertGreater(sample(text, 'http_response_size_bytes_sum{endpoint="PostViewSet.retrieve"}'), 0)
+        self.assertEqual(
+            sample(text, 'http_request_duration_seconds_bucket{endpoint="PostViewSet.list",le="+Inf"}'), 2
+        )
+
+    def test_histogram_buckets_are_cumulative(self):
+        histogram = metrics.Histogram("test_queries", "Test.", ["endpoint"], (1, 5))
+        for value in (0, 1, 3, 10):
+            histogram.observe(value, "view")
+
+        lines = histogram.expose()
+
+        self.assertIn('test_queries_bucket{endpoint="view",le="1"} 2', lines)
+        self.assertIn('test_queries_bucket{endpoint="view",le="5"} 3', lines)
+        self.assertIn('test_queries_bucket{endpoint="view",le="+Inf"} 4', lines)
+        self.assertIn('test_queries_sum{endpoint="view"} 14', lines)
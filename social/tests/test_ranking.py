@@ -0,0 +1,142 @@
+from datetime import timedelta
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from social import like_buffer, ranking
+from social.models import Comments, Likes, Post, TimelineEntry
+from social.tasks import flush_like_buffer
+from user.models import Follow
+
+SUBSCRIBED_URL = reverse("social:posts-subscribed-posts")
+
+
+class RankingTestMixin:
+    def setUp(self):
+        cache.clear()
+        like_buffer._buffer.cache_clear()
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(email="test@mail.com", username="test")
+        self.author = get_user_model().objects.create_user(email="author@mail.com", username="author")
+        self.other = get_user_model().objects.create_user(email="other@mail.com", username="other")
+        Follow.objects.create(follower=self.user, following=self.author)
+        Follow.objects.create(follower=self.user, following=self.other)
+        self.client.force_authenticate(user=self.user)
+
+    def publish(self, owner, age=timedelta()):
+        return Post.objects.create(text="test", owner=owner, date_posted=timezone.now() - age)
+
+    def entry(self, post):
+        return TimelineEntry.objects.get(user=self.user, post=post)
+
+
+class ScoreMaintenanceTest(RankingTestMixin, TestCase):
+    def test_fan_out_stores_the_post_score(self):
+        post = self.publish(self.author)
+
+        post.refresh_from_db()
+        self.assertAlmostEqual(post.feed_score, ranking.post_score(post.date_posted, 0, 0))
+        self.assertAlmostEqual(self.entry(post).score, post.feed_score)
+
+    def test_engagement_rescores_on_step_changes_only(self):
+        post = self.publish(self.author)
+        start = self.entry(post).score
+
+        Likes.objects.create(user=self.other, post=post)
+        self.assertAlmostEqual(self.entry(post).score, start + 1)
+
+        Comments.objects.create(user=self.other, post=post, comment="test")
+        # 1 + 1 like + 2 per comment = 4
+        self.assertAlmostEqual(self.entry(post).score, start + 2)
+        self.assertFalse(ranking.rescore_post(post.id))
+
+    def test_likes_raise_affinity_for_the_author(self):
+        liked = self.publish(self.author, timedelta(hours=1))
+        other = self.publish(self.author)
+        start = self.entry(other).score
+
+        Likes.objects.create(user=self.user, post=liked)
+        self.assertEqual(self.entry(other).affinity, 1)
+        self.assertAlmostEqual(self.entry(other).score, start + 1)
+
+        Likes.objects.get(user=self.user, post=liked).delete()
+        self.assertEqual(self.entry(other).affinity, 0)
+        self.assertAlmostEqual(self.entry(other).score, start)
+
+    def test_new_entries_start_with_the_current_affinity(self):
+        Follow.objects.filter(follower=self.user, following=self.author).delete()
+        old = self.publish(self.author, timedelta(hours=1))
+        Likes.objects.create(user=self.user, post=old)
+        Follow.objects.create(follower=self.user, following=self.author)
+
+        self.assertEqual(self.entry(old).affinity, 1)
+        self.assertEqual(self.entry(self.publish(self.author)).affinity, 1)
+
+    @override_settings(LIKES_WRITE_BEHIND=True, LIKE_BUFFER_REDIS_URL=None)
+    def test_buffered_likes_are_applied_on_flush(self):
+        liked = self.publish(self.author, timedelta(hours=1))
+        other = self.publish(self.author)
+
+        self.client.post(reverse("social:posts-like", args=[liked.id]))
+        flush_like_buffer()
+
+        self.assertEqual(self.entry(other).affinity, 1)
+        liked.refresh_from_db()
+        self.assertAlmostEqual(liked.feed_score, ranking.post_score(liked.date_posted, 1, 0))
+
+    def test_rescore_repairs_stale_scores(self):
+        liked = self.publish(self.author)
+        Likes.objects.create(user=self.user, post=liked)
+        Post.objects.update(feed_score=0)
+        TimelineEntry.objects.update(score=0, affinity=0)
+
+        self.assertEqual(ranking.rescore_posts(), 1)
+        self.assertEqual(ranking.rescore_timelines(), 1)
+
+        liked.refresh_from_db()
+        self.assertAlmostEqual(self.entry(liked).score, liked.feed_score + 1)
+
+
+class RankedFeedTest(RankingTestMixin, TestCase):
+    def ranked(self, **params):
+        response = self.client.get(SUBSCRIBED_URL, {"ranking": "score", **params})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return response.data
+
+    def test_engagement_outweighs_a_little_recency(self):
+        popular = self.publish(self.other, timedelta(hours=1))
+        fresh = self.publish(self.author)
+        for number in range(3):
+            liker = get_user_model().objects.create_user(email=f"liker_{number}@mail.com", username=f"liker_{number}")
+            Likes.objects.create(user=liker, post=popular)
+
+        self.assertEqual([post["id"] for post in self.ranked()["results"]], [popular.id, fresh.id])
+
+        response = self.client.get(SUBSCRIBED_URL)
+        self.assertEqual([post["id"] for post in response.data["results"]], [fresh.id, popular.id])
+
+    def test_keyset_pages(self):
+        posts = [self.publish(self.author, timedelta(hours=hours)) for hours in range(5)]
+
+        first = self.ranked(page_size=3)
+        self.assertEqual([post["id"] for post in first["results"]], [post.id for post in posts[:3]])
+
+        response = self.client.get(first["next"])
+        self.assertEqual([post["id"] for post in response.data["results"]], [post.id for post in posts[3:]])
+
+    @override_settings(TIMELINE_FANOUT_FOLLOWER_LIMIT=1)
+    def test_includes_fan_out_on_read_authors(self):
+        post = self.publish(self.author)
+
+        self.assertFalse(TimelineEntry.objects.filter(post=post).exists())
+        self.assertEqual([result["id"] for result in self.ranked()["results"]], [post.id])
+
+    def test_rejects_unknown_ranking(self):
+        response = self.client.get(SUBSCRIBED_URL, {"ranking": "random"})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
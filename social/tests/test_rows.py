@@ -0,0 +1,117 @@
+from datetime import timedelta
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+from rest_framework.renderers import JSONRenderer
+from rest_framework.request import Request
+from rest_framework.test import APIRequestFactory
+
+from social import like_buffer
+from social.models import Likes, Post, PostImage, Tags
+from social.serializers import PostListRowSerializer, PostListSerializer
+from social.views import PostViewSet
+from social_media_api.rows import RowSerializer
+
+factory = APIRequestFactory()
+
+
+class PostListRowSerializerTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = get_user_model().objects.create_user(email="test@mail.com", username="test")
+        self.other = get_user_model().objects.create_user(email="other@mail.com", username="other")
+        self.other.image = "users/avatar.png"
+        self.other.save()
+
+        python, django = Tags.objects.create(name="python"), Tags.objects.create(name="django")
+        now = timezone.now()
+        for index in range(5):
+            post = Post.objects.create(
+                text=f"post {index}",
+                owner=self.other if index % 2 else self.user,
+                date_posted=now - timedelta(hours=index),
+                likes_count=index,
+            )
+            post.tags.add(django)
+            if index % 2:
+                post.tags.add(python)
+        self.post = Post.objects.order_by("id").first()
+        Likes.objects.create(user=self.user, post=self.post)
+        PostImage.objects.create(post=self.post, image="uploads/posts/photo.jpg")
+        PostImage.objects.create(
+            post=self.post,
+            image="uploads/posts/large.jpg",
+            variants={
+                "feed": {"name": "uploads/posts/variants/large-feed.webp", "width": 720, "height": 360},
+                "full": {"name": "uploads/posts/variants/large-full.webp", "width": 1440, "height": 720},
+            },
+        )
+
+    def render(self, params=None, user=None):
+        request = Request(factory.get("/api/social/posts/", params))
+        if user is not None:
+            request.user = user
+        view = PostViewSet(action="list", request=request, format_kwarg=None)
+        queryset = view.get_queryset().order_by("-date_posted", "-id")
+        context = view.get_serializer_context()
+
+        expected = PostListSerializer(queryset, many=True, context=context).data
+        rows = PostListRowSerializer.values(queryset, view.get_fieldset())
+        return JSONRenderer().render(expected), JSONRenderer().render(PostListRowSerializer(rows, context=context).data)
+
+    def test_identical_json(self):
+        cases = [
+            {},
+            {"fields": "id,tags,is_liked"},
+            {"fields": "id,text,likes"},
+            {"expand": "owner"},
+            {"fields": "owner,images", "expand": "owner"},
+        ]
+        for params in cases:
+            for user in (None, self.user):
+                with self.subTest(params=params, user=user):
+                    expected, content = self.render(params, user)
+                    self.assertEqual(content, expected)
+
+    @override_settings(LIKES_WRITE_BEHIND=True, LIKE_BUFFER_REDIS_URL=None)
+    def test_unflushed_likes_are_overlaid_on_rows(self):
+        like_buffer._buffer.cache_clear()
+        like_buffer.record(self.user, self.post, liked=False)
+        request = Request(factory.get("/api/social/posts/"))
+        request.user = self.user
+        view = PostViewSet(action="list", request=request, format_kwarg=None)
+        queryset = view.get_queryset().order_by("-date_posted", "-id")
+        context = view.get_serializer_context()
+
+        posts = like_buffer.overlay(self.user, list(queryset))
+        rows = like_buffer.overlay(self.user, list(PostListRowSerializer.values(queryset, view.get_fieldset())))
+
+        self.assertEqual(
+            JSONRenderer().render(PostListRowSerializer(rows, context=context).data),
+            JSONRenderer().render(PostListSerializer(posts, many=True, context=context).data),
+        )
+        row = next(row for row in rows if row["id"] == self.post.id)
+        self.assertEqual((row["is_liked"], row["likes_count"]), (False, 0))
+
+    def test_one_query_per_relation(self):
+        request = Request(factory.get("/api/social/posts/"))
+        request.user = self.user
+        view = PostViewSet(action="list", request=request, format_kwarg=None)
+        rows = PostListRowSerializer.values(view.get_queryset(), view.get_fieldset())
+
+        with self.assertNumQueries(3):
+            data = PostListRowSerializer(rows, context=view.get_serializer_context()).data
+
+        self.assertEqual(len(data), 5)
+
+    def test_empty_page_skips_lookups(self):
+        with self.assertNumQueries(0):
+            self.assertEqual(PostListRowSerializer([], context={}).data, [])
+
+    def test_subclass_without_columns_fails_at_definition(self):
+        with self.assertRaises(TypeError):
+            class IncompleteRowSerializer(RowSerializer):
+                serializer_class = PostListSerializer
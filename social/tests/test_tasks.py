@@ -0,0 +1,106 @@
+from datetime import timedelta
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase
+from django.urls import reverse
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from social import tasks
+from social.models import Post, Tags, TimelineEntry
+from social.signals import post_published
+from social.tasks import publish_post, publish_scheduled_posts
+from user.models import Follow
+
+
+class ScheduledPostTest(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.author = get_user_model().objects.create_user(email="author@mail.com", username="author")
+        self.reader = get_user_model().objects.create_user(email="reader@mail.com", username="reader")
+        Follow.objects.create(follower=self.reader, following=self.author)
+        self.client.force_authenticate(user=self.author)
+        self.tag = Tags.objects.create(name="python")
+
+    def schedule(self, delay=timedelta(minutes=-1)):
+        return Post.objects.create(text="scheduled", owner=self.author, scheduled_time=timezone.now() + delay)
+
+    def test_create_enqueues_publish_at_scheduled_time(self):
+        scheduled_time = timezone.now() + timedelta(hours=1)
+
+        with mock.patch("social.tasks.publish_post.apply_async") as apply_async:
+            with self.captureOnCommitCallbacks(execute=True):
+                response = self.client.post(
+                    reverse("social:posts-list"),
+                    {"text": "later", "tags": [self.tag], "scheduled_time": scheduled_time.isoformat()},
+                )
+
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        post = Post.objects.get(text="later")
+        apply_async.assert_called_once()
+        post_id, eta = apply_async.call_args.kwargs["args"]
+        self.assertEqual(post_id, post.pk)
+        self.assertEqual(parse_datetime(eta), scheduled_time)
+        self.assertEqual(apply_async.call_args.kwargs["eta"], scheduled_time)
+
+    def test_publish_post_sets_scheduled_time_and_fans_out(self):
+        post = self.schedule()
+
+        self.assertEqual(publish_post(post.pk, post.scheduled_time.isoformat()), 1)
+
+        post.refresh_from_db()
+        self.assertEqual(post.date_posted, post.scheduled_time)
+        self.assertTrue(TimelineEntry.objects.filter(user=self.reader, post=post).exists())
+
+    def test_publish_post_skips_rescheduled_post(self):
+        post = self.schedule()
+        stale_eta = post.scheduled_time.isoformat()
+        post.scheduled_time += timedelta(hours=1)
+        post.save()
+
+        self.assertEqual(publish_post(post.pk, stale_eta), 0)
+        post.refresh_from_db()
+        self.assertIsNone(post.date_posted)
+
+    def test_catch_up_sweep_publishes_in_batches(self):
+        due = [self.schedule() for _ in range(5)]
+        future = self.schedule(timedelta(hours=1))
+
+        self.assertEqual(publish_scheduled_posts(batch_size=2), 5)
+
+        self.assertFalse(Post.objects.filter(pk__in=[post.pk for post in due], date_posted__isnull=True).exists())
+        self.assertEqual(TimelineEntry.objects.filter(user=self.reader).count(), 5)
+        future.refresh_from_db()
+        self.assertIsNone(future.date_posted)
+
+    def test_catch_up_sweep_is_bounded(self):
+        for _ in range(5):
+            self.schedule()
+
+        self.assertEqual(publish_scheduled_posts(batch_size=2, max_batches=1), 2)
+
+    def test_catch_up_sweep_skips_posts_published_meanwhile(self):
+        raced, other = self.schedule(), self.schedule()
+        announced = []
+
+        def receiver(sender, post, **kwargs):
+            announced.append(post.pk)
+
+        post_published.connect(receiver)
+        self.addCleanup(post_published.disconnect, receiver)
+
+        claim = tasks._claim
+
+        def racing_claim(post_id):
+            if post_id == raced.pk:
+                publish_post(raced.pk, raced.scheduled_time.isoformat())
+            return claim(post_id)
+
+        with mock.patch("social.tasks._claim", side_effect=racing_claim):
+            self.assertEqual(publish_scheduled_posts(), 1)
+
+        self.assertEqual(sorted(announced), sorted([raced.pk, other.pk]))
@@ -0,0 +1,158 @@
+from datetime import timedelta
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from social import like_buffer, trending
+from social.models import Comments, Likes, Post, PostActivity, TagActivity, Tags, TrendingPost, TrendingTag
+
+TRENDING_POSTS_URL = reverse("social:posts-trending")
+TRENDING_TAGS_URL = reverse("social:tags-trending")
+
+
+class TrendingCountersTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = get_user_model().objects.create_user(email="test@mail.com", username="test")
+        self.tag = Tags.objects.create(name="django")
+        self.post = Post.objects.create(text="test", owner=self.user, date_posted=timezone.now())
+
+    def post_weight(self):
+        return sum(PostActivity.objects.filter(post=self.post).values_list("weight", flat=True))
+
+    def test_likes_and_comments_add_to_the_current_bucket(self):
+        Likes.objects.create(user=self.user, post=self.post)
+        Comments.objects.create(user=self.user, post=self.post, comment="test")
+
+        activity = PostActivity.objects.get(post=self.post)
+        self.assertEqual(activity.bucket, trending.current_bucket())
+        self.assertEqual(activity.weight, 4)
+
+    def test_unlike_takes_the_like_back(self):
+        like = Likes.objects.create(user=self.user, post=self.post)
+        like.delete()
+
+        self.assertEqual(self.post_weight(), 0)
+
+    def test_cascaded_deletes_leave_counters_alone(self):
+        Likes.objects.create(user=self.user, post=self.post)
+
+        self.post.delete()
+
+        self.assertFalse(PostActivity.objects.exists())
+
+    def test_publication_counts_for_tags(self):
+        self.post.tags.add(self.tag)
+        scheduled = Post.objects.create(text="later", owner=self.user)
+        scheduled.tags.add(self.tag)
+
+        self.assertEqual(TagActivity.objects.get(tag=self.tag).weight, 5)
+
+        scheduled.date_posted = timezone.now()
+        scheduled.save(update_fields=["date_posted"])
+
+        self.assertEqual(TagActivity.objects.get(tag=self.tag).weight, 10)
+
+
+class RefreshTrendingTest(TestCase):
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(email="test@mail.com", username="test")
+        self.tag = Tags.objects.create(name="django")
+        self.old = Post.objects.create(text="old", owner=self.user, date_posted=timezone.now())
+        self.new = Post.objects.create(text="new", owner=self.user, date_posted=timezone.now())
+        self.now = timezone.now()
+        self.bucket = trending.current_bucket(self.now)
+
+    def test_recent_activity_outranks_older_activity(self):
+        hours = 3600 // 300
+        PostActivity.objects.create(post=self.old, bucket=self.bucket - 4 * hours, weight=10)
+        PostActivity.objects.create(post=self.new, bucket=self.bucket, weight=5)
+
+        self.assertEqual(trending.refresh_trending(self.now), (2, 0))
+
+        ranking = list(TrendingPost.objects.order_by("-score").values_list("post_id", "score"))
+        self.assertEqual([post_id for post_id, _ in ranking], [self.new.id, self.old.id])
+        # two half-lives
+        self.assertAlmostEqual(ranking[1][1], 2.5)
+
+    def test_buckets_outside_the_window_are_dropped(self):
+        PostActivity.objects.create(post=self.old, bucket=self.bucket - 24 * 12 - 1, weight=10)
+        TrendingPost.objects.create(post=self.old, score=10)
+
+        trending.refresh_trending(self.now)
+
+        self.assertFalse(PostActivity.objects.exists())
+        self.assertFalse(TrendingPost.objects.exists())
+
+    def test_tags_score_publications_and_activity_of_their_posts(self):
+        other = Tags.objects.create(name="python")
+        self.old.tags.add(self.tag)
+        PostActivity.objects.create(post=self.old, bucket=self.bucket, weight=1)
+
+        trending.refresh_trending(self.now)
+
+        ranking = dict(TrendingTag.objects.values_list("tag_id", "score"))
+        self.assertEqual(ranking, {self.tag.id: 6})
+        self.assertNotIn(other.id, ranking)
+
+    @override_settings(TRENDING_SIZE=1)
+    def test_keeps_only_the_top_entries(self):
+        PostActivity.objects.create(post=self.old, bucket=self.bucket, weight=1)
+        PostActivity.objects.create(post=self.new, bucket=self.bucket, weight=2)
+
+        trending.refresh_trending(self.now)
+
+        self.assertEqual(list(TrendingPost.objects.values_list("post_id", flat=True)), [self.new.id])
+
+
+class TrendingViewsTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        like_buffer._buffer.cache_clear()
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(email="test@mail.com", username="test")
+        self.tag = Tags.objects.create(name="django")
+        self.first = Post.objects.create(text="first", owner=self.user, date_posted=timezone.now())
+        self.second = Post.objects.create(text="second", owner=self.user, date_posted=timezone.now())
+        self.scheduled = Post.objects.create(
+            text="scheduled", owner=self.user, scheduled_time=timezone.now() + timedelta(days=1)
+        )
+        TrendingPost.objects.create(post=self.first, score=1)
+        TrendingPost.objects.create(post=self.second, score=2)
+        TrendingPost.objects.create(post=self.scheduled, score=3)
+        TrendingTag.objects.create(tag=self.tag, score=4)
+
+    def test_trending_posts(self):
+        response = self.client.get(TRENDING_POSTS_URL)
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual([post["id"] for post in response.data], [self.second.id, self.first.id])
+
+    def test_trending_posts_limit(self):
+        response = self.client.get(TRENDING_POSTS_URL, {"limit": 1})
+        self.assertEqual([post["id"] for post in response.data], [self.second.id])
+
+        response = self.client.get(TRENDING_POSTS_URL, {"limit": "many"})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    @override_settings(LIKES_WRITE_BEHIND=True, LIKE_BUFFER_REDIS_URL=None)
+    def test_buffered_likes_are_counted(self):
+        self.client.force_authenticate(user=self.user)
+
+        self.client.post(reverse("social:posts-like", args=[self.first.id]))
+
+        self.assertEqual(PostActivity.objects.get(post=self.first).weight, 1)
+        response = self.client.get(TRENDING_POSTS_URL)
+        self.assertTrue(response.data[1]["is_liked"])
+
+    def test_trending_tags(self):
+        response = self.client.get(TRENDING_TAGS_URL)
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data, [{"id": self.tag.id, "name": "django", "score": 4.0}])
@@ -1,17 +1,22 @@
+import base64
+import json
 import tempfile
 from datetime import timedelta
 
 from PIL import Image
 from django.contrib.auth import get_user_model
+from django.core.cache import cache
 from django.core.files.uploadedfile import SimpleUploadedFile
-from django.test import TestCase
+from django.test import TestCase, override_settings
 from django.urls import reverse
 from django.utils import timezone
 
 from rest_framework import status
 from rest_framework.test import APIClient
 
-from social.models import Tags, Post, Likes
+from social import cache as feed_cache, search, timeline
+from social.models import Tags, Post, Likes, Comments, TimelineEntry
+from social.pagination import TimelinePagination
 from social.serializers import PostDetailSerializer
 
 from user.models import Follow
@@ -21,6 +26,7 @@ POST_URL = reverse("social:posts-list")
 
 class UnauthenticatedPostTest(TestCase):
     def setUp(self):
+        cache.clear()
         self.client = APIClient()
 
     def test_post_list_with_unauthentication(self):
@@ -30,6 +36,7 @@ class UnauthenticatedPostTest(TestCase):
 
 class AuthenticatedPostTest(TestCase):
     def setUp(self):
+        cache.clear()
         self.client = APIClient()
         self.user = get_user_model().objects.create_user(
             email="test@mail.com",
@@ -80,25 +87,227 @@ class AuthenticatedPostTest(TestCase):
         self.assertEqual(response.status_code, status.HTTP_200_OK)
         self.assertEqual(response.data, serializer.data)
 
+    def test_retrieve_post_previews_latest_likes_and_comments(self):
+        for index in range(5):
+            Comments.objects.create(user=self.user_2, post=self.post_1, comment=f"comment {index}")
+        Likes.objects.create(user=self.user_2, post=self.post_1)
+
+        response = self.client.get(reverse("social:posts-detail", args=[self.post_1.id]))
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data["comments_count"], 5)
+        self.assertEqual(response.data["likes"], 1)
+        self.assertEqual(
+            [comment["comment"] for comment in response.data["latest_comments"]],
+            ["comment 4", "comment 3", "comment 2"]
+        )
+        self.assertEqual([like["user"] for like in response.data["latest_likes"]], ["user_1"])
+
+    def test_action_comments_is_cursor_paginated(self):
+        for index in range(5):
+            Comments.objects.create(user=self.user_2, post=self.post_1, comment=f"comment {index}")
+        url = reverse("social:posts-comments", args=[self.post_1.id])
+
+        comments, next_url = [], url + "?page_size=2"
+        while next_url:
+            response = self.client.get(next_url)
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            self.assertLessEqual(len(response.data["results"]), 2)
+            comments += [comment["comment"] for comment in response.data["results"]]
+            next_url = response.data["next"]
+
+        self.assertEqual(comments, [f"comment {index}" for index in reversed(range(5))])
+
+    def test_action_likes(self):
+        Likes.objects.create(user=self.user, post=self.post_2)
+        Likes.objects.create(user=self.user_2, post=self.post_2)
+
+        response = self.client.get(reverse("social:posts-likes", args=[self.post_2.id]))
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual([like["user"] for like in response.data["results"]], ["user_1", "test"])
+
+    def test_action_comments_of_unpublished_post(self):
+        post = Post.objects.create(text="draft", owner=self.user, scheduled_time=timezone.now() + timedelta(days=1))
+
+        response = self.client.get(reverse("social:posts-comments", args=[post.id]))
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
     def test_filter_by_text(self):
         response = self.client.get(reverse("social:posts-list") + "?text=test")
         self.assertEqual(response.status_code, status.HTTP_200_OK)
-        returned_ids = {post["id"] for post in response.data}
+        returned_ids = {post["id"] for post in response.data["results"]}
         self.assertIn(self.post_1.id, returned_ids)
 
+    def test_filter_by_text_matches_word_prefixes(self):
+        post = Post.objects.create(text="Learning Django signals", owner=self.user_2, date_posted=timezone.now())
+
+        response = self.client.get(POST_URL, {"text": "djan sig"})
+        self.assertEqual([p["id"] for p in response.data["results"]], [post.id])
+
+    def test_filter_by_text_follows_edits(self):
+        self.post_2.text = "renamed"
+        self.post_2.save()
+
+        response = self.client.get(POST_URL, {"text": "renamed"})
+        self.assertEqual([p["id"] for p in response.data["results"]], [self.post_2.id])
+
+    def test_search_orders_by_relevance(self):
+        weak = Post.objects.create(
+            text="python mentioned once among many other unrelated words here",
+            owner=self.user,
+            date_posted=timezone.now()
+        )
+        strong = Post.objects.create(text="python python python", owner=self.user_2, date_posted=timezone.now())
+
+        response = self.client.get(reverse("social:posts-search"), {"q": "pyth"})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual([p["id"] for p in response.data["results"]], [strong.id, weak.id])
+
+        response = self.client.get(reverse("social:posts-search"), {"q": "python", "owner": self.user.id})
+        self.assertEqual([p["id"] for p in response.data["results"]], [weak.id])
+
+    def test_search_matches_the_index_once(self):
+        plan = search.search(Post.objects.all(), "python").order_by("search_rank", "-id").explain()
+        self.assertIn("VIRTUAL TABLE INDEX", plan)
+        self.assertNotIn("CORRELATED", plan)
+
+    def test_search_without_query(self):
+        response = self.client.get(reverse("social:posts-search"))
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
     def test_filter_by_tags(self):
         response = self.client.get(reverse("social:posts-list") + f"?tags={self.tag.id}")
         self.assertEqual(response.status_code, status.HTTP_200_OK)
-        returned_ids = {post["id"] for post in response.data}
+        returned_ids = {post["id"] for post in response.data["results"]}
         self.assertIn(self.post_1.id, returned_ids)
 
+    def test_filter_by_tags_any_and_all(self):
+        both = Post.objects.create(text="both", owner=self.user_2, date_posted=timezone.now())
+        both.tags.set([self.tag, self.tag_1])
+        django_only = Post.objects.create(text="django", owner=self.user_2, date_posted=timezone.now())
+        django_only.tags.add(self.tag_1)
+
+        response = self.client.get(POST_URL, {"tags_any": f"{self.tag.id},{self.tag_1.id}"})
+        self.assertEqual(
+            [p["id"] for p in response.data["results"]],
+            [django_only.id, both.id, self.post_1.id]
+        )
+
+        response = self.client.get(POST_URL, {"tags_all": f"{self.tag.id},{self.tag_1.id}"})
+        self.assertEqual([p["id"] for p in response.data["results"]], [both.id])
+
+    def test_filter_by_tags_follows_tag_changes(self):
+        self.post_1.tags.remove(self.tag)
+        self.post_2.tags.add(self.tag)
+
+        response = self.client.get(POST_URL, {"tags_any": self.tag.id})
+        self.assertEqual([p["id"] for p in response.data["results"]], [self.post_2.id])
+
+    def test_filter_by_invalid_tags(self):
+        response = self.client.get(POST_URL, {"tags_all": "python"})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
     def test_filter_by_date_lt(self):
         date_lt = (timezone.now() + timedelta(days=1)).strftime('%d.%m.%Y')
         response = self.client.get(reverse("social:posts-list") + f"?date_lt={date_lt}")
         self.assertEqual(response.status_code, status.HTTP_200_OK)
-        returned_ids = {post["id"] for post in response.data}
+        returned_ids = {post["id"] for post in response.data["results"]}
         self.assertIn(self.post_1.id, returned_ids)
 
+    def test_list_is_cursor_paginated(self):
+        now = timezone.now()
+        older = [
+            Post.objects.create(text=f"older {i}", owner=self.user, date_posted=now - timedelta(days=i + 1))
+            for i in range(3)
+        ]
+
+        response = self.client.get(POST_URL, {"page_size": 2})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        first_page = [post["id"] for post in response.data["results"]]
+        self.assertEqual(len(first_page), 2)
+        self.assertIsNone(response.data["previous"])
+
+        response = self.client.get(response.data["next"])
+        second_page = [post["id"] for post in response.data["results"]]
+        self.assertEqual(second_page, [older[0].id, older[1].id])
+
+        response = self.client.get(response.data["next"])
+        self.assertEqual([post["id"] for post in response.data["results"]], [older[2].id])
+        self.assertIsNone(response.data["next"])
+
+        response = self.client.get(response.data["previous"])
+        self.assertEqual([post["id"] for post in response.data["results"]], second_page)
+
+    def test_list_conditional_get(self):
+        response = self.client.get(POST_URL)
+        etag = response["ETag"]
+
+        response = self.client.get(POST_URL, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+        self.assertEqual(response["ETag"], etag)
+
+    def test_list_cache_invalidated_by_like_and_comment(self):
+        etag = self.client.get(POST_URL)["ETag"]
+
+        self.client.post(reverse("social:posts-like", args=[self.post_1.id]))
+        response = self.client.get(POST_URL, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        likes = {post["id"]: post["likes"] for post in response.data["results"]}
+        self.assertEqual(likes[self.post_1.id], 1)
+
+        generations = feed_cache.post_generations([self.post_1.id])
+        self.client.post(reverse("social:posts-comment", args=[self.post_1.id]), {"comment": "test comment"})
+        self.assertNotEqual(feed_cache.post_generations([self.post_1.id]), generations)
+
+    def test_list_cache_survives_likes_of_other_posts(self):
+        newest = Post.objects.create(text="newest", owner=self.user_2, date_posted=timezone.now())
+        self.client.get(POST_URL, {"page_size": 1})
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post(reverse("social:posts-like", args=[self.post_1.id]))
+        with self.assertNumQueries(0):
+            response = self.client.get(POST_URL, {"page_size": 1})
+        self.assertEqual([post["id"] for post in response.data["results"]], [newest.id])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post(reverse("social:posts-like", args=[newest.id]))
+        response = self.client.get(POST_URL, {"page_size": 1})
+        self.assertEqual(response.data["results"][0]["likes"], 1)
+
+    def test_list_cache_is_per_user(self):
+        Likes.objects.create(user=self.user, post=self.post_1)
+        self.client.get(POST_URL)
+
+        self.client.force_authenticate(user=self.user_2)
+        response = self.client.get(POST_URL)
+        is_liked = {post["id"]: post["is_liked"] for post in response.data["results"]}
+        self.assertFalse(is_liked[self.post_1.id])
+
+    def test_list_with_invalid_cursor(self):
+        response = self.client.get(POST_URL, {"cursor": "not-a-cursor"})
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_tampered_cursors(self):
+        comments = reverse("social:posts-comments", args=[self.post_1.id])
+        likes = reverse("social:posts-likes", args=[self.post_1.id])
+        subscribed = reverse("social:posts-subscribed-posts")
+        cases = [
+            (POST_URL, {}, ["garbage", 1]),
+            (POST_URL, {}, ["2024-01-01T00:00:00+00:00", "x"]),
+            (POST_URL, {}, [None, 1]),
+            (POST_URL, {}, [[1], {}]),
+            (reverse("social:posts-search"), {"q": "test"}, ["abc", 1]),
+            (comments, {}, ["garbage", 1]),
+            (likes, {}, ["2024-01-01T00:00:00+00:00", "x"]),
+            (subscribed, {"ranking": "score"}, ["abc", 1]),
+        ]
+        for url, params, position in cases:
+            with self.subTest(url=url, position=position):
+                cursor = base64.urlsafe_b64encode(json.dumps({"p": position}).encode()).decode()
+                response = self.client.get(url, {**params, "cursor": cursor})
+                self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
     def create_test_two_images(self):
         images = []
         for i in range(2):
@@ -137,11 +346,77 @@ class AuthenticatedPostTest(TestCase):
         response = self.client.post(reverse("social:posts-unlike", args=[self.post_1.id]))
         self.assertEqual(response.status_code, status.HTTP_204_NO_CONTENT)
 
+    def test_like_counters_follow_like_and_unlike(self):
+        self.client.post(reverse("social:posts-like", args=[self.post_1.id]))
+        self.post_1.refresh_from_db()
+        self.assertEqual(self.post_1.likes_count, 1)
+
+        self.client.post(reverse("social:posts-unlike", args=[self.post_1.id]))
+        self.post_1.refresh_from_db()
+        self.assertEqual(self.post_1.likes_count, 0)
+
+    def test_list_reads_like_counter(self):
+        Likes.objects.create(user=self.user_2, post=self.post_1)
+
+        response = self.client.get(POST_URL)
+        likes = {post["id"]: post["likes"] for post in response.data["results"]}
+        self.assertEqual(likes[self.post_1.id], 1)
+
     def test_action_subscribed_posts(self):
         response = self.client.get(reverse("social:posts-subscribed-posts"))
-        self.assertEqual(len(response.data), 1)
+        self.assertEqual(len(response.data["results"]), 1)
+
+        self.assertEqual(response.data["results"][0]["id"], self.post_2.id)
+
+    def test_subscribed_posts_include_posts_published_after_follow(self):
+        post = Post.objects.create(text="fresh", owner=self.user_2, date_posted=timezone.now())
+
+        response = self.client.get(reverse("social:posts-subscribed-posts"))
+        self.assertEqual([p["id"] for p in response.data["results"]], [post.id, self.post_2.id])
+
+    def test_subscribed_posts_drop_unfollowed_author(self):
+        Follow.objects.get(follower=self.user, following=self.user_2).delete()
 
-        self.assertEqual(response.data[0]["id"], self.post_2.id)
+        response = self.client.get(reverse("social:posts-subscribed-posts"))
+        self.assertEqual(len(response.data["results"]), 0)
+        self.assertFalse(TimelineEntry.objects.filter(user=self.user).exists())
+
+    def test_subscribed_posts_pages_follow_the_timeline(self):
+        posts = [
+            Post.objects.create(text=f"fresh {index}", owner=self.user_2, date_posted=timezone.now())
+            for index in range(3)
+        ]
+
+        ids, next_url = [], reverse("social:posts-subscribed-posts") + "?page_size=2"
+        while next_url:
+            response = self.client.get(next_url)
+            ids += [post["id"] for post in response.data["results"]]
+            next_url = response.data["next"]
+        self.assertEqual(ids, [post.id for post in reversed(posts)] + [self.post_2.id])
+
+    def test_subscribed_posts_page_is_an_index_range_read(self):
+        queryset = timeline.timeline_queryset(self.user, Post.objects.all())
+        pagination = TimelinePagination()
+        page = queryset.filter(pagination.seek(pagination.ordering, [timezone.now(), self.post_2.id]))[:21]
+
+        plan = page.explain()
+        self.assertIn("timeline_user_date_idx", plan)
+        self.assertNotIn("TEMP B-TREE", plan)
+
+    @override_settings(TIMELINE_MAX_LENGTH=2, TIMELINE_TRIM_INTERVAL=1)
+    def test_fan_out_caps_the_timeline(self):
+        for index in range(4):
+            Post.objects.create(text=f"fresh {index}", owner=self.user_2, date_posted=timezone.now())
+
+        self.assertEqual(TimelineEntry.objects.filter(user=self.user).count(), 2)
+
+    @override_settings(TIMELINE_FANOUT_FOLLOWER_LIMIT=1)
+    def test_subscribed_posts_read_high_follower_authors_on_read(self):
+        post = Post.objects.create(text="fresh", owner=self.user_2, date_posted=timezone.now())
+
+        self.assertFalse(TimelineEntry.objects.filter(post=post).exists())
+        response = self.client.get(reverse("social:posts-subscribed-posts"))
+        self.assertEqual([p["id"] for p in response.data["results"]], [post.id, self.post_2.id])
 
     def test_action_my_posts(self):
         post_data = {
@@ -160,12 +435,23 @@ class AuthenticatedPostTest(TestCase):
         self.assertEqual(len(response_post.data), 2)
 
 
+    def test_action_my_posts_streamed(self):
+        older = Post.objects.create(text="older", owner=self.user, date_posted=timezone.now() - timedelta(days=1))
+
+        response = self.client.get(reverse("social:posts-my-posts"), {"stream": "true"})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertTrue(response.streaming)
+
+        posts = json.loads(b"".join(response.streaming_content))
+        self.assertEqual([post["id"] for post in posts], [self.post_1.id, older.id])
+        self.assertEqual(posts[0]["tags"], ["python"])
+
     def test_action_liked_posts(self):
         Likes.objects.create(user=self.user, post=self.post_2)
 
         response = self.client.get(reverse("social:posts-liked-posts"))
-        self.assertEqual(len(response.data), 1)
-        self.assertEqual(response.data[0]["id"], self.post_2.id)
+        self.assertEqual(len(response.data["results"]), 1)
+        self.assertEqual(response.data["results"][0]["id"], self.post_2.id)
 
     def test_action_comment_with_comment_text(self):
         url = reverse("social:posts-comment", args=[self.post_1.id])
@@ -173,6 +459,8 @@ class AuthenticatedPostTest(TestCase):
         comment_data = {"comment": "test comment"}
         response = self.client.post(url, data=comment_data)
         self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.post_1.refresh_from_db()
+        self.assertEqual(self.post_1.comments_count, 1)
 
     def test_action_comment_without_text(self):
         url = reverse("social:posts-comment", args=[self.post_1.id])
@@ -0,0 +1,155 @@
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.db.models import F, FilteredRelation, Q
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+from social import ranking
+from social.models import Post, TimelineEntry
+from user.models import Follow
+
+FAN_OUT_BATCH_SIZE = 1000
+
+
+def is_fan_out_on_read(author_id):
+    """authors with very large audiences are merged into timelines on read instead of on write"""
+    return get_user_model().objects.filter(
+        pk=author_id,
+        followers_count__gte=settings.TIMELINE_FANOUT_FOLLOWER_LIMIT
+    ).exists()
+
+
+def fan_out_on_read_authors(user):
+    """ids of the accounts followed by the user whose posts are not materialized"""
+    return list(
+        get_user_model().objects.filter(
+            followers__follower=user,
+            followers_count__gte=settings.TIMELINE_FANOUT_FOLLOWER_LIMIT
+        ).values_list("pk", flat=True)
+    )
+
+
+def fan_out_post(post):
+    """push a published post into the timelines of the author's followers"""
+    if post.date_posted is None or is_fan_out_on_read(post.owner_id):
+        return
+
+    score = ranking.post_score(post.date_posted, post.likes_count, post.comments_count)
+    follower_ids = Follow.objects.filter(following_id=post.owner_id).values_list("follower_id", flat=True)
+    batch = []
+    for follower_id in follower_ids.iterator(chunk_size=FAN_OUT_BATCH_SIZE):
+        batch.append(follower_id)
+        if len(batch) >= FAN_OUT_BATCH_SIZE:
+            _fan_out_batch(post, score, batch)
+            batch = []
+    _fan_out_batch(post, score, batch)
+
+
+def _fan_out_batch(post, score, follower_ids):
+    if not follower_ids:
+        return
+    affinities = ranking.affinities(follower_ids, post.owner_id)
+    TimelineEntry.objects.bulk_create(
+        [
+            TimelineEntry(
+                user_id=follower_id,
+                post_id=post.pk,
+                date_posted=post.date_posted,
+                affinity=affinities.get(follower_id, 0),
+                score=score + ranking.affinity_score(affinities.get(follower_id, 0)),
+            )
+            for follower_id in follower_ids
+        ],
+        ignore_conflicts=True
+    )
+    # every follower is trimmed on about one in TIMELINE_TRIM_INTERVAL of the posts fanned out
+    # to them, which keeps a timeline within about that many entries of TIMELINE_MAX_LENGTH
+    for follower_id in follower_ids:
+        if (follower_id + post.pk) % settings.TIMELINE_TRIM_INTERVAL == 0:
+            trim_timeline(follower_id)
+
+
+def backfill_timeline(follower_id, author_id):
+    """copy the latest posts of a newly followed author into the follower's timeline"""
+    if is_fan_out_on_read(author_id):
+        return
+
+    posts = Post.objects.filter(
+        owner_id=author_id,
+        date_posted__lte=timezone.now()
+    ).order_by("-date_posted", "-id").values_list("pk", "date_posted", "feed_score")[:settings.TIMELINE_MAX_LENGTH]
+
+    affinity = ranking.affinities([follower_id], author_id).get(follower_id, 0)
+    TimelineEntry.objects.bulk_create(
+        [
+            TimelineEntry(
+                user_id=follower_id,
+                post_id=pk,
+                date_posted=date_posted,
+                affinity=affinity,
+                score=feed_score + ranking.affinity_score(affinity),
+            )
+            for pk, date_posted, feed_score in posts
+        ],
+        ignore_conflicts=True
+    )
+    trim_timeline(follower_id)
+
+
+def remove_author_from_timeline(follower_id, author_id):
+    TimelineEntry.objects.filter(user_id=follower_id, post__owner_id=author_id).delete()
+
+
+def trim_timeline(user_id):
+    """drop everything past the newest TIMELINE_MAX_LENGTH entries of the user's timeline"""
+    cutoff = list(TimelineEntry.objects.filter(user_id=user_id).order_by(
+        "-date_posted", "-post_id"
+    ).values_list("date_posted", "post_id")[settings.TIMELINE_MAX_LENGTH:settings.TIMELINE_MAX_LENGTH + 1])
+    if not cutoff:
+        return 0
+
+    date_posted, post_id = cutoff[0]
+    deleted, _ = TimelineEntry.objects.filter(user_id=user_id).filter(
+        Q(date_posted__lt=date_posted) | Q(date_posted=date_posted, post_id__lte=post_id)
+    ).delete()
+    return deleted
+
+
+def timeline_queryset(user, queryset):
+    """
+    Restrict a post queryset to the user's home timeline, annotated with `timeline_date`
+    and `timeline_post_id` to order and seek on (see TimelinePagination).
+
+    With only materialized authors these are the TimelineEntry columns, so a page is a
+    range read of timeline_user_date_idx.
+    """
+    authors = fan_out_on_read_authors(user)
+    if not authors:
+        queryset = queryset.annotate(
+            entry=FilteredRelation("timeline_entries", condition=Q(timeline_entries__user=user))
+        ).filter(entry__isnull=False)
+        return queryset.annotate(
+            timeline_date=F("entry__date_posted"), timeline_post_id=F("entry__post_id")
+        ).order_by("-timeline_date", "-timeline_post_id")
+
+    materialized = TimelineEntry.objects.filter(user=user).values("post_id")
+    return queryset.filter(Q(pk__in=materialized) | Q(owner__in=authors)).annotate(
+        timeline_date=F("date_posted"), timeline_post_id=F("id")
+    ).order_by("-timeline_date", "-timeline_post_id")
+
+
+def ranked_timeline_queryset(user, queryset):
+    """
+    The user's home timeline annotated with `ranking_score`, see social.ranking.
+
+    Posts of fan-out-on-read authors have no timeline entry and rank by their
+    reader independent score.
+    """
+    queryset = queryset.annotate(entry=FilteredRelation("timeline_entries", condition=Q(timeline_entries__user=user)))
+    authors = fan_out_on_read_authors(user)
+    if not authors:
+        return queryset.filter(entry__isnull=False).annotate(ranking_score=F("entry__score"))
+
+    return queryset.filter(Q(entry__isnull=False) | Q(owner__in=authors)).annotate(
+        ranking_score=Coalesce(F("entry__score"), F("feed_score"))
+    )
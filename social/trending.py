@@ -0,0 +1,128 @@
+"""
+Trending posts and tags from sliding-window activity counters.
+
+Every like, comment and publication adds its weight to a counter for the current
+time bucket (TRENDING_BUCKET_SECONDS) with a single upsert: PostActivity for likes
+and comments on a post, TagActivity for posts published with a tag. refresh_trending
+drops the buckets that slid out of TRENDING_WINDOW, decays the rest with a half-life
+of TRENDING_HALF_LIFE and stores the TRENDING_SIZE best scores in TrendingPost and
+TrendingTag, so the trending endpoints read a small, score-indexed table.
+
+A tag scores its own publications plus the activity on the posts that carry it.
+"""
+import heapq
+import math
+from collections import defaultdict
+
+from django.conf import settings
+from django.db import connections, router, transaction
+from django.db.models import F, FloatField, QuerySet, Sum
+from django.db.models.functions import Exp
+from django.utils import timezone
+from rest_framework.exceptions import ValidationError
+
+from social.models import PostActivity, TagActivity, TrendingPost, TrendingTag
+
+LIKE = "like"
+COMMENT = "comment"
+PUBLICATION = "publication"
+
+DEFAULT_LIMIT = 20
+
+
+def current_bucket(now=None):
+    return int((now or timezone.now()).timestamp()) // settings.TRENDING_BUCKET_SECONDS
+
+
+def _add(model, column, weights, bucket=None):
+    """add `weights` ({object id: weight}) to the objects' counters of the current bucket"""
+    weights = {pk: weight for pk, weight in weights.items() if weight}
+    if not weights:
+        return
+
+    bucket = current_bucket() if bucket is None else bucket
+    table = model._meta.db_table
+    with connections[router.db_for_write(model)].cursor() as cursor:
+        cursor.executemany(
+            f"""
+            INSERT INTO {table} ({column}, bucket, weight) VALUES (%s, %s, %s)
+            ON CONFLICT ({column}, bucket) DO UPDATE SET weight = {table}.weight + excluded.weight
+            """,
+            [(pk, bucket, weight) for pk, weight in weights.items()],
+        )
+
+
+def record_like(post_id, liked=True):
+    weight = settings.TRENDING_WEIGHTS[LIKE]
+    _add(PostActivity, "post_id", {post_id: weight if liked else -weight})
+
+
+def record_comment(post_id, added=True):
+    weight = settings.TRENDING_WEIGHTS[COMMENT]
+    _add(PostActivity, "post_id", {post_id: weight if added else -weight})
+
+
+def record_publication(tag_ids, posts=1):
+    weight = settings.TRENDING_WEIGHTS[PUBLICATION] * posts
+    _add(TagActivity, "tag_id", {tag_id: weight for tag_id in tag_ids})
+
+
+def deleted_directly(origin, model):
+    """
+    True when a delete signal comes from deleting `model` rows themselves.
+
+    Rows removed by a cascade are skipped: their parent is about to disappear, and
+    a counter written for it now would point at a deleted row.
+    """
+    origin_model = origin.model if isinstance(origin, QuerySet) else type(origin)
+    return origin_model is model
+
+
+def _decayed_score(now_bucket):
+    rate = math.log(2) * settings.TRENDING_BUCKET_SECONDS / settings.TRENDING_HALF_LIFE
+    return Sum(F("weight") * Exp((F("bucket") - now_bucket) * rate), output_field=FloatField())
+
+
+def refresh_trending(now=None):
+    """slide the window, rescore what is left and replace the rankings, returns (posts, tags) ranked"""
+    now_bucket = current_bucket(now)
+    oldest = now_bucket - settings.TRENDING_WINDOW // settings.TRENDING_BUCKET_SECONDS
+    size = settings.TRENDING_SIZE
+    score = _decayed_score(now_bucket)
+
+    PostActivity.objects.filter(bucket__lt=oldest).delete()
+    TagActivity.objects.filter(bucket__lt=oldest).delete()
+
+    posts = list(
+        PostActivity.objects.order_by().values("post_id").annotate(score=score).filter(score__gt=0)
+        .order_by("-score", "post_id").values_list("post_id", "score")[:size]
+    )
+
+    tags = defaultdict(float)
+    for tag_id, tag_score in TagActivity.objects.order_by().values("tag_id").annotate(score=score).values_list(
+        "tag_id", "score"
+    ):
+        tags[tag_id] += tag_score
+    for tag_id, tag_score in PostActivity.objects.filter(post__tags__isnull=False).order_by().values(
+        "post__tags"
+    ).annotate(score=score).values_list("post__tags", "score"):
+        tags[tag_id] += tag_score
+    tags = heapq.nlargest(size, ((tag_id, tag_score) for tag_id, tag_score in tags.items() if tag_score > 0),
+                          key=lambda item: (item[1], -item[0]))
+
+    with transaction.atomic():
+        TrendingPost.objects.all().delete()
+        TrendingPost.objects.bulk_create([TrendingPost(post_id=pk, score=value) for pk, value in posts])
+        TrendingTag.objects.all().delete()
+        TrendingTag.objects.bulk_create([TrendingTag(tag_id=pk, score=value) for pk, value in tags])
+    return len(posts), len(tags)
+
+
+def limit_from(request):
+    """the `limit` query parameter, capped at TRENDING_SIZE"""
+    value = request.query_params.get("limit", DEFAULT_LIMIT)
+    try:
+        limit = int(value)
+    except (TypeError, ValueError):
+        raise ValidationError({"limit": "Expected an integer."})
+    return max(1, min(limit, settings.TRENDING_SIZE))
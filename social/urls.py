@@ -7,6 +7,7 @@ from social import views
 router = routers.SimpleRouter()
 
 router.register(r'posts', views.PostViewSet, basename='posts')
+router.register(r'tags', views.TagViewSet, basename='tags')
 
 urlpatterns = [
     path("", include(router.urls)),
@@ -1,7 +1,10 @@
 from datetime import datetime
 
-from django.db.models import Prefetch, OuterRef, Exists
+from asgiref.sync import sync_to_async
+from django.db import IntegrityError, transaction
+from django.db.models import F, OuterRef, Exists, Q
 from django.utils import timezone
+from django.utils.http import parse_etags
 from django.utils.timezone import make_aware
 from drf_spectacular.types import OpenApiTypes
 from drf_spectacular.utils import extend_schema, OpenApiParameter
@@ -10,14 +13,44 @@ from rest_framework import viewsets, status
 from rest_framework.permissions import AllowAny, IsAuthenticated
 from rest_framework.response import Response
 from rest_framework.decorators import action
+from rest_framework.exceptions import ValidationError
 
-from social.models import Post, Likes, Comments
-from social.serializers import PostListSerializer, PostDetailSerializer, CommentsCreateSerializer, PostCreateSerializer
-from user.models import Follow
+from social import cache as feed_cache, like_buffer, search, tag_index, timeline, trending
+from social.models import Post, Likes, Comments, Tags
+from social.pagination import (
+    CommentPagination,
+    KeysetPagination,
+    LikePagination,
+    RankedFeedPagination,
+    SearchPagination,
+    TimelinePagination,
+)
+from social.serializers import (
+    PostListRowSerializer,
+    PostListSerializer,
+    PostDetailSerializer,
+    CommentsCreateSerializer,
+    PostCreateSerializer,
+    CommentsSerializer,
+    LikesSerializer,
+    TrendingTagSerializer,
+    latest_preview_prefetches,
+)
+from social_media_api.asynchronous import AsyncViewSetMixin
+from social_media_api.database import serialized_write
+from social_media_api.fieldsets import Fieldset, fieldset_parameters
+from social_media_api.streaming import STREAM_PARAMETER, streaming_list_response, wants_stream
 
+LIMIT_PARAMETER = OpenApiParameter(
+    "limit",
+    type=OpenApiTypes.INT,
+    description="Number of entries to return, at most TRENDING_SIZE (e.g., ?limit=10)."
+)
 
-class PostViewSet(viewsets.ModelViewSet):
+
+class PostViewSet(AsyncViewSetMixin, viewsets.ModelViewSet):
     queryset = Post.objects.all()
+    pagination_class = KeysetPagination
 
     def get_serializer_class(self):
         if self.action == "list":
@@ -29,34 +62,40 @@ class PostViewSet(viewsets.ModelViewSet):
         return PostListSerializer
 
     def get_permissions(self):
-        if self.action == "list":
+        if self.action in ["list", "search", "trending"]:
             return [AllowAny()]
         if self.action in ["create", "retrieve", "update", "partial_update"]:
             return [IsAuthenticated()]
         return [IsAuthenticated()]
 
     def get_queryset(self):
+        if self.action in ["comments", "likes"]:
+            return self.queryset.filter(date_posted__lte=timezone.now())
+
         user = self.request.user
+        fieldset = self.get_fieldset()
         queryset = self.queryset
-        if user.is_authenticated:
+        if fieldset.includes("owner"):
+            queryset = queryset.select_related("owner")
+        if fieldset.includes("images"):
+            queryset = queryset.prefetch_related("images")
+        if fieldset.includes("tags"):
+            queryset = queryset.prefetch_related("tags")
+        if user.is_authenticated and fieldset.includes("is_liked"):
             likes_subquery = Likes.objects.filter(
                 post=OuterRef("pk"),
                 user=user
             )
-            queryset = Post.objects.select_related("owner").prefetch_related(
-                Prefetch("images"),
-                Prefetch("tags"),
-                Prefetch("post_likes"),
-                Prefetch("post_comments"),
-            ).annotate(
+            queryset = queryset.annotate(
                 is_liked=Exists(likes_subquery)
             )
 
         if self.action == "retrieve":
-            queryset = queryset.prefetch_related("post_comments__user")
+            queryset = queryset.prefetch_related(*latest_preview_prefetches())
 
         text = self.request.query_params.get('text')
-        tags = self.request.query_params.get('tags')
+        tags_any = self.request.query_params.get('tags_any') or self.request.query_params.get('tags')
+        tags_all = self.request.query_params.get('tags_all')
         date_lt = self.request.query_params.get('date_lt')
         date_gt = self.request.query_params.get('date_gt')
         owner = self.request.query_params.get('owner')
@@ -64,11 +103,13 @@ class PostViewSet(viewsets.ModelViewSet):
         queryset = queryset.filter(date_posted__lte=timezone.now())
 
         if text:
-            queryset = queryset.filter(text__icontains=text)
+            queryset = search.filter_by_text(queryset, text)
 
-        if tags:
-            tags_list = [int(tag) for tag in tags.split(',')]
-            queryset = queryset.filter(tags__tag_post__id__in=tags_list)
+        if tags_any:
+            queryset = tag_index.filter_any(queryset, self._parse_ids(tags_any, "tags_any"))
+
+        if tags_all:
+            queryset = tag_index.filter_all(queryset, self._parse_ids(tags_all, "tags_all"))
 
         if date_lt:
             date = make_aware(datetime.strptime(date_lt, '%d.%m.%Y'))
@@ -83,17 +124,85 @@ class PostViewSet(viewsets.ModelViewSet):
 
         return queryset
 
+    def get_fieldset(self):
+        """the PostListSerializer fields requested with ?fields= and ?expand=, the queryset loads only those"""
+        if self.get_serializer_class() is not PostListSerializer:
+            return Fieldset()
+        return Fieldset.from_request(self.request, PostListSerializer)
+
+    def get_object(self):
+        post = super().get_object()
+        like_buffer.overlay(self.request.user, [post])
+        return post
+
+    async def aget_object(self):
+        post = await super().aget_object()
+        await sync_to_async(like_buffer.overlay)(self.request.user, [post])
+        return post
+
+    def paginate_queryset(self, queryset):
+        page = super().paginate_queryset(queryset)
+        if page is not None and queryset.model is Post:
+            like_buffer.overlay(self.request.user, page)
+        return page
+
+    async def apaginate_queryset(self, queryset):
+        page = await super().apaginate_queryset(queryset)
+        if page is not None and queryset.model is Post:
+            await sync_to_async(like_buffer.overlay)(self.request.user, page)
+        return page
+
+    @staticmethod
+    def _parse_ids(value, param):
+        try:
+            return [int(pk) for pk in value.split(',')]
+        except ValueError:
+            raise ValidationError({param: "Expected a comma-separated list of tag IDs."})
+
+    def post_rows(self, queryset):
+        """`queryset` as the PostListRowSerializer rows of the requested fields"""
+        return PostListRowSerializer.values(queryset, self.get_fieldset())
+
+    def paginated_posts_response(self, queryset):
+        page = self.paginate_queryset(self.post_rows(queryset))
+        serializer = PostListRowSerializer(page, context=self.get_serializer_context())
+        return self.get_paginated_response(serializer.data)
+
+    async def apaginated_posts_response(self, queryset):
+        page = await self.apaginate_queryset(self.post_rows(queryset))
+        serializer = PostListRowSerializer(page, context=self.get_serializer_context())
+        return self.get_paginated_response(await serializer.adata())
+
+    def streamed_posts_response(self, queryset):
+        serializer = PostListSerializer(context=self.get_serializer_context())
+        user = self.request.user
+        return streaming_list_response(
+            queryset.order_by(*self.paginator.ordering),
+            serializer,
+            prepare=lambda posts: like_buffer.overlay(user, posts),
+        )
+
     @extend_schema(
         parameters=[
             OpenApiParameter(
                 "text",
                 type=OpenApiTypes.STR,
-                description="Text filter: searches for occurrences of the provided text in the `text` field (e.g., ?text=example)."
+                description="Text filter: full-text search over the `text` field, every word also matches as a prefix (e.g., ?text=example)."
             ),
             OpenApiParameter(
                 "tags",
                 type=OpenApiTypes.STR,
-                description="Tags filter: accepts a comma-separated list of tag IDs (e.g., ?tags=1,2,3)."
+                description="Tags filter: alias of `tags_any` (e.g., ?tags=1,2,3)."
+            ),
+            OpenApiParameter(
+                "tags_any",
+                type=OpenApiTypes.STR,
+                description="Tags filter: posts with at least one of the comma-separated tag IDs (e.g., ?tags_any=1,2,3)."
+            ),
+            OpenApiParameter(
+                "tags_all",
+                type=OpenApiTypes.STR,
+                description="Tags filter: posts with every one of the comma-separated tag IDs (e.g., ?tags_all=1,2)."
             ),
             OpenApiParameter(
                 "date_lt",
@@ -110,10 +219,80 @@ class PostViewSet(viewsets.ModelViewSet):
                 type=OpenApiTypes.INT,
                 description="Owner filter: accepts a user ID to filter by the owner (e.g., ?owner=1)."
             ),
+            *fieldset_parameters(PostListSerializer),
         ]
     )
     def list(self, request, *args, **kwargs):
-        return super().list(request, *args, **kwargs)
+        key = feed_cache.cache_key(request)
+        entry = feed_cache.get(key)
+        if entry is None:
+            response = self.paginated_posts_response(self.filter_queryset(self.get_queryset()))
+            entry = feed_cache.store(key, request, response.data, self.page_post_ids())
+        return self.cached_feed_response(request, entry)
+
+    async def alist(self, request, *args, **kwargs):
+        key = await sync_to_async(feed_cache.cache_key)(request)
+        entry = await sync_to_async(feed_cache.get)(key)
+        if entry is None:
+            response = await self.apaginated_posts_response(self.filter_queryset(self.get_queryset()))
+            entry = await sync_to_async(feed_cache.store)(key, request, response.data, self.page_post_ids())
+        return self.cached_feed_response(request, entry)
+
+    def page_post_ids(self):
+        return [row["id"] for row in self.paginator.page]
+
+    @staticmethod
+    def cached_feed_response(request, entry):
+        headers = {"ETag": entry["etag"], "Vary": "Accept, Authorization"}
+        if entry["etag"] in parse_etags(request.headers.get("If-None-Match", "")):
+            return Response(status=status.HTTP_304_NOT_MODIFIED, headers=headers)
+        return Response(entry["data"], headers=headers)
+
+    async def aretrieve(self, request, *args, **kwargs):
+        serializer = self.get_serializer(await self.aget_object())
+        return Response(serializer.data)
+
+    @extend_schema(
+        description="Full-text search over published posts ordered by relevance. "
+                    "Combines with the `tags`, `owner`, `date_lt` and `date_gt` filters of the list endpoint.",
+        parameters=[
+            OpenApiParameter(
+                "q",
+                type=OpenApiTypes.STR,
+                required=True,
+                description="Search query: every word must match, words also match as prefixes (e.g., ?q=djan rest)."
+            ),
+            *fieldset_parameters(PostListSerializer),
+        ],
+        responses={
+            status.HTTP_200_OK: PostListSerializer,
+        }
+    )
+    @action(detail=False, methods=["GET"], pagination_class=SearchPagination)
+    def search(self, request):
+        query = request.query_params.get("q", "").strip()
+        if not query:
+            return Response({"detail": "Search query is required."}, status=status.HTTP_400_BAD_REQUEST)
+
+        posts = search.search(self.get_queryset(), query)
+        return self.paginated_posts_response(posts)
+
+    @extend_schema(
+        description="Posts with the most recent likes and comments, rescored every minute. "
+                    "Combines with the filters of the list endpoint.",
+        parameters=[LIMIT_PARAMETER, *fieldset_parameters(PostListSerializer)],
+        responses={
+            status.HTTP_200_OK: PostListSerializer(many=True),
+        }
+    )
+    @action(detail=False, methods=["GET"])
+    def trending(self, request):
+        limit = trending.limit_from(request)
+        posts = self.post_rows(self.get_queryset().filter(trending__isnull=False))
+        posts = list(posts.order_by("-trending__score", "-id")[:limit])
+        like_buffer.overlay(request.user, posts)
+        serializer = PostListRowSerializer(posts, context=self.get_serializer_context())
+        return Response(serializer.data)
 
     @extend_schema(
         description="Like a post. If the post is already liked by the user, returns a 400 status.",
@@ -124,13 +303,22 @@ class PostViewSet(viewsets.ModelViewSet):
         }
     )
     @action(detail=True, methods=["post"], permission_classes=[IsAuthenticated()])
+    @serialized_write
     def like(self, request, pk=None):
         post = self.get_object()
-        user = request.user
-        if not Likes.objects.filter(user=user, post=post).exists():
-            Likes.objects.create(user=user, post=post)
+        if post.is_liked:
+            return Response({"status": "post already liked"}, status=status.HTTP_400_BAD_REQUEST)
+
+        if like_buffer.is_enabled():
+            like_buffer.record(request.user, post, liked=True)
             return Response({"status": "post liked"}, status=status.HTTP_201_CREATED)
-        return Response({"status": "post already liked"}, status=status.HTTP_400_BAD_REQUEST)
+
+        try:
+            with transaction.atomic():
+                Likes.objects.create(user=request.user, post=post)
+        except IntegrityError:
+            return Response({"status": "post already liked"}, status=status.HTTP_400_BAD_REQUEST)
+        return Response({"status": "post liked"}, status=status.HTTP_201_CREATED)
 
     @extend_schema(
         description="Dislike a post. If the post is already liked by the user, returns a 400 status.",
@@ -141,17 +329,59 @@ class PostViewSet(viewsets.ModelViewSet):
         }
     )
     @action(detail=True, methods=["post"], permission_classes=[IsAuthenticated()])
+    @serialized_write
     def unlike(self, request, pk=None):
         post = self.get_object()
-        user = request.user
-        like = Likes.objects.filter(user=user, post=post)
-        if like.exists():
-            like.delete()
-            return Response(status=status.HTTP_204_NO_CONTENT)
-        return Response({"status": "post not liked"}, status=status.HTTP_400_BAD_REQUEST)
+        if not post.is_liked:
+            return Response({"status": "post not liked"}, status=status.HTTP_400_BAD_REQUEST)
+
+        if like_buffer.is_enabled():
+            like_buffer.record(request.user, post, liked=False)
+        else:
+            with transaction.atomic():
+                Likes.objects.filter(user=request.user, post=post).delete()
+        return Response(status=status.HTTP_204_NO_CONTENT)
+
+    @extend_schema(
+        description="Comments of a post, newest first, cursor paginated.",
+        responses={
+            status.HTTP_200_OK: CommentsSerializer(many=True),
+        }
+    )
+    @action(detail=True, methods=["GET"], pagination_class=CommentPagination)
+    def comments(self, request, pk=None):
+        post = self.get_object()
+        comments = Comments.objects.filter(post=post).select_related("user")
+        page = self.paginate_queryset(comments)
+        serializer = CommentsSerializer(page, many=True, context=self.get_serializer_context())
+        return self.get_paginated_response(serializer.data)
+
+    @extend_schema(
+        description="Likes of a post, newest first, cursor paginated.",
+        responses={
+            status.HTTP_200_OK: LikesSerializer(many=True),
+        }
+    )
+    @action(detail=True, methods=["GET"], pagination_class=LikePagination)
+    def likes(self, request, pk=None):
+        post = self.get_object()
+        likes = Likes.objects.filter(post=post).select_related("user")
+        page = self.paginate_queryset(likes)
+        serializer = LikesSerializer(page, many=True, context=self.get_serializer_context())
+        return self.get_paginated_response(serializer.data)
 
     @extend_schema(
         description="retrieving users posts subscribed by the user",
+        parameters=[
+            OpenApiParameter(
+                "ranking",
+                type=OpenApiTypes.STR,
+                enum=["date", "score"],
+                description="Feed order: newest first (`date`, default) or by precomputed score combining recency, "
+                            "likes, comments and your likes of the author (`score`)."
+            ),
+            *fieldset_parameters(PostListSerializer),
+        ],
         responses={
             status.HTTP_200_OK: PostListSerializer,
         }
@@ -159,15 +389,25 @@ class PostViewSet(viewsets.ModelViewSet):
     @action(detail=False, methods=["get"], permission_classes=[IsAuthenticated()])
     def subscribed_posts(self, request):
         """retrieving users posts subscribed by the user"""
-        queryset = self.get_queryset()
-        user = request.user
-        following_users = Follow.objects.filter(follower=user).values_list('following', flat=True)
-        posts = queryset.filter(owner__in=following_users)
-        serializer = PostListSerializer(posts, many=True, context={"request": request})
-        return Response(serializer.data)
+        return self.paginated_posts_response(self.subscribed_posts_queryset(request))
+
+    async def asubscribed_posts(self, request):
+        posts = await sync_to_async(self.subscribed_posts_queryset)(request)
+        return await self.apaginated_posts_response(posts)
+
+    def subscribed_posts_queryset(self, request):
+        ranking = request.query_params.get("ranking", "date")
+        if ranking == "score":
+            self.pagination_class = RankedFeedPagination
+            return timeline.ranked_timeline_queryset(request.user, self.get_queryset())
+        elif ranking == "date":
+            self.pagination_class = TimelinePagination
+            return timeline.timeline_queryset(request.user, self.get_queryset())
+        raise ValidationError({"ranking": "Expected `date` or `score`."})
 
     @extend_schema(
         description="retrieving posts created by user",
+        parameters=[STREAM_PARAMETER, *fieldset_parameters(PostListSerializer)],
         responses={
             status.HTTP_200_OK: PostListSerializer,
         }
@@ -178,8 +418,9 @@ class PostViewSet(viewsets.ModelViewSet):
 
         if request.method == "GET":
             posts = self.get_queryset().filter(owner=user)
-            serializer = PostListSerializer(posts, many=True, context={"request": request})
-            return Response(serializer.data)
+            if wants_stream(request):
+                return self.streamed_posts_response(posts)
+            return self.paginated_posts_response(posts)
 
         elif request.method == "POST":
             serializer = PostCreateSerializer(data=request.data, context={"request": request})
@@ -190,6 +431,7 @@ class PostViewSet(viewsets.ModelViewSet):
 
     @extend_schema(
         description="retrieving posts what liked by user",
+        parameters=[STREAM_PARAMETER, *fieldset_parameters(PostListSerializer)],
         responses={
             status.HTTP_200_OK: PostDetailSerializer,
         }
@@ -199,9 +441,13 @@ class PostViewSet(viewsets.ModelViewSet):
         queryset = self.get_queryset()
         user = request.user
         likes = Likes.objects.filter(user=user).values_list('post', flat=True)
-        posts = queryset.filter(id__in=likes)
-        serializer = PostListSerializer(posts, many=True, context={"request": request})
-        return Response(serializer.data)
+        intents = like_buffer.user_intents(user)
+        posts = queryset.filter(
+            Q(id__in=likes) | Q(id__in=[post_id for post_id, liked in intents.items() if liked])
+        ).exclude(id__in=[post_id for post_id, liked in intents.items() if not liked])
+        if wants_stream(request):
+            return self.streamed_posts_response(posts)
+        return self.paginated_posts_response(posts)
 
     @extend_schema(
         request=CommentsCreateSerializer,
@@ -211,6 +457,7 @@ class PostViewSet(viewsets.ModelViewSet):
         },
     )
     @action(detail=True, methods=["POST"], permission_classes=[IsAuthenticated()])
+    @serialized_write
     def comment(self, request, pk=None):
         user = request.user
         post = self.get_object()
@@ -219,7 +466,30 @@ class PostViewSet(viewsets.ModelViewSet):
         if not comment_text:
             return Response({"detail": "Comment text is required."}, status=status.HTTP_400_BAD_REQUEST)
 
-        comment = Comments.objects.create(user=user, post=post, comment=comment_text)
+        with transaction.atomic():
+            comment = Comments.objects.create(user=user, post=post, comment=comment_text)
 
         serializer = CommentsCreateSerializer(comment, context={'request': request})
         return Response(serializer.data, status=status.HTTP_201_CREATED)
+
+
+class TagViewSet(viewsets.GenericViewSet):
+    queryset = Tags.objects.all()
+    serializer_class = TrendingTagSerializer
+    permission_classes = [AllowAny]
+
+    @extend_schema(
+        description="Tags with the most recent posts, likes and comments, rescored every minute.",
+        parameters=[LIMIT_PARAMETER],
+        responses={
+            status.HTTP_200_OK: TrendingTagSerializer(many=True),
+        }
+    )
+    @action(detail=False, methods=["GET"])
+    def trending(self, request):
+        limit = trending.limit_from(request)
+        tags = self.get_queryset().filter(trending__isnull=False).annotate(
+            score=F("trending__score")
+        ).order_by("-score", "id")[:limit]
+        serializer = self.get_serializer(tags, many=True)
+        return Response(serializer.data)
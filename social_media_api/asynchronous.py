@@ -0,0 +1,92 @@
+"""
+Native async variants of DRF viewset actions, served under ASGI.
+
+DRF dispatches synchronously, so under ASGI every request holds a worker thread from
+authentication to rendering, while a slow client is sent its response included. A
+viewset with AsyncViewSetMixin can define an `a<action>` coroutine next to an action
+(`alist` next to `list`). With ASYNC_VIEWS on, the routes of those actions become async
+views that await the coroutine on the event loop. Authentication, permissions and the
+queries the coroutine awaits still run in a thread, since DRF authentication and the
+Django ORM are synchronous, but only for as long as they take.
+
+Serialization runs on the event loop, so a coroutine has to load everything its
+serializer reads; a lazy query there raises SynchronousOnlyOperation. Methods of a route
+without an `a<action>` variant, e.g. POST next to an async GET, run in a thread as they
+do for a synchronous view.
+"""
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.http import Http404
+
+
+def async_action(viewset, action):
+    """the coroutine serving `action` of a viewset class or instance, or None"""
+    handler = getattr(viewset, f"a{action}", None) if action else None
+    return handler if iscoroutinefunction(handler) else None
+
+
+class AsyncViewSetMixin:
+    serve_async = False
+
+    @classmethod
+    def as_view(cls, actions=None, **initkwargs):
+        serve_async = initkwargs.pop("serve_async", settings.ASYNC_VIEWS) and any(
+            async_action(cls, action) for action in (actions or {}).values()
+        )
+        view = super().as_view(actions, serve_async=serve_async, **initkwargs)
+        if serve_async:
+            markcoroutinefunction(view)
+        return view
+
+    def dispatch(self, request, *args, **kwargs):
+        if self.serve_async:
+            return self.adispatch(request, *args, **kwargs)
+        return super().dispatch(request, *args, **kwargs)
+
+    async def adispatch(self, request, *args, **kwargs):
+        """APIView.dispatch awaiting the async variant of the action"""
+        self.args = args
+        self.kwargs = kwargs
+        request = self.initialize_request(request, *args, **kwargs)
+        self.request = request
+        self.headers = self.default_response_headers
+
+        try:
+            await sync_to_async(self.initial)(request, *args, **kwargs)
+
+            handler = async_action(self, self.action)
+            if handler is not None:
+                response = await handler(request, *args, **kwargs)
+            else:
+                method = request.method.lower()
+                if method in self.http_method_names:
+                    handler = getattr(self, method, self.http_method_not_allowed)
+                else:
+                    handler = self.http_method_not_allowed
+                response = await sync_to_async(handler)(request, *args, **kwargs)
+
+        except Exception as exc:
+            response = self.handle_exception(exc)
+
+        self.response = self.finalize_response(request, response, *args, **kwargs)
+        return self.response
+
+    async def aget_object(self):
+        """GenericAPIView.get_object awaiting the lookup"""
+        queryset = self.filter_queryset(self.get_queryset())
+        lookup_url_kwarg = self.lookup_url_kwarg or self.lookup_field
+        try:
+            obj = await queryset.aget(**{self.lookup_field: self.kwargs[lookup_url_kwarg]})
+        except queryset.model.DoesNotExist:
+            raise Http404(f"No {queryset.model._meta.object_name} matches the given query.")
+        except (TypeError, ValueError, ValidationError):
+            raise Http404
+
+        self.check_object_permissions(self.request, obj)
+        return obj
+
+    async def apaginate_queryset(self, queryset):
+        if self.paginator is None:
+            return None
+        return await self.paginator.apaginate_queryset(queryset, self.request, view=self)
@@ -0,0 +1,47 @@
+"""
+Single-writer queue for write-heavy views on SQLite.
+
+SQLite allows one writer at a time. Left alone, concurrent likes, follows and comments
+of the same process race for the file lock, and whoever loses after the busy timeout
+fails with "database is locked". serialized_write makes the writers of a process wait
+their turn on a lock instead, so only one of them at a time competes with other
+processes. It then retries a view that still hit a locked database, as long as the
+failed attempt was rolled back (no transaction was open around the view).
+
+On other database engines the decorator only calls the view.
+"""
+import functools
+import threading
+import time
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, OperationalError, connections
+
+_write_lock = threading.RLock()
+
+
+def is_locked_error(error):
+    return "database is locked" in str(error) or "database table is locked" in str(error)
+
+
+def serialized_write(func):
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        connection = connections[DEFAULT_DB_ALIAS]
+        if connection.vendor != "sqlite":
+            return func(*args, **kwargs)
+
+        for attempt in range(settings.DATABASE_WRITE_RETRIES + 1):
+            try:
+                with _write_lock:
+                    return func(*args, **kwargs)
+            except OperationalError as error:
+                if (
+                    not is_locked_error(error)
+                    or connection.in_atomic_block
+                    or attempt == settings.DATABASE_WRITE_RETRIES
+                ):
+                    raise
+            time.sleep(settings.DATABASE_WRITE_RETRY_DELAY * 2 ** attempt)
+
+    return wrapper
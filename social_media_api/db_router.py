@@ -0,0 +1,123 @@
+"""
+Read-replica routing for read-only endpoints.
+
+ReplicaRoutingMiddleware marks safe-method requests to the endpoints listed in
+DATABASE_REPLICA_VIEWS (`ViewSet.action` labels, as in social_media_api.metrics), and
+ReplicaRouter sends the reads of a marked request to a random alias of
+DATABASE_REPLICAS. Everything else, writes, reads inside a transaction, Celery tasks and
+management commands included, uses the primary.
+
+Replicas lag behind the primary, so a user whose write succeeded is pinned to the
+primary for DATABASE_PRIMARY_PIN_SECONDS and reads their own writes. Queries run while
+a streaming response is iterated, after the middleware has returned, go to the primary.
+"""
+import random
+from contextvars import ContextVar
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.conf import settings
+from django.core.cache import caches
+from django.db import DEFAULT_DB_ALIAS, connections
+from rest_framework.permissions import SAFE_METHODS
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import InvalidToken
+from rest_framework_simplejwt.settings import api_settings
+
+from social_media_api.metrics import endpoint_label
+
+PIN_KEY = "db:primary-pin:{}"
+
+_use_replica = ContextVar("use_replica", default=False)
+
+
+class ReplicaRouter:
+    def db_for_read(self, model, **hints):
+        replicas = settings.DATABASE_REPLICAS
+        if not replicas or not _use_replica.get() or connections[DEFAULT_DB_ALIAS].in_atomic_block:
+            return DEFAULT_DB_ALIAS
+        return random.choice(replicas)
+
+    def db_for_write(self, model, **hints):
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        databases = {DEFAULT_DB_ALIAS, *settings.DATABASE_REPLICAS}
+        if obj1._state.db in databases and obj2._state.db in databases:
+            return True
+        return None
+
+
+def _cache():
+    return caches[settings.DATABASE_PIN_CACHE_ALIAS]
+
+
+def pin_to_primary(user_id):
+    if user_id is not None:
+        _cache().set(PIN_KEY.format(user_id), 1, timeout=settings.DATABASE_PRIMARY_PIN_SECONDS)
+
+
+def is_pinned(user_id):
+    return user_id is not None and _cache().get(PIN_KEY.format(user_id)) is not None
+
+
+def request_user_id(request):
+    """id of the requesting user from the session, or from the access token before DRF has authenticated it"""
+    user = getattr(request, "user", None)
+    if user is not None and user.is_authenticated:
+        return user.pk
+
+    authentication = JWTAuthentication()
+    header = authentication.get_header(request)
+    raw_token = authentication.get_raw_token(header) if header is not None else None
+    if raw_token is None:
+        return None
+    try:
+        return authentication.get_validated_token(raw_token).get(api_settings.USER_ID_CLAIM)
+    except InvalidToken:
+        return None
+
+
+class ReplicaRoutingMiddleware:
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+
+        token = _use_replica.set(False)
+        try:
+            response = self.get_response(request)
+        finally:
+            _use_replica.reset(token)
+
+        if request.method not in SAFE_METHODS and response.status_code < 400:
+            pin_to_primary(request_user_id(request))
+        return response
+
+    async def __acall__(self, request):
+        token = _use_replica.set(False)
+        try:
+            response = await self.get_response(request)
+        finally:
+            _use_replica.reset(token)
+
+        if request.method not in SAFE_METHODS and response.status_code < 400:
+            user_id = await sync_to_async(request_user_id)(request)
+            await sync_to_async(pin_to_primary)(user_id)
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        if (
+            settings.DATABASE_REPLICAS
+            and request.method in SAFE_METHODS
+            and endpoint_label(request) in settings.DATABASE_REPLICA_VIEWS
+            and not is_pinned(request_user_id(request))
+        ):
+            _use_replica.set(True)
@@ -0,0 +1,89 @@
+"""
+Sparse fieldsets (?fields=) and expansion (?expand=) of read-only list representations.
+
+`?fields=id,text,likes` keeps only the listed fields of every item and `?expand=owner`
+replaces a field by the richer representation the serializer lists in
+`expandable_fields`. Views read the same selection through `Fieldset.from_request` to
+build only the joins, prefetches and annotations the requested fields need. Requests
+that write data always get the full representation.
+"""
+from drf_spectacular.types import OpenApiTypes
+from drf_spectacular.utils import OpenApiParameter
+from rest_framework.exceptions import ValidationError
+from rest_framework.permissions import SAFE_METHODS
+
+FIELDS_QUERY_PARAM = "fields"
+EXPAND_QUERY_PARAM = "expand"
+
+
+def fieldset_parameters(serializer_class):
+    fields = ", ".join(serializer_class.Meta.fields)
+    expandable = ", ".join(serializer_class.expandable_fields)
+    return [
+        OpenApiParameter(
+            FIELDS_QUERY_PARAM,
+            type=OpenApiTypes.STR,
+            description=f"Comma-separated fields to return, all by default (one of: {fields}; e.g., ?fields=id,text)."
+        ),
+        OpenApiParameter(
+            EXPAND_QUERY_PARAM,
+            type=OpenApiTypes.STR,
+            description=f"Comma-separated fields to return as nested objects (one of: {expandable})."
+        ),
+    ]
+
+
+def _names(request, param, allowed):
+    # serializers may also get a plain HttpRequest in their context
+    value = getattr(request, "query_params", request.GET).get(param)
+    if value is None:
+        return None
+    names = {name.strip() for name in value.split(",") if name.strip()}
+    unknown = sorted(names - set(allowed))
+    if unknown:
+        raise ValidationError({param: f"Unknown field(s): {', '.join(unknown)}."})
+    return names
+
+
+class Fieldset:
+    """the fields of `serializer_class` a request asks for"""
+
+    def __init__(self, fields=None, expand=()):
+        self.fields = fields
+        self.expand = frozenset(expand)
+
+    @classmethod
+    def from_request(cls, request, serializer_class):
+        if request is None or request.method not in SAFE_METHODS:
+            return cls()
+        fields = _names(request, FIELDS_QUERY_PARAM, serializer_class.Meta.fields)
+        expand = _names(request, EXPAND_QUERY_PARAM, serializer_class.expandable_fields) or ()
+        if fields is not None:
+            expand = {name for name in expand if name in fields}
+        return cls(fields, expand)
+
+    def includes(self, name):
+        return self.fields is None or name in self.fields
+
+    def expands(self, name):
+        return name in self.expand
+
+
+class DynamicFieldsMixin:
+    """
+    Serializer mixin applying the request's Fieldset.
+
+    `expandable_fields` maps a field to the (serializer class, keyword arguments) that
+    replaces it when the field is expanded.
+    """
+    expandable_fields = {}
+
+    def get_fields(self):
+        fields = super().get_fields()
+        fieldset = Fieldset.from_request(self.context.get("request"), type(self))
+        for name in fieldset.expand:
+            serializer_class, kwargs = self.expandable_fields[name]
+            fields[name] = serializer_class(**kwargs)
+        if fieldset.fields is not None:
+            fields = {name: field for name, field in fields.items() if name in fieldset.fields}
+        return fields
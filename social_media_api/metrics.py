@@ -0,0 +1,247 @@
+"""
+Per-endpoint request instrumentation exposed in the Prometheus text format.
+
+MetricsMiddleware wraps every request with a database execute wrapper and records,
+per view action (e.g. `PostViewSet.list`), the request latency, the number of SQL
+queries and the time spent in them, the time the renderer took to encode the response
+data and the response size. Serializers build that data inside the view, so their time
+counts towards the request latency but not towards rendering. Everything lives in
+process memory as cumulative histograms, which Prometheus turns into rolling windows
+with rate()/histogram_quantile(); with several worker processes every worker has to
+be scraped.
+"""
+import bisect
+import threading
+import time
+from contextlib import ExitStack
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.db import connections
+from django.http import HttpResponse
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+DURATION_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+QUERY_BUCKETS = (0, 1, 2, 3, 5, 8, 13, 21, 34, 55, 89, 144)
+SIZE_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304)
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels(names, values, extra=()):
+    pairs = [*zip(names, values), *extra]
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape(value)}"' for name, value in pairs) + "}"
+
+
+def _number(value):
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Counter:
+    def __init__(self, name, documentation, labelnames):
+        self.name, self.documentation, self.labelnames = name, documentation, tuple(labelnames)
+        self.lock = threading.Lock()
+        self.values = {}
+
+    def inc(self, *labels, amount=1):
+        with self.lock:
+            self.values[labels] = self.values.get(labels, 0) + amount
+
+    def clear(self):
+        with self.lock:
+            self.values.clear()
+
+    def expose(self):
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} counter"]
+        with self.lock:
+            values = sorted(self.values.items())
+        for labels, value in values:
+            lines.append(f"{self.name}{_labels(self.labelnames, labels)} {_number(value)}")
+        return lines
+
+
+class Histogram:
+    def __init__(self, name, documentation, labelnames, buckets):
+        self.name, self.documentation, self.labelnames = name, documentation, tuple(labelnames)
+        self.buckets = tuple(buckets)
+        self.lock = threading.Lock()
+        # labels -> [count per bucket (+Inf last), sum]
+        self.values = {}
+
+    def observe(self, value, *labels):
+        index = bisect.bisect_left(self.buckets, value)
+        with self.lock:
+            series = self.values.get(labels)
+            if series is None:
+                series = self.values[labels] = [[0] * (len(self.buckets) + 1), 0]
+            series[0][index] += 1
+            series[1] += value
+
+    def clear(self):
+        with self.lock:
+            self.values.clear()
+
+    def expose(self):
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} histogram"]
+        with self.lock:
+            values = sorted((labels, (list(counts), total)) for labels, (counts, total) in self.values.items())
+        for labels, (counts, total) in values:
+            cumulative = 0
+            for bound, count in zip((*self.buckets, float("inf")), counts):
+                cumulative += count
+                bucket_labels = _labels(self.labelnames, labels, [("le", _number(bound))])
+                lines.append(f"{self.name}_bucket{bucket_labels} {cumulative}")
+            lines.append(f"{self.name}_sum{_labels(self.labelnames, labels)} {_number(total)}")
+            lines.append(f"{self.name}_count{_labels(self.labelnames, labels)} {cumulative}")
+        return lines
+
+
+class Registry:
+    def __init__(self):
+        self.metrics = []
+
+    def register(self, metric):
+        self.metrics.append(metric)
+        return metric
+
+    def clear(self):
+        for metric in self.metrics:
+            metric.clear()
+
+    def expose(self):
+        return "\n".join(line for metric in self.metrics for line in metric.expose()) + "\n"
+
+
+registry = Registry()
+
+REQUESTS = registry.register(Counter(
+    "http_requests_total", "Requests by view action, method and status.", ["endpoint", "method", "status"]
+))
+REQUEST_SECONDS = registry.register(Histogram(
+    "http_request_duration_seconds", "Time spent handling the request.", ["endpoint"], DURATION_BUCKETS
+))
+DB_QUERIES = registry.register(Histogram(
+    "http_request_db_queries", "SQL queries executed per request.", ["endpoint"], QUERY_BUCKETS
+))
+DB_SECONDS = registry.register(Histogram(
+    "http_request_db_duration_seconds", "Time spent in SQL queries per request.", ["endpoint"], DURATION_BUCKETS
+))
+RENDER_SECONDS = registry.register(Histogram(
+    "http_response_render_seconds",
+    "Time spent by the renderer encoding the response data, serializers excluded.",
+    ["endpoint"],
+    DURATION_BUCKETS,
+))
+RESPONSE_BYTES = registry.register(Histogram(
+    "http_response_size_bytes", "Size of the response body.", ["endpoint"], SIZE_BUCKETS
+))
+
+
+def endpoint_label(request):
+    """`ViewSet.action` for DRF viewsets, the view class or function name otherwise"""
+    match = getattr(request, "resolver_match", None)
+    if match is None:
+        return "unmatched"
+
+    view = getattr(match.func, "cls", None) or getattr(match.func, "view_class", None)
+    if view is None:
+        return f"{match.func.__module__}.{match.func.__name__}"
+
+    actions = getattr(match.func, "actions", None)
+    if actions:
+        return f"{view.__name__}.{actions.get(request.method.lower(), request.method.lower())}"
+    return view.__name__
+
+
+class QueryRecorder:
+    def __init__(self):
+        self.queries = 0
+        self.seconds = 0.0
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.seconds += time.perf_counter() - start
+            self.queries += 1
+
+
+class MetricsMiddleware:
+    """
+    Records per-endpoint latency, SQL and response metrics.
+
+    Queries run while a streaming response is iterated, after this middleware has
+    returned, are not counted, and streamed bodies are not measured.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+
+        recorder = QueryRecorder()
+        start = time.perf_counter()
+        with ExitStack() as stack:
+            self.record_queries(stack, recorder)
+            response = self.get_response(request)
+        self.observe(request, response, recorder, time.perf_counter() - start)
+        return response
+
+    async def __acall__(self, request):
+        # under ASGI the queries of a request run in its thread for sync code, record them there
+        recorder = QueryRecorder()
+        start = time.perf_counter()
+        stack = ExitStack()
+        await sync_to_async(self.record_queries)(stack, recorder)
+        try:
+            response = await self.get_response(request)
+        finally:
+            await sync_to_async(stack.close)()
+        self.observe(request, response, recorder, time.perf_counter() - start)
+        return response
+
+    @staticmethod
+    def record_queries(stack, recorder):
+        for connection in connections.all():
+            stack.enter_context(connection.execute_wrapper(recorder))
+
+    @staticmethod
+    def observe(request, response, recorder, duration):
+        endpoint = endpoint_label(request)
+        REQUESTS.inc(endpoint, request.method, str(response.status_code))
+        REQUEST_SECONDS.observe(duration, endpoint)
+        DB_QUERIES.observe(recorder.queries, endpoint)
+        DB_SECONDS.observe(recorder.seconds, endpoint)
+        render_seconds = getattr(request, "_metrics_render_seconds", None)
+        if render_seconds is not None:
+            RENDER_SECONDS.observe(render_seconds, endpoint)
+        if not response.streaming:
+            RESPONSE_BYTES.observe(len(response.content), endpoint)
+
+    def process_template_response(self, request, response):
+        # DRF responses are rendered right after this hook, time it through a post-render callback
+        start = time.perf_counter()
+
+        def rendered(response):
+            request._metrics_render_seconds = time.perf_counter() - start
+
+        response.add_post_render_callback(rendered)
+        return response
+
+
+def metrics_view(request):
+    return HttpResponse(registry.expose(), content_type=CONTENT_TYPE)
@@ -52,16 +52,27 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'social_media_api.metrics.MetricsMiddleware',
     'django.middleware.security.SecurityMiddleware',
     "debug_toolbar.middleware.DebugToolbarMiddleware",
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'social_media_api.db_router.ReplicaRoutingMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
 
+# Serve the async variants of the read-heavy viewset actions (social_media_api.asynchronous),
+# switched on by the ASGI entry point. The debug toolbar middleware is sync only and would
+# hold a thread for every request, so it is left out there
+ASYNC_VIEWS = os.getenv('ASYNC_VIEWS', '').lower() in ('1', 'true', 'yes')
+
+if ASYNC_VIEWS:
+    MIDDLEWARE.remove("debug_toolbar.middleware.DebugToolbarMiddleware")
+    SILENCED_SYSTEM_CHECKS = ['debug_toolbar.W001']
+
 ROOT_URLCONF = 'social_media_api.urls'
 
 TEMPLATES = [
@@ -93,6 +104,69 @@ DATABASES = {
     }
 }
 
+# DB_PROFILE=production keeps connections open between requests and tunes SQLite for
+# concurrent writers: WAL journaling so readers and the writer do not block each other,
+# BEGIN IMMEDIATE so a transaction takes the write lock up front instead of failing
+# with "database is locked" when it upgrades, and a busy timeout to wait for the lock.
+# Write-heavy views also queue behind social_media_api.database.serialized_write.
+SQLITE_PRODUCTION_OPTIONS = {
+    'timeout': 20,
+    'transaction_mode': 'IMMEDIATE',
+    'init_command': (
+        'PRAGMA journal_mode=WAL;'
+        'PRAGMA synchronous=NORMAL;'
+        'PRAGMA cache_size=-65536;'
+        'PRAGMA temp_store=MEMORY;'
+        'PRAGMA mmap_size=268435456;'
+    ),
+}
+
+DB_PROFILE = os.getenv('DB_PROFILE', 'development')
+if DB_PROFILE == 'production':
+    DATABASES['default'].update({
+        'CONN_MAX_AGE': int(os.getenv('DB_CONN_MAX_AGE', 600)),
+        'CONN_HEALTH_CHECKS': True,
+        'OPTIONS': SQLITE_PRODUCTION_OPTIONS,
+    })
+
+DATABASE_WRITE_RETRIES = 3
+DATABASE_WRITE_RETRY_DELAY = 0.05
+
+# Read replicas: a comma-separated list of database names (SQLite files here) kept in
+# sync with the primary. social_media_api.db_router sends the reads of safe requests to
+# the endpoints in DATABASE_REPLICA_VIEWS there, except for users who wrote in the last
+# DATABASE_PRIMARY_PIN_SECONDS. Tests read the replicas through the test primary.
+DATABASE_REPLICAS = []
+for number, name in enumerate(filter(None, os.getenv('DATABASE_REPLICAS', '').split(',')), start=1):
+    DATABASES[f'replica_{number}'] = {**DATABASES['default'], 'NAME': name.strip(), 'TEST': {'MIRROR': 'default'}}
+    DATABASE_REPLICAS.append(f'replica_{number}')
+
+DATABASE_ROUTERS = ['social_media_api.db_router.ReplicaRouter']
+DATABASE_REPLICA_VIEWS = [
+    'PostViewSet.list',
+    'PostViewSet.retrieve',
+    'UserViewSet.list',
+    'UserViewSet.followers',
+    'UserViewSet.following',
+]
+DATABASE_PRIMARY_PIN_SECONDS = 5
+DATABASE_PIN_CACHE_ALIAS = 'default'
+
+# Cache
+# https://docs.djangoproject.com/en/5.1/topics/cache/
+
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    }
+}
+
+if os.getenv('REDIS_CACHE_URL'):
+    CACHES['default'] = {
+        'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+        'LOCATION': os.getenv('REDIS_CACHE_URL'),
+    }
+
 # Password validation
 # https://docs.djangoproject.com/en/5.1/ref/settings/#auth-password-validators
 
@@ -139,12 +213,25 @@ DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': (
-        'rest_framework_simplejwt.authentication.JWTAuthentication',
+        'user.authentication.CachedJWTAuthentication',
     ),
     'DATETIME_FORMAT': '%d.%m.%Y %H:%M:%S',
     'DEFAULT_SCHEMA_CLASS': 'drf_spectacular.openapi.AutoSchema',
 }
 
+SIMPLE_JWT = {
+    'TOKEN_REFRESH_SERIALIZER': 'user.serializers.TokenRefreshSerializer',
+    'TOKEN_VERIFY_SERIALIZER': 'user.serializers.TokenVerifySerializer',
+    'TOKEN_BLACKLIST_SERIALIZER': 'user.serializers.TokenBlacklistSerializer',
+}
+
+# Bloom filter in front of the token blacklist (user.blacklist), sized for the larger of
+# the capacity and twice the current blacklist at the given false-positive rate. It needs
+# a cache shared between processes; without one every check reads the blacklist table
+TOKEN_BLACKLIST_BLOOM_CAPACITY = 100_000
+TOKEN_BLACKLIST_BLOOM_ERROR_RATE = 0.001
+TOKEN_BLACKLIST_CACHE_ALIAS = 'default' if os.getenv('REDIS_CACHE_URL') else None
+
 SPECTACULAR_SETTINGS = {
     'TITLE': 'Social media API',
     'DESCRIPTION': 'API for managing social media posts and user interactions with it',
@@ -162,4 +249,76 @@ CELERY_RESULT_BACKEND = "redis://localhost:6379"
 CELERY_TIMEZONE = "Europe/Kyiv"
 CELERY_TASK_TRACK_STARTED = True
 CELERY_TASK_TIME_LIMIT = 30 * 60
+CELERY_BEAT_SCHEDULE = {
+    # scheduled posts are published by an ETA task, this only catches up on missed ones
+    "publish-scheduled-posts": {
+        "task": "social.tasks.publish_scheduled_posts",
+        "schedule": 5 * 60,
+    },
+    # a no-op unless LIKES_WRITE_BEHIND is on
+    "flush-like-buffer": {
+        "task": "social.tasks.flush_like_buffer",
+        "schedule": 10,
+    },
+    "trim-timelines": {
+        "task": "social.tasks.trim_timelines",
+        "schedule": 60 * 60,
+    },
+    "refresh-trending": {
+        "task": "social.tasks.refresh_trending",
+        "schedule": 60,
+    },
+    "compute-follow-recommendations": {
+        "task": "user.tasks.compute_follow_recommendations",
+        "schedule": 6 * 60 * 60,
+    },
+}
+
+# Cached post feeds (social.cache): every page on publish, edit and delete, the pages
+# showing a post on its likes and comments
+POST_FEED_CACHE_ALIAS = 'default'
+POST_FEED_CACHE_TIMEOUT = 60
+
+# Authenticated users cached by user.authentication.CachedJWTAuthentication: in process
+# for AUTH_USER_CACHE_TTL seconds, and shared between processes when a cache alias is set
+AUTH_USER_CACHE_TTL = 30
+AUTH_USER_CACHE_SIZE = 10_000
+AUTH_USER_CACHE_ALIAS = 'default' if os.getenv('REDIS_CACHE_URL') else None
+AUTH_USER_CACHE_SHARED_TTL = 10 * 60
+
+# Write-behind likes: like/unlike taps are buffered and written in bulk by
+# social.tasks.flush_like_buffer, in Redis when LIKE_BUFFER_REDIS_URL is set and in
+# process memory otherwise (single-process deployments only)
+LIKES_WRITE_BEHIND = os.getenv('LIKES_WRITE_BEHIND', '').lower() in ('1', 'true', 'yes')
+LIKE_BUFFER_REDIS_URL = os.getenv('LIKE_BUFFER_REDIS_URL')
+
+# Home timeline: the newest posts kept per user, about how many fanned out posts a
+# timeline may grow by before it is trimmed, and the audience size above which an
+# author's posts are merged in on read instead of being fanned out on publish
+TIMELINE_MAX_LENGTH = 800
+TIMELINE_TRIM_INTERVAL = 50
+TIMELINE_FANOUT_FOLLOWER_LIMIT = 10_000
+
+# Ranked home timeline (?ranking=score), see social.ranking: a post one half-life
+# older needs twice the likes to rank level, a comment counts as
+# FEED_RANKING_COMMENT_WEIGHT likes, and the reader's likes of the author add
+# FEED_RANKING_AFFINITY_WEIGHT per doubling
+FEED_RANKING_HALF_LIFE = 6 * 60 * 60
+FEED_RANKING_COMMENT_WEIGHT = 2
+FEED_RANKING_AFFINITY_WEIGHT = 1.0
+
+# Trending posts and tags: activity is counted per TRENDING_BUCKET_SECONDS bucket,
+# buckets older than TRENDING_WINDOW are dropped and the rest lose half their weight
+# every TRENDING_HALF_LIFE seconds; social.tasks.refresh_trending keeps the top TRENDING_SIZE
+TRENDING_BUCKET_SECONDS = 5 * 60
+TRENDING_WINDOW = 24 * 60 * 60
+TRENDING_HALF_LIFE = 2 * 60 * 60
+TRENDING_SIZE = 100
+TRENDING_WEIGHTS = {
+    "like": 1.0,
+    "comment": 3.0,
+    "publication": 5.0,
+}
 
+# "Who to follow": suggestions kept per user by user.tasks.compute_follow_recommendations
+FOLLOW_RECOMMENDATIONS_PER_USER = 50
@@ -0,0 +1,99 @@
+from itertools import islice
+
+from django.http import StreamingHttpResponse
+from drf_spectacular.types import OpenApiTypes
+from drf_spectacular.utils import OpenApiParameter
+from rest_framework.settings import api_settings
+from rest_framework.utils.encoders import JSONEncoder
+
+STREAM_QUERY_PARAM = "stream"
+STREAM_CHUNK_SIZE = 500
+STREAM_BUFFER_SIZE = 64 * 1024
+
+TRUE_VALUES = {"1", "true", "yes", "on"}
+
+STREAM_PARAMETER = OpenApiParameter(
+    STREAM_QUERY_PARAM,
+    type=OpenApiTypes.BOOL,
+    description="Stream the complete, unpaginated result as a JSON array instead of a page (e.g., ?stream=true)."
+)
+
+
+def wants_stream(request):
+    return request.query_params.get(STREAM_QUERY_PARAM, "").lower() in TRUE_VALUES
+
+
+def _encoder():
+    # same output as rest_framework.renderers.JSONRenderer, so both modes return identical bytes
+    return JSONEncoder(
+        ensure_ascii=not api_settings.UNICODE_JSON,
+        allow_nan=not api_settings.STRICT_JSON,
+        separators=(",", ":") if api_settings.COMPACT_JSON else (", ", ": "),
+    )
+
+
+def _buffered(parts):
+    buffer, size = [], 0
+    for part in parts:
+        buffer.append(part)
+        size += len(part)
+        if size >= STREAM_BUFFER_SIZE:
+            yield "".join(buffer).encode("utf-8")
+            buffer, size = [], 0
+    if buffer:
+        yield "".join(buffer).encode("utf-8")
+
+
+def _array_parts(encoder, items, serialize):
+    yield "["
+    for index, item in enumerate(items):
+        if index:
+            yield ","
+        yield encoder.encode(serialize(item))
+    yield "]"
+
+
+def json_array_chunks(items, serialize):
+    """encode `items` one at a time as a JSON array, yielding utf-8 chunks"""
+    return _buffered(_array_parts(_encoder(), items, serialize))
+
+
+def json_object_chunks(fields, key, items, serialize):
+    """encode `fields` plus `key` holding `items` streamed as a JSON array"""
+    encoder = _encoder()
+
+    def parts():
+        head = encoder.encode(fields)
+        yield head[:-1]
+        yield "," if fields else ""
+        yield encoder.encode(key)
+        yield ":"
+        yield from _array_parts(encoder, items, serialize)
+        yield "}"
+
+    return _buffered(parts())
+
+
+def iterate(queryset, chunk_size=STREAM_CHUNK_SIZE, prepare=None):
+    """`queryset` row by row, passing every chunk of `chunk_size` rows through `prepare` first"""
+    rows = queryset.iterator(chunk_size=chunk_size)
+    if prepare is None:
+        return rows
+    return (row for chunk in iter(lambda: list(islice(rows, chunk_size)), []) for row in prepare(chunk))
+
+
+def streaming_list_response(queryset, serializer, chunk_size=STREAM_CHUNK_SIZE, prepare=None):
+    """
+    Stream `queryset` as a JSON array, serializing one row at a time.
+
+    Rows are fetched `chunk_size` at a time (prefetches included), so the worker
+    only ever holds one chunk of model instances and one output buffer. `prepare`
+    gets each chunk as a list before it is serialized, like a page before its
+    serializer, and returns the rows to serialize.
+    """
+    chunks = json_array_chunks(iterate(queryset, chunk_size, prepare), serializer.to_representation)
+    return StreamingHttpResponse(chunks, content_type="application/json")
+
+
+def streaming_object_response(fields, key, items, serialize=lambda item: item):
+    return StreamingHttpResponse(json_object_chunks(fields, key, items, serialize), content_type="application/json")
@@ -0,0 +1,13 @@
+"""
+Settings for the test suite: the project settings plus a separate, unmirrored "replica"
+test database, so that social.tests.test_db_router can tell which database a read went to.
+
+    python manage.py test --settings=social_media_api.test_settings
+"""
+from social_media_api.settings import *  # noqa: F401,F403
+from social_media_api.settings import BASE_DIR, DATABASES
+
+DATABASES = {
+    **DATABASES,
+    'replica': {**DATABASES['default'], 'NAME': BASE_DIR / 'db_replica.sqlite3', 'TEST': {}},
+}
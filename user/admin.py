@@ -2,7 +2,7 @@ from django.contrib import admin
 from django.contrib.auth.admin import UserAdmin as DjangoUserAdmin
 from django.utils.translation import gettext as _
 
-from .models import User, Follow
+from .models import User, Follow, FollowRecommendation
 
 
 @admin.register(User)
@@ -10,6 +10,7 @@ class UserAdmin(DjangoUserAdmin):
     fieldsets = (
         (None, {"fields": ("email", "username", "password")}),
         (_("Personal info"), {"fields": ("first_name", "last_name", "image", "city", "country", "birth_date", "bio")}),
+        (_("Network"), {"fields": ("followers_count", "following_count")}),
         (
             _("Permissions"),
             {
@@ -33,8 +34,16 @@ class UserAdmin(DjangoUserAdmin):
             },
         ),
     )
-    list_display = ("email", "username", "first_name", "last_name", "is_staff")
+    list_display = ("email", "username", "first_name", "last_name", "is_staff", "followers_count", "following_count")
+    readonly_fields = ("followers_count", "following_count")
     search_fields = ("email", "username", "first_name", "last_name")
     ordering = ("email",)
 
 admin.site.register(Follow)
+
+
+@admin.register(FollowRecommendation)
+class FollowRecommendationAdmin(admin.ModelAdmin):
+    list_display = ("user", "rank", "recommended", "score", "mutual_follows")
+    list_select_related = ("user", "recommended")
+    raw_id_fields = ("user", "recommended")
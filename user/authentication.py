@@ -0,0 +1,103 @@
+import copy
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+from django.core.cache import caches
+from django.utils.translation import gettext_lazy as _
+from drf_spectacular.contrib.rest_framework_simplejwt import SimpleJWTScheme
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import AuthenticationFailed
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.utils import get_md5_hash_password
+
+CACHE_KEY = "auth:user:{}"
+
+_lock = threading.Lock()
+_local = OrderedDict()
+
+
+def _shared_cache():
+    alias = settings.AUTH_USER_CACHE_ALIAS
+    return caches[alias] if alias else None
+
+
+def _remember(user_id, user):
+    with _lock:
+        _local[user_id] = (time.monotonic() + settings.AUTH_USER_CACHE_TTL, user)
+        _local.move_to_end(user_id)
+        while len(_local) > settings.AUTH_USER_CACHE_SIZE:
+            _local.popitem(last=False)
+
+
+def get_cached_user(user_id):
+    """a private copy of the cached user, or None"""
+    user_id = str(user_id)
+    with _lock:
+        entry = _local.get(user_id)
+        if entry is not None:
+            if entry[0] > time.monotonic():
+                _local.move_to_end(user_id)
+                return copy.copy(entry[1])
+            del _local[user_id]
+
+    shared = _shared_cache()
+    user = shared.get(CACHE_KEY.format(user_id)) if shared is not None else None
+    if user is None:
+        return None
+    _remember(user_id, user)
+    return copy.copy(user)
+
+
+def cache_user(user_id, user):
+    user_id = str(user_id)
+    _remember(user_id, user)
+    shared = _shared_cache()
+    if shared is not None:
+        shared.set(CACHE_KEY.format(user_id), user, settings.AUTH_USER_CACHE_SHARED_TTL)
+
+
+def invalidate_user(user):
+    user_id = str(getattr(user, api_settings.USER_ID_FIELD))
+    with _lock:
+        _local.pop(user_id, None)
+    shared = _shared_cache()
+    if shared is not None:
+        shared.delete(CACHE_KEY.format(user_id))
+
+
+def clear():
+    with _lock:
+        _local.clear()
+
+
+class CachedJWTAuthentication(JWTAuthentication):
+    """
+    JWTAuthentication that builds request.user from a cache instead of a SELECT per request.
+
+    Users are kept in a per-process TTL LRU and, with AUTH_USER_CACHE_ALIAS set, in a cache
+    shared between processes. Saving or deleting a user drops it from both; other processes
+    still hold their local copy for at most AUTH_USER_CACHE_TTL seconds.
+    """
+
+    def get_user(self, validated_token):
+        user_id = validated_token.get(api_settings.USER_ID_CLAIM)
+        user = get_cached_user(user_id) if user_id is not None else None
+        if user is None:
+            user = super().get_user(validated_token)
+            cache_user(user_id, user)
+            return copy.copy(user)
+
+        if not user.is_active:
+            raise AuthenticationFailed(_("User is inactive"), code="user_inactive")
+
+        if api_settings.CHECK_REVOKE_TOKEN:
+            if validated_token.get(api_settings.REVOKE_TOKEN_CLAIM) != get_md5_hash_password(user.password):
+                raise AuthenticationFailed(_("The user's password has been changed."), code="password_changed")
+
+        return user
+
+
+class CachedJWTScheme(SimpleJWTScheme):
+    target_class = "user.authentication.CachedJWTAuthentication"
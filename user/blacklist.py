@@ -0,0 +1,160 @@
+"""
+In-memory Bloom filter in front of the simplejwt token blacklist.
+
+Every refresh, verify and logout asks whether the token's JTI is blacklisted. The
+filter answers "no" without touching the database for all but a configured fraction
+of tokens; only possible members are confirmed against BlacklistedToken.
+
+Each process builds its filter on first use and then adds new blacklist rows by id.
+A generation counter in the shared cache tells other processes when to pick them up,
+so the filter is only used with a cache shared between processes
+(TOKEN_BLACKLIST_CACHE_ALIAS); without one every check reads the table, since a
+process could not learn of tokens another one blacklisted.
+"""
+import hashlib
+import math
+import threading
+import time
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import transaction
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.token_blacklist.models import BlacklistedToken
+
+GENERATION_KEY = "auth:blacklist:generation"
+SYNC_BATCH_SIZE = 10_000
+# ids below the last one seen that every sync reads again: rows of transactions that
+# committed out of id order must never be missing from the filter
+SYNC_SAFETY_WINDOW = 1_000
+# also rebuilt from scratch periodically, so rows removed from the table (flushexpiredtokens) leave it
+REBUILD_INTERVAL = 60 * 60
+
+
+class BloomFilter:
+    def __init__(self, capacity, error_rate):
+        self.capacity = max(capacity, 1)
+        self.error_rate = error_rate
+        # optimal size and number of hashes for `capacity` items at `error_rate`
+        self.size = max(8, math.ceil(-self.capacity * math.log(error_rate) / math.log(2) ** 2))
+        self.hash_count = max(1, round(self.size / self.capacity * math.log(2)))
+        self.bits = bytearray((self.size + 7) // 8)
+        self.count = 0
+
+    def _positions(self, item):
+        # Kirsch-Mitzenmacher double hashing: k positions out of one 128-bit digest
+        digest = hashlib.blake2b(item.encode(), digest_size=16).digest()
+        first, second = int.from_bytes(digest[:8], "little"), int.from_bytes(digest[8:], "little") | 1
+        return ((first + index * second) % self.size for index in range(self.hash_count))
+
+    def add(self, item):
+        added = False
+        for position in self._positions(item):
+            mask = 1 << (position & 7)
+            added |= not self.bits[position >> 3] & mask
+            self.bits[position >> 3] |= mask
+        # items read again by the safety window do not fill the filter
+        self.count += added
+
+    def __contains__(self, item):
+        return all(self.bits[position >> 3] & (1 << (position & 7)) for position in self._positions(item))
+
+    def is_full(self):
+        return self.count > self.capacity
+
+
+class TokenBlacklistFilter:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.bloom = None
+        self.last_id = 0
+        self.generation = None
+        self.built_at = 0
+
+    @staticmethod
+    def is_enabled():
+        return settings.TOKEN_BLACKLIST_CACHE_ALIAS is not None
+
+    def _cache(self):
+        return caches[settings.TOKEN_BLACKLIST_CACHE_ALIAS]
+
+    def _shared_generation(self):
+        cache = self._cache()
+        generation = cache.get(GENERATION_KEY)
+        if generation is None:
+            cache.add(GENERATION_KEY, time.time_ns(), timeout=None)
+            generation = cache.get(GENERATION_KEY)
+        return generation
+
+    def _load(self, after_id):
+        rows = BlacklistedToken.objects.order_by("pk").values_list("pk", "token__jti")
+        while True:
+            batch = list(rows.filter(pk__gt=after_id)[:SYNC_BATCH_SIZE])
+            yield from batch
+            if len(batch) < SYNC_BATCH_SIZE:
+                return
+            after_id = batch[-1][0]
+
+    def rebuild(self):
+        """build a fresh filter from the whole table, sized for twice its current size"""
+        with self.lock:
+            generation = self._shared_generation()
+            capacity = max(settings.TOKEN_BLACKLIST_BLOOM_CAPACITY, 2 * BlacklistedToken.objects.count())
+            bloom = BloomFilter(capacity, settings.TOKEN_BLACKLIST_BLOOM_ERROR_RATE)
+            last_id = 0
+            for pk, jti in self._load(0):
+                bloom.add(jti)
+                last_id = pk
+            self.bloom, self.last_id, self.generation = bloom, last_id, generation
+            self.built_at = time.monotonic()
+
+    def sync(self):
+        """add rows blacklisted since the last sync, by this or any other process"""
+        if not self.is_enabled():
+            return
+        if self.bloom is None or self.bloom.is_full() or time.monotonic() - self.built_at > REBUILD_INTERVAL:
+            return self.rebuild()
+
+        generation = self._shared_generation()
+        if generation == self.generation:
+            return
+        with self.lock:
+            for pk, jti in self._load(max(self.last_id - SYNC_SAFETY_WINDOW, 0)):
+                self.bloom.add(jti)
+                self.last_id = max(self.last_id, pk)
+            self.generation = generation
+
+    def might_contain(self, jti):
+        self.sync()
+        return jti in self.bloom
+
+    def is_blacklisted(self, jti):
+        if self.is_enabled() and not self.might_contain(jti):
+            return False
+        return BlacklistedToken.objects.filter(token__jti=jti).exists()
+
+    def _bump(self):
+        try:
+            self._cache().incr(GENERATION_KEY)
+        except ValueError:
+            self._cache().add(GENERATION_KEY, time.time_ns(), timeout=None)
+
+    def added(self, jti):
+        """a token was blacklisted: add it here and make every other process sync once it is committed"""
+        if not self.is_enabled():
+            return
+        if self.bloom is not None:
+            self.bloom.add(jti)
+        transaction.on_commit(self._bump)
+
+    def reset(self):
+        with self.lock:
+            self.bloom, self.last_id, self.generation = None, 0, None
+
+
+blacklist_filter = TokenBlacklistFilter()
+
+
+def is_blacklisted(token):
+    jti = token.get(api_settings.JTI_CLAIM)
+    return jti is not None and blacklist_filter.is_blacklisted(jti)
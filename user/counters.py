@@ -0,0 +1,49 @@
+from django.db.models import Count, F, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+from user.models import Follow, User
+
+RECONCILE_BATCH_SIZE = 1000
+
+
+def _count_subquery(field):
+    return Coalesce(Subquery(
+        Follow.objects.filter(**{field: OuterRef("pk")}).order_by().values(field).annotate(
+            total=Count("pk")
+        ).values("total")
+    ), 0)
+
+
+def drifted_users(user_ids=None):
+    """users whose stored followers/following counters disagree with the Follow table"""
+    queryset = User.objects.all()
+    if user_ids is not None:
+        queryset = queryset.filter(pk__in=user_ids)
+
+    return queryset.annotate(
+        actual_followers=_count_subquery("following"),
+        actual_following=_count_subquery("follower"),
+    ).exclude(
+        followers_count=F("actual_followers"),
+        following_count=F("actual_following"),
+    )
+
+
+def reconcile_follow_counters(user_ids=None, dry_run=False):
+    """recount followers_count and following_count, returns the number of users that were off"""
+    repaired = 0
+    batch = []
+    rows = drifted_users(user_ids).values_list("pk", "actual_followers", "actual_following")
+    for pk, followers, following in list(rows):
+        batch.append(User(pk=pk, followers_count=followers, following_count=following))
+        if len(batch) >= RECONCILE_BATCH_SIZE:
+            repaired += _save(batch, dry_run)
+            batch = []
+    repaired += _save(batch, dry_run)
+    return repaired
+
+
+def _save(batch, dry_run):
+    if batch and not dry_run:
+        User.objects.bulk_update(batch, ["followers_count", "following_count"])
+    return len(batch)
@@ -0,0 +1,18 @@
+from django.core.management.base import BaseCommand
+
+from user.counters import reconcile_follow_counters
+
+
+class Command(BaseCommand):
+    help = "Recount User.followers_count and User.following_count from the Follow table"
+
+    def add_arguments(self, parser):
+        parser.add_argument("user_ids", nargs="*", type=int, help="only check these users")
+        parser.add_argument("--dry-run", action="store_true", help="report drifted users without fixing them")
+
+    def handle(self, *args, **options):
+        repaired = reconcile_follow_counters(options["user_ids"] or None, dry_run=options["dry_run"])
+        if options["dry_run"]:
+            self.stdout.write(f"{repaired} user(s) have drifted counters")
+        else:
+            self.stdout.write(self.style.SUCCESS(f"{repaired} user(s) repaired"))
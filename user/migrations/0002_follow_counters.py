@@ -0,0 +1,40 @@
+# Generated by Django 5.1.2 on 2026-10-18 03:46
+
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+
+def populate_counters(apps, schema_editor):
+    User = apps.get_model("user", "User")
+    Follow = apps.get_model("user", "Follow")
+
+    def count(field):
+        return Coalesce(Subquery(
+            Follow.objects.filter(**{field: OuterRef("pk")}).order_by().values(field).annotate(
+                total=Count("pk")
+            ).values("total")
+        ), 0)
+
+    User.objects.update(followers_count=count("following"), following_count=count("follower"))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('user', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='user',
+            name='followers_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='user',
+            name='following_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.RunPython(populate_counters, migrations.RunPython.noop),
+    ]
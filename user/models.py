@@ -46,6 +46,8 @@ class User(AbstractUser):
     country = models.CharField(max_length=60, blank=True)
     birth_date = models.DateField(null=True, blank=True)
     bio = models.TextField(max_length=500, blank=True)
+    followers_count = models.PositiveIntegerField(default=0)
+    following_count = models.PositiveIntegerField(default=0)
     USERNAME_FIELD = "email"
     REQUIRED_FIELDS = ["username"]
 
@@ -59,3 +61,18 @@ class Follow(models.Model):
 
     class Meta:
         unique_together = (("follower", "following"),)
+
+
+class FollowRecommendation(models.Model):
+    """precomputed "who to follow" suggestions, rewritten by user.tasks.compute_follow_recommendations"""
+    user = models.ForeignKey(User, related_name="follow_recommendations", on_delete=models.CASCADE)
+    recommended = models.ForeignKey(User, related_name="+", on_delete=models.CASCADE)
+    rank = models.PositiveSmallIntegerField()
+    score = models.FloatField()
+    mutual_follows = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        unique_together = (("user", "recommended"),)
+        indexes = [
+            models.Index(fields=["user", "rank"], name="follow_rec_user_rank_idx"),
+        ]
@@ -0,0 +1,178 @@
+"""
+Batch "who to follow" recommendations over the Follow graph.
+
+The graph is loaded once into CSR arrays (followings and followers of every user)
+and candidates are scored for blocks of users at a time with vectorized NumPy:
+
+* friends of friends: every path user -> followed -> candidate counts one mutual follow;
+* co-follow similarity: accounts whose audience overlaps (cosine over follower sets)
+  with the accounts the user already follows.
+
+Adjacency lists are capped per node, so celebrity accounts with huge follower or
+following lists cost a bounded amount of work. Blocks are sized by the candidate
+pairs they expand to rather than by users alone: a block holds at most PAIR_BUDGET
+pairs (plus one user's worth), each carried through about a dozen int64/float64
+arrays, which bounds peak memory to a few hundred MB however dense the graph is.
+"""
+import itertools
+
+import numpy as np
+from django.conf import settings
+from django.db import transaction
+
+from user.models import Follow, FollowRecommendation
+
+BLOCK_SIZE = 2_000
+PAIR_BUDGET = 2_000_000
+NEIGHBOUR_CAP = 200
+SIMILAR_ACCOUNTS = 50
+COFOLLOW_WEIGHT = 2.0
+WRITE_BATCH_SIZE = 5_000
+
+
+class CSR:
+    """row -> sorted neighbour columns (and optional weights) as two flat arrays"""
+
+    def __init__(self, rows, cols, size, data=None):
+        order = np.lexsort((cols, rows))
+        self.indices = cols[order]
+        self.data = data[order] if data is not None else None
+        self.indptr = np.zeros(size + 1, dtype=np.int64)
+        np.cumsum(np.bincount(rows, minlength=size), out=self.indptr[1:])
+        self.degree = np.diff(self.indptr)
+
+    def expand(self, nodes, cap=NEIGHBOUR_CAP):
+        """
+        neighbours of every node in `nodes`, at most `cap` each.
+
+        Returns (origin, neighbour, weight): origin indexes into `nodes`, so callers can
+        carry their own per-node values along with np.take.
+        """
+        counts = np.minimum(self.degree[nodes], cap)
+        total = int(counts.sum())
+        origin = np.repeat(np.arange(len(nodes)), counts)
+        offsets = np.arange(total) - np.repeat(np.cumsum(counts) - counts, counts)
+        positions = np.repeat(self.indptr[nodes], counts) + offsets
+        weights = self.data[positions] if self.data is not None else np.ones(total)
+        return origin, self.indices[positions], weights
+
+
+def load_graph():
+    """(user ids, follower index, following index) with users renumbered 0..n-1"""
+    rows = Follow.objects.order_by().values_list("follower_id", "following_id").iterator(chunk_size=10_000)
+    edges = np.fromiter(itertools.chain.from_iterable(rows), dtype=np.int64)
+    user_ids, dense = np.unique(edges, return_inverse=True)
+    dense = dense.reshape(-1, 2)
+    return user_ids, dense[:, 0], dense[:, 1]
+
+
+def expansion_costs(first, seconds, size):
+    """candidate pairs every node expands to through `first` and then each CSR of `seconds`"""
+    origin, neighbour, _ = first.expand(np.arange(size))
+    weights = sum(np.minimum(second.degree[neighbour], NEIGHBOUR_CAP) for second in seconds)
+    return np.bincount(origin, weights=weights, minlength=size)
+
+
+def blocks(costs):
+    """consecutive runs of at most BLOCK_SIZE nodes whose costs add up to at most PAIR_BUDGET, or of one node"""
+    bounds = np.cumsum(costs)
+    start, size = 0, len(costs)
+    while start < size:
+        base = bounds[start - 1] if start else 0
+        end = int(np.searchsorted(bounds, base + PAIR_BUDGET, side="right"))
+        end = min(max(end, start + 1), start + BLOCK_SIZE, size)
+        yield np.arange(start, end)
+        start = end
+
+
+def _aggregate(groups, items, weights, size):
+    """sum `weights` per distinct (group, item) pair"""
+    keys, inverse = np.unique(groups * size + items, return_inverse=True)
+    return keys // size, keys % size, np.bincount(inverse, weights=weights)
+
+
+def top_per_group(groups, scores, items, k):
+    """positions of the `k` best scoring entries of every group, and their rank"""
+    order = np.lexsort((items, -scores, groups))
+    ordered = groups[order]
+    starts = np.flatnonzero(np.r_[True, ordered[1:] != ordered[:-1]])
+    ranks = np.arange(len(order)) - np.repeat(starts, np.diff(np.r_[starts, len(order)]))
+    keep = ranks < k
+    return order[keep], ranks[keep]
+
+
+def similar_accounts(following, followers, size):
+    """CSR of the SIMILAR_ACCOUNTS most co-followed accounts of every account, weighted by cosine"""
+    audience = np.minimum(followers.degree, NEIGHBOUR_CAP).astype(np.float64)
+    rows, cols, data = [], [], []
+    for accounts in blocks(expansion_costs(followers, [following], size)):
+        origin, follower, _ = followers.expand(accounts)
+        second, candidate, _ = following.expand(follower)
+        account = accounts[origin[second]]
+        keep = account != candidate
+        account, candidate, common = _aggregate(account[keep], candidate[keep], None, size)
+        cosine = common / np.sqrt(audience[account] * audience[candidate])
+        best, _ = top_per_group(account, cosine, candidate, SIMILAR_ACCOUNTS)
+        rows.append(account[best])
+        cols.append(candidate[best])
+        data.append(cosine[best])
+    return CSR(np.concatenate(rows), np.concatenate(cols), size, np.concatenate(data))
+
+
+def recommend(user_ids, follower, following_index, per_user):
+    """yield (user id, recommended id, rank, score, mutual follows) for every user that follows someone"""
+    size = len(user_ids)
+    following = CSR(follower, following_index, size)
+    followers = CSR(following_index, follower, size)
+    similar = similar_accounts(following, followers, size)
+    existing = np.sort(follower * size + following_index)
+
+    for users in blocks(expansion_costs(following, [following, similar], size)):
+        origin, followed, _ = following.expand(users)
+
+        hop, friend_of_friend, _ = following.expand(followed)
+        similar_origin, similar_account, similarity = similar.expand(followed)
+        user = np.concatenate([users[origin[hop]], users[origin[similar_origin]]])
+        candidate = np.concatenate([friend_of_friend, similar_account])
+        mutual = np.concatenate([np.ones(len(hop)), np.zeros(len(similar_origin))])
+        weight = np.concatenate([np.zeros(len(hop)), similarity])
+
+        keys = user * size + candidate
+        position = np.clip(np.searchsorted(existing, keys), 0, len(existing) - 1)
+        keep = (user != candidate) & (existing[position] != keys)
+        if not keep.any():
+            continue
+
+        pairs = user[keep] * size + candidate[keep]
+        keys, inverse = np.unique(pairs, return_inverse=True)
+        mutual = np.bincount(inverse, weights=mutual[keep])
+        score = mutual + COFOLLOW_WEIGHT * np.bincount(inverse, weights=weight[keep])
+        user, candidate = keys // size, keys % size
+
+        best, ranks = top_per_group(user, score, candidate, per_user)
+        yield from zip(
+            user_ids[user[best]].tolist(),
+            user_ids[candidate[best]].tolist(),
+            ranks.tolist(),
+            score[best].tolist(),
+            mutual[best].astype(np.int64).tolist(),
+        )
+
+
+def compute_follow_recommendations(per_user=None):
+    """recompute every user's recommendations and replace the stored ones, returns the rows written"""
+    per_user = per_user or settings.FOLLOW_RECOMMENDATIONS_PER_USER
+    user_ids, follower, following = load_graph()
+    # computed before the transaction: a write transaction holds the SQLite write lock,
+    # which would block every like, follow and comment for the whole computation
+    recommendations = [
+        FollowRecommendation(user_id=user, recommended_id=recommended, rank=rank, score=score, mutual_follows=mutual)
+        for user, recommended, rank, score, mutual in (
+            recommend(user_ids, follower, following, per_user) if len(user_ids) else ()
+        )
+    ]
+
+    with transaction.atomic():
+        FollowRecommendation.objects.all().delete()
+        FollowRecommendation.objects.bulk_create(recommendations, batch_size=WRITE_BATCH_SIZE)
+    return len(recommendations)
@@ -1,7 +1,18 @@
+from collections import defaultdict
+
 from django.utils import timezone
 from django.contrib.auth import get_user_model
 
 from rest_framework import serializers
+from rest_framework_simplejwt import serializers as jwt_serializers
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.tokens import UntypedToken
+
+from user import blacklist
+from social_media_api.fieldsets import DynamicFieldsMixin
+from social_media_api.rows import RowSerializer
+from user.models import Follow, FollowRecommendation
+from user.tokens import RefreshToken
 
 
 class UserCreateSerializer(serializers.ModelSerializer):
@@ -17,7 +28,25 @@ class UserCreateSerializer(serializers.ModelSerializer):
         return get_user_model().objects.create_user(**validated_data)
 
 
-class UserListSerializer(serializers.ModelSerializer):
+class FollowerSummarySerializer(serializers.ModelSerializer):
+    id = serializers.IntegerField(source="follower.id", read_only=True)
+    username = serializers.CharField(source="follower.username", read_only=True)
+
+    class Meta:
+        model = Follow
+        fields = ("id", "username")
+
+
+class FollowingSummarySerializer(serializers.ModelSerializer):
+    id = serializers.IntegerField(source="following.id", read_only=True)
+    username = serializers.CharField(source="following.username", read_only=True)
+
+    class Meta:
+        model = Follow
+        fields = ("id", "username")
+
+
+class UserListSerializer(DynamicFieldsMixin, serializers.ModelSerializer):
     followers = serializers.IntegerField(source='followers_count', read_only=True)
     following = serializers.IntegerField(source='following_count', read_only=True)
 
@@ -44,6 +73,76 @@ class UserListSerializer(serializers.ModelSerializer):
             "date_joined": {"read_only": True},
         }
 
+    # the counts become the accounts themselves
+    expandable_fields = {
+        "followers": (FollowerSummarySerializer, {"many": True, "read_only": True}),
+        "following": (FollowingSummarySerializer, {"many": True, "read_only": True}),
+    }
+
+
+class UserListRowSerializer(RowSerializer):
+    """UserListSerializer output of `.values()` rows, with one query per expanded follow list"""
+    serializer_class = UserListSerializer
+    fields = (
+        "id",
+        "email",
+        "username",
+        "first_name",
+        "last_name",
+        "image",
+        "city",
+        "country",
+        "birth_date",
+        "followers",
+        "following",
+        "bio",
+        "date_joined",
+    )
+    count_columns = {"followers": "followers_count", "following": "following_count"}
+
+    @classmethod
+    def columns(cls, fieldset):
+        return ["id", *(
+            cls.count_columns.get(name, name)
+            for name in cls.fields
+            if name != "id" and fieldset.includes(name) and not fieldset.expands(name)
+        )]
+
+    def load(self, rows):
+        ids = [row["id"] for row in rows]
+        self.followers = defaultdict(list)
+        self.following = defaultdict(list)
+        if not ids:
+            return
+
+        if self.fieldset.expands("followers"):
+            follows = Follow.objects.filter(following_id__in=ids).order_by("pk")
+            for user_id, follower_id, username in follows.values_list("following_id", "follower_id", "follower__username"):
+                self.followers[user_id].append({"id": follower_id, "username": username})
+        if self.fieldset.expands("following"):
+            follows = Follow.objects.filter(follower_id__in=ids).order_by("pk")
+            for user_id, following_id, username in follows.values_list("follower_id", "following_id", "following__username"):
+                self.following[user_id].append({"id": following_id, "username": username})
+
+    def get_image(self, row):
+        return self.file_url(row["image"])
+
+    def get_birth_date(self, row):
+        return self.date_field.to_representation(row["birth_date"])
+
+    def get_followers(self, row):
+        if self.fieldset.expands("followers"):
+            return self.followers[row["id"]]
+        return row["followers_count"]
+
+    def get_following(self, row):
+        if self.fieldset.expands("following"):
+            return self.following[row["id"]]
+        return row["following_count"]
+
+    def get_date_joined(self, row):
+        return self.datetime_field.to_representation(row["date_joined"])
+
 
 class UserDetailSerializer(serializers.ModelSerializer):
     followers = serializers.SerializerMethodField()
@@ -92,7 +191,7 @@ class UserDetailSerializer(serializers.ModelSerializer):
 
         password = validated_data.get("password")
         if password:
-            user.set_password(password)
+            instance.set_password(password)
 
         instance.username = validated_data.get("username", instance.username)
         instance.first_name = validated_data.get('first_name', instance.first_name)
@@ -128,3 +227,32 @@ class UserFollowing(serializers.ModelSerializer):
 
     def get_following(self, obj):
         return [f.following.email for f in obj.following.all()]
+
+
+class FollowRecommendationSerializer(serializers.ModelSerializer):
+    id = serializers.IntegerField(source="recommended.id", read_only=True)
+    username = serializers.CharField(source="recommended.username", read_only=True)
+    image = serializers.ImageField(source="recommended.image", read_only=True)
+    followers = serializers.IntegerField(source="recommended.followers_count", read_only=True)
+
+    class Meta:
+        model = FollowRecommendation
+        fields = ("id", "username", "image", "followers", "score", "mutual_follows")
+
+
+class TokenRefreshSerializer(jwt_serializers.TokenRefreshSerializer):
+    token_class = RefreshToken
+
+
+class TokenVerifySerializer(jwt_serializers.TokenVerifySerializer):
+    def validate(self, attrs):
+        token = UntypedToken(attrs["token"])
+
+        if api_settings.BLACKLIST_AFTER_ROTATION and blacklist.is_blacklisted(token):
+            raise serializers.ValidationError("Token is blacklisted")
+
+        return {}
+
+
+class TokenBlacklistSerializer(jwt_serializers.TokenBlacklistSerializer):
+    token_class = RefreshToken
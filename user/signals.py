@@ -0,0 +1,40 @@
+from django.db import transaction
+from django.db.models import F
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+
+from rest_framework_simplejwt.token_blacklist.models import BlacklistedToken
+
+from user import authentication, blacklist
+from user.models import Follow, User
+
+
+@receiver(post_save, sender=Follow)
+def increment_follow_counts(sender, instance, created, **kwargs):
+    if created:
+        User.objects.filter(pk=instance.follower_id).update(following_count=F("following_count") + 1)
+        User.objects.filter(pk=instance.following_id).update(followers_count=F("followers_count") + 1)
+
+
+@receiver(post_delete, sender=Follow)
+def decrement_follow_counts(sender, instance, **kwargs):
+    User.objects.filter(
+        pk=instance.follower_id, following_count__gt=0
+    ).update(following_count=F("following_count") - 1)
+    User.objects.filter(
+        pk=instance.following_id, followers_count__gt=0
+    ).update(followers_count=F("followers_count") - 1)
+
+
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def invalidate_cached_user(sender, instance, **kwargs):
+    # drop it again after commit so a request that read the old row meanwhile does not re-cache it
+    authentication.invalidate_user(instance)
+    transaction.on_commit(lambda: authentication.invalidate_user(instance))
+
+
+@receiver(post_save, sender=BlacklistedToken)
+def add_to_blacklist_filter(sender, instance, created, **kwargs):
+    if created:
+        blacklist.blacklist_filter.added(instance.token.jti)
@@ -0,0 +1,9 @@
+from celery import shared_task
+
+from user import recommendations
+
+
+@shared_task
+def compute_follow_recommendations():
+    """rebuild the "who to follow" table from the whole follow graph"""
+    return recommendations.compute_follow_recommendations()
@@ -0,0 +1,52 @@
+from asgiref.sync import async_to_sync
+from django.contrib.auth import get_user_model
+from django.test import TestCase
+
+from rest_framework import status
+from rest_framework.test import APIRequestFactory, force_authenticate
+
+from user.models import Follow
+from user.views import UserViewSet
+
+factory = APIRequestFactory()
+
+
+class AsyncUserViewTest(TestCase):
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(
+            email="test@mail.com", username="test", first_name="John", country="USA"
+        )
+        self.other = get_user_model().objects.create_user(email="other@mail.com", username="other")
+        Follow.objects.create(follower=self.user, following=self.other)
+        Follow.objects.create(follower=self.other, following=self.user)
+
+    def assertSameResponse(self, actions, data=None):
+        responses = []
+        for serve_async in (False, True):
+            request = factory.get("/api/users/", data)
+            force_authenticate(request, user=self.user)
+            view = UserViewSet.as_view(actions, serve_async=serve_async)
+            response = async_to_sync(view)(request) if serve_async else view(request)
+            responses.append(response.render())
+
+        expected, response = responses
+        self.assertEqual(response.status_code, expected.status_code)
+        self.assertEqual(response.content, expected.content)
+        return response
+
+    def test_list(self):
+        response = self.assertSameResponse({"get": "list"})
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(response.data), 2)
+
+    def test_list_filters(self):
+        response = self.assertSameResponse({"get": "list"}, {"country": "us"})
+
+        self.assertEqual([user["username"] for user in response.data], ["test"])
+
+    def test_me(self):
+        response = self.assertSameResponse({"get": "me"})
+
+        self.assertEqual(response.data["followers"], ["other"])
+        self.assertEqual(response.data["following"], ["other"])
@@ -0,0 +1,63 @@
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import AccessToken
+
+from user import authentication
+
+ME_URL = reverse("user:users-me")
+
+
+class CachedJWTAuthenticationTest(TestCase):
+    def setUp(self):
+        authentication.clear()
+        self.user = get_user_model().objects.create_user(
+            email="auth_user@mail.com",
+            username="auth_user",
+            password="PASSWORD123",
+        )
+        self.client = APIClient()
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {AccessToken.for_user(self.user)}")
+
+    def count_queries(self, url=ME_URL):
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return len(context.captured_queries)
+
+    def test_cached_user_saves_a_query(self):
+        first = self.count_queries()
+        self.assertEqual(self.count_queries(), first - 1)
+
+    def test_save_invalidates_cached_user(self):
+        self.count_queries()
+
+        self.user.is_active = False
+        self.user.save()
+
+        response = self.client.get(ME_URL)
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_cached_user_is_a_private_copy(self):
+        self.count_queries()
+        first = authentication.get_cached_user(self.user.pk)
+        first.username = "changed"
+
+        self.assertEqual(authentication.get_cached_user(self.user.pk).username, "auth_user")
+
+    def test_password_change_is_saved_and_invalidates_cached_user(self):
+        self.count_queries()
+
+        response = self.client.patch(
+            reverse("user:users-detail", args=[self.user.pk]),
+            {"password": "NEWpassword456"},
+        )
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.user.refresh_from_db()
+        self.assertTrue(self.user.check_password("NEWpassword456"))
+        self.assertIsNone(authentication.get_cached_user(self.user.pk))
@@ -0,0 +1,132 @@
+import uuid
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.token_blacklist.models import BlacklistedToken, OutstandingToken
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from user.blacklist import BloomFilter, TokenBlacklistFilter, blacklist_filter
+
+REFRESH_URL = reverse("user:token_refresh")
+VERIFY_URL = reverse("user:token_verify")
+LOGOUT_URL = reverse("user:token_blacklist")
+
+
+class BloomFilterTest(TestCase):
+    def test_no_false_negatives_and_bounded_false_positives(self):
+        bloom = BloomFilter(capacity=10_000, error_rate=0.01)
+        members = [uuid.uuid4().hex for _ in range(10_000)]
+        for member in members:
+            bloom.add(member)
+
+        self.assertTrue(all(member in bloom for member in members))
+        false_positives = sum(uuid.uuid4().hex in bloom for _ in range(10_000))
+        self.assertLess(false_positives, 200)
+
+
+@override_settings(TOKEN_BLACKLIST_CACHE_ALIAS="default")
+class TokenBlacklistFilterTest(TestCase):
+    def setUp(self):
+        blacklist_filter.reset()
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            email="auth_user@mail.com",
+            username="auth_user",
+            password="PASSWORD123",
+        )
+        self.refresh = RefreshToken.for_user(self.user)
+
+    def blacklist_queries(self, url, data):
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.post(url, data)
+        queries = [query["sql"] for query in context.captured_queries if "blacklistedtoken" in query["sql"]]
+        return response, queries
+
+    def test_refresh_of_clean_token_skips_blacklist_table(self):
+        blacklist_filter.sync()
+
+        response, queries = self.blacklist_queries(REFRESH_URL, {"refresh": str(self.refresh)})
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(queries, [])
+
+    def test_logout_blocks_refresh(self):
+        response = self.client.post(LOGOUT_URL, {"refresh": str(self.refresh)})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+        response = self.client.post(REFRESH_URL, {"refresh": str(self.refresh)})
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+        response = self.client.post(LOGOUT_URL, {"refresh": str(self.refresh)})
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_filter_picks_up_existing_blacklist(self):
+        self.refresh.blacklist()
+        blacklist_filter.reset()
+
+        response = self.client.post(REFRESH_URL, {"refresh": str(self.refresh)})
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    @mock.patch.object(api_settings, "BLACKLIST_AFTER_ROTATION", True)
+    def test_verify_rejects_blacklisted_token(self):
+        self.refresh.blacklist()
+
+        response = self.client.post(VERIFY_URL, {"token": str(self.refresh)})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(BlacklistedToken.objects.count(), 1)
+
+
+def process_cache(name):
+    return {"default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache", "LOCATION": name}}
+
+
+class TokenBlacklistProcessesTest(TestCase):
+    """two filters standing for the filters of two server processes"""
+
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(email="auth_user@mail.com", username="auth_user")
+        self.first, self.second = TokenBlacklistFilter(), TokenBlacklistFilter()
+
+    def blacklist(self, refresh):
+        with self.captureOnCommitCallbacks(execute=True):
+            refresh.blacklist()
+            self.first.added(refresh["jti"])
+
+    @override_settings(TOKEN_BLACKLIST_CACHE_ALIAS=None)
+    def test_separate_caches_check_the_table(self):
+        refresh = RefreshToken.for_user(self.user)
+        with override_settings(CACHES=process_cache("first")):
+            self.first.sync()
+            self.blacklist(refresh)
+        with override_settings(CACHES=process_cache("second")):
+            self.assertTrue(self.second.is_blacklisted(refresh["jti"]))
+            self.assertIsNone(self.second.bloom)
+
+    @override_settings(TOKEN_BLACKLIST_CACHE_ALIAS="default")
+    def test_shared_cache_syncs_other_filters(self):
+        refresh = RefreshToken.for_user(self.user)
+        self.second.sync()
+
+        self.blacklist(refresh)
+
+        self.assertTrue(self.second.is_blacklisted(refresh["jti"]))
+
+    @override_settings(TOKEN_BLACKLIST_CACHE_ALIAS="default")
+    def test_rows_committed_out_of_id_order_are_synced(self):
+        early, late = RefreshToken.for_user(self.user), RefreshToken.for_user(self.user)
+        BlacklistedToken.objects.create(pk=100, token=OutstandingToken.objects.get(jti=early["jti"]))
+        self.second.sync()
+        self.assertEqual(self.second.last_id, 100)
+
+        # a transaction that took a lower id but committed after the sync
+        BlacklistedToken.objects.create(pk=50, token=OutstandingToken.objects.get(jti=late["jti"]))
+        self.first._bump()
+
+        self.assertTrue(self.second.is_blacklisted(late["jti"]))
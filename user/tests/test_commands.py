@@ -0,0 +1,26 @@
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.test import TestCase
+
+from user.models import Follow
+
+
+class ReconcileFollowCountersTest(TestCase):
+    def setUp(self):
+        self.user_1 = get_user_model().objects.create_user(email="user_1@mail.com", username="user_1")
+        self.user_2 = get_user_model().objects.create_user(email="user_2@mail.com", username="user_2")
+        Follow.objects.create(follower=self.user_1, following=self.user_2)
+
+    def test_repairs_drifted_counters(self):
+        get_user_model().objects.update(followers_count=5, following_count=5)
+
+        out = StringIO()
+        call_command("reconcile_follow_counters", stdout=out)
+
+        self.user_1.refresh_from_db()
+        self.user_2.refresh_from_db()
+        self.assertEqual((self.user_1.followers_count, self.user_1.following_count), (0, 1))
+        self.assertEqual((self.user_2.followers_count, self.user_2.following_count), (1, 0))
+        self.assertIn("2 user(s) repaired", out.getvalue())
@@ -0,0 +1,53 @@
+from django.contrib.auth import get_user_model
+from django.test import TestCase
+from django.urls import reverse
+
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from user.models import Follow
+
+USER_URL = reverse("user:users-list")
+
+
+class UserFieldsetTest(TestCase):
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(email="test@mail.com", username="test")
+        self.other = get_user_model().objects.create_user(email="other@mail.com", username="other")
+        Follow.objects.create(follower=self.user, following=self.other)
+
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user)
+
+    def test_sparse_fields(self):
+        response = self.client.get(USER_URL, {"fields": "id,username"})
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            sorted(response.data, key=lambda user: user["id"]),
+            [{"id": self.user.id, "username": "test"}, {"id": self.other.id, "username": "other"}],
+        )
+
+    def test_expand_follows(self):
+        with self.assertNumQueries(3):
+            response = self.client.get(
+                USER_URL, {"username": "test", "fields": "username,followers,following", "expand": "followers,following"}
+            )
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data, [{
+            "username": "test",
+            "followers": [],
+            "following": [{"id": self.other.id, "username": "other"}],
+        }])
+
+    def test_counts_by_default(self):
+        response = self.client.get(USER_URL, {"username": "other"})
+
+        self.assertEqual(response.data[0]["followers"], 1)
+        self.assertIn("bio", response.data[0])
+
+    def test_unknown_fields_are_rejected(self):
+        response = self.client.get(USER_URL, {"fields": "id,is_staff"})
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
@@ -0,0 +1,136 @@
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import TestCase
+from django.urls import reverse
+
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from user.models import Follow, FollowRecommendation
+from user import recommendations
+from user.recommendations import compute_follow_recommendations
+
+RECOMMENDATIONS_URL = reverse("user:users-recommendations")
+
+
+def follow(follower, *followings):
+    Follow.objects.bulk_create([Follow(follower=follower, following=following) for following in followings])
+
+
+class ComputeFollowRecommendationsTest(TestCase):
+    def setUp(self):
+        self.users = [
+            get_user_model().objects.create_user(email=f"user_{number}@mail.com", username=f"user_{number}")
+            for number in range(6)
+        ]
+        alice, bob, carol, dave, erin, frank = self.users
+        follow(alice, bob, carol)
+        follow(bob, dave, erin)
+        follow(carol, dave)
+        follow(frank, carol, erin)
+
+    def recommended(self, user):
+        return list(FollowRecommendation.objects.filter(user=user).order_by("rank")
+                    .values_list("recommended_id", "rank", "mutual_follows"))
+
+    def test_ranks_friends_of_friends_by_mutual_follows(self):
+        alice, bob, carol, dave, erin, frank = self.users
+
+        compute_follow_recommendations()
+
+        recommended = self.recommended(alice)
+        self.assertEqual(recommended[:2], [(dave.id, 0, 2), (erin.id, 1, 1)])
+
+    def test_never_recommends_self_or_followed_accounts(self):
+        compute_follow_recommendations()
+
+        pairs = set(FollowRecommendation.objects.values_list("user_id", "recommended_id"))
+        self.assertFalse(pairs & set(Follow.objects.values_list("follower_id", "following_id")))
+        self.assertFalse(any(user == recommended for user, recommended in pairs))
+
+    def test_suggests_co_followed_accounts(self):
+        alice, bob, carol, dave, erin, frank = self.users
+
+        compute_follow_recommendations()
+
+        # bob's followers also follow carol, so bob's audience overlaps with carol's
+        self.assertIn(carol.id, [recommended for recommended, _, _ in self.recommended(bob)])
+
+    def test_caps_and_replaces_previous_rows(self):
+        alice, bob, carol, dave, erin, frank = self.users
+        FollowRecommendation.objects.create(user=bob, recommended=alice, rank=0, score=1)
+
+        written = compute_follow_recommendations(per_user=1)
+
+        self.assertEqual(written, FollowRecommendation.objects.count())
+        self.assertEqual(len(self.recommended(alice)), 1)
+        self.assertFalse(FollowRecommendation.objects.filter(user=bob, recommended=alice, score=1).exists())
+
+    def test_computes_outside_the_write_transaction(self):
+        depth = len(connection.atomic_blocks)
+        depths = []
+        recommend = recommendations.recommend
+
+        def recording(*args):
+            depths.append(len(connection.atomic_blocks))
+            yield from recommend(*args)
+
+        with mock.patch.object(recommendations, "recommend", recording):
+            self.assertGreater(compute_follow_recommendations(), 0)
+        self.assertEqual(depths, [depth])
+
+    def test_small_pair_budget_gives_the_same_recommendations(self):
+        compute_follow_recommendations()
+        expected = set(FollowRecommendation.objects.values_list("user_id", "recommended_id", "rank", "mutual_follows"))
+
+        with mock.patch.object(recommendations, "PAIR_BUDGET", 1):
+            compute_follow_recommendations()
+
+        self.assertEqual(
+            set(FollowRecommendation.objects.values_list("user_id", "recommended_id", "rank", "mutual_follows")),
+            expected,
+        )
+
+    def test_empty_graph(self):
+        Follow.objects.all().delete()
+
+        self.assertEqual(compute_follow_recommendations(), 0)
+
+
+class RecommendationsViewTest(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(email="test@mail.com", username="test")
+        self.first = get_user_model().objects.create_user(email="first@mail.com", username="first")
+        self.second = get_user_model().objects.create_user(email="second@mail.com", username="second")
+        FollowRecommendation.objects.create(user=self.user, recommended=self.first, rank=0, score=2, mutual_follows=2)
+        FollowRecommendation.objects.create(user=self.user, recommended=self.second, rank=1, score=1, mutual_follows=1)
+        self.client.force_authenticate(user=self.user)
+
+    def test_returns_suggestions_in_rank_order(self):
+        response = self.client.get(RECOMMENDATIONS_URL)
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual([row["username"] for row in response.data], ["first", "second"])
+        self.assertEqual(response.data[0]["mutual_follows"], 2)
+
+    def test_excludes_accounts_followed_since_the_last_run(self):
+        Follow.objects.create(follower=self.user, following=self.first)
+
+        response = self.client.get(RECOMMENDATIONS_URL)
+
+        self.assertEqual([row["username"] for row in response.data], ["second"])
+
+    def test_limit(self):
+        response = self.client.get(RECOMMENDATIONS_URL, {"limit": 1})
+        self.assertEqual(len(response.data), 1)
+
+        response = self.client.get(RECOMMENDATIONS_URL, {"limit": "many"})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_requires_authentication(self):
+        self.client.force_authenticate(user=None)
+        response = self.client.get(RECOMMENDATIONS_URL)
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
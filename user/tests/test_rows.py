@@ -0,0 +1,67 @@
+from datetime import date
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase
+
+from rest_framework.renderers import JSONRenderer
+from rest_framework.request import Request
+from rest_framework.test import APIRequestFactory
+
+from user.models import Follow
+from user.serializers import UserListRowSerializer, UserListSerializer
+from user.views import UserViewSet
+
+factory = APIRequestFactory()
+
+
+class UserListRowSerializerTest(TestCase):
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(
+            email="test@mail.com",
+            username="test",
+            first_name="John",
+            image="users/avatar.png",
+            birth_date=date(1990, 5, 17),
+            bio="bio",
+        )
+        self.other = get_user_model().objects.create_user(email="other@mail.com", username="other")
+        self.third = get_user_model().objects.create_user(email="third@mail.com", username="third")
+        Follow.objects.create(follower=self.user, following=self.other)
+        Follow.objects.create(follower=self.third, following=self.other)
+        Follow.objects.create(follower=self.other, following=self.user)
+
+    def render(self, params=None):
+        request = Request(factory.get("/api/users/", params))
+        request.user = self.user
+        view = UserViewSet(action="list", request=request, format_kwarg=None)
+        context = view.get_serializer_context()
+
+        queryset = view.filter_queryset(view.get_queryset()).prefetch_related("followers__follower", "following__following")
+        expected = UserListSerializer(queryset, many=True, context=context).data
+        return JSONRenderer().render(expected), JSONRenderer().render(UserListRowSerializer(view.list_rows(), context=context).data)
+
+    def test_identical_json(self):
+        cases = [
+            {},
+            {"fields": "id,username,image,birth_date"},
+            {"expand": "followers,following"},
+            {"fields": "username,followers", "expand": "followers,following"},
+        ]
+        for params in cases:
+            with self.subTest(params=params):
+                expected, content = self.render(params)
+                self.assertEqual(content, expected)
+
+    def test_one_query_per_expanded_relation(self):
+        request = Request(factory.get("/api/users/", {"expand": "followers,following"}))
+        request.user = self.user
+        view = UserViewSet(action="list", request=request, format_kwarg=None)
+
+        with self.assertNumQueries(3):
+            data = UserListRowSerializer(view.list_rows(), context=view.get_serializer_context()).data
+
+        other = next(user for user in data if user["id"] == self.other.id)
+        self.assertEqual(
+            other["followers"],
+            [{"id": self.user.id, "username": "test"}, {"id": self.third.id, "username": "third"}],
+        )
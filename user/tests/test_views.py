@@ -1,3 +1,4 @@
+import json
 import os.path
 import tempfile
 
@@ -166,6 +167,18 @@ class AuthenticatedUserTest(TestCase):
         self.assertEqual(response.status_code, 201)
         print(response.data["success"], "You are now following user_dev.")
 
+    def test_follow_and_unfollow_maintain_counters(self):
+        self.client.post(reverse("user:users-follow", args=[self.user_2.id]))
+
+        response = self.client.get(USER_URL)
+        counts = {user["id"]: (user["followers"], user["following"]) for user in response.data}
+        self.assertEqual(counts[self.user_1.id], (0, 1))
+        self.assertEqual(counts[self.user_2.id], (1, 0))
+
+        self.client.post(reverse("user:users-unfollow", args=[self.user_2.id]))
+        self.user_2.refresh_from_db()
+        self.assertEqual(self.user_2.followers_count, 0)
+
     def test_action_follow_myself(self):
         response = self.client.post(reverse("user:users-follow", args=[self.user_1.id]))
 
@@ -205,6 +218,17 @@ class AuthenticatedUserTest(TestCase):
         self.assertEqual(response.status_code, 200)
         self.assertEqual(len(response.data["followers"]), 2)
 
+    def test_action_followers_streamed(self):
+        Follow.objects.create(follower=self.user_2, following=self.user_1)
+        Follow.objects.create(follower=self.user_3, following=self.user_1)
+
+        response = self.client.get(reverse("user:users-followers", args=[self.user_1.id]), {"stream": "1"})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            json.loads(b"".join(response.streaming_content)),
+            {"email": self.user_1.email, "followers": [self.user_2.email, self.user_3.email]}
+        )
+
     def test_action_following(self):
         Follow.objects.create(follower=self.user_1, following=self.user_3)
         response = self.client.get(reverse("user:users-following", args=[self.user_1.id]))
@@ -0,0 +1,13 @@
+from django.utils.translation import gettext_lazy as _
+from rest_framework_simplejwt import tokens
+from rest_framework_simplejwt.exceptions import TokenError
+
+from user import blacklist
+
+
+class RefreshToken(tokens.RefreshToken):
+    """RefreshToken whose blacklist check is answered by the Bloom filter first"""
+
+    def check_blacklist(self):
+        if blacklist.is_blacklisted(self):
+            raise TokenError(_("Token is blacklisted"))
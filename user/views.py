@@ -1,5 +1,7 @@
+from django.conf import settings
 from django.contrib.auth import get_user_model
-from django.db.models import Count, Prefetch
+from django.db import IntegrityError, transaction
+from django.db.models import Prefetch
 from django.shortcuts import get_object_or_404
 
 from drf_spectacular.types import OpenApiTypes
@@ -9,13 +11,25 @@ from rest_framework import viewsets, status
 from rest_framework.decorators import action
 from rest_framework.permissions import IsAuthenticated, AllowAny
 from rest_framework.response import Response
-from rest_framework_simplejwt.authentication import JWTAuthentication
 
-from user.models import Follow, User
-from user.serializers import UserListSerializer, UserDetailSerializer, UserCreateSerializer, UserFollower, UserFollowing
-
-
-class UserViewSet(viewsets.ModelViewSet):
+from social_media_api.asynchronous import AsyncViewSetMixin
+from social_media_api.database import serialized_write
+from social_media_api.fieldsets import Fieldset, fieldset_parameters
+from social_media_api.streaming import STREAM_PARAMETER, iterate, streaming_object_response, wants_stream
+from user.authentication import CachedJWTAuthentication
+from user.models import Follow, FollowRecommendation, User
+from user.serializers import (
+    FollowRecommendationSerializer,
+    UserCreateSerializer,
+    UserDetailSerializer,
+    UserFollower,
+    UserFollowing,
+    UserListRowSerializer,
+    UserListSerializer,
+)
+
+
+class UserViewSet(AsyncViewSetMixin, viewsets.ModelViewSet):
     queryset = get_user_model().objects.all()
 
     def get_serializer_class(self):
@@ -26,12 +40,7 @@ class UserViewSet(viewsets.ModelViewSet):
         return UserListSerializer
 
     def get_queryset(self):
-        queryset = self.queryset
-
-        queryset = queryset.annotate(
-            followers_count=Count('followers'),
-            following_count=Count('following')
-        )
+        queryset = super().get_queryset()
 
         username = self.request.query_params.get('username')
         first_name = self.request.query_params.get('first_name')
@@ -83,10 +92,37 @@ class UserViewSet(viewsets.ModelViewSet):
                 type=OpenApiTypes.STR,
                 description="Country filter: searches for occurrences of the provided country name (e.g., ?country=USA)."
             ),
+            *fieldset_parameters(UserListSerializer),
         ]
     )
     def list(self, request, *args, **kwargs):
-        return super().list(request, *args, **kwargs)
+        rows = self.list_rows()
+        page = self.paginate_queryset(rows)
+        if page is not None:
+            serializer = UserListRowSerializer(page, context=self.get_serializer_context())
+            return self.get_paginated_response(serializer.data)
+
+        serializer = UserListRowSerializer(rows, context=self.get_serializer_context())
+        return Response(serializer.data)
+
+    async def alist(self, request, *args, **kwargs):
+        rows = self.list_rows()
+        page = await self.apaginate_queryset(rows)
+        if page is not None:
+            serializer = UserListRowSerializer(page, context=self.get_serializer_context())
+            return self.get_paginated_response(await serializer.adata())
+
+        serializer = UserListRowSerializer(rows, context=self.get_serializer_context())
+        return Response(await serializer.adata())
+
+    def list_rows(self):
+        """the UserListRowSerializer rows of the requested fields"""
+        fieldset = Fieldset.from_request(self.request, UserListSerializer)
+        queryset = self.filter_queryset(self.get_queryset())
+        if not queryset.ordered:
+            # narrower rows may be read off a covering index, in another order than the table's
+            queryset = queryset.order_by("pk")
+        return UserListRowSerializer.values(queryset, fieldset)
 
     def get_permissions(self):
         if self.action == 'create':
@@ -96,24 +132,60 @@ class UserViewSet(viewsets.ModelViewSet):
     def get_authentication_classes(self):
         if self.action == 'create':
             return []
-        return [JWTAuthentication]
+        return [CachedJWTAuthentication]
 
     @action(detail=False, methods=['GET', "POST"], permission_classes=[IsAuthenticated()])
     def me(self, request):
         """returns the data of the current authenticated user"""
-        user = request.user
+        serializer = UserDetailSerializer(self.me_queryset(request.user).first())
+        return Response(serializer.data, status=status.HTTP_200_OK)
+
+    async def ame(self, request):
+        serializer = UserDetailSerializer(await self.me_queryset(request.user).afirst())
+        return Response(serializer.data, status=status.HTTP_200_OK)
+
+    def me_queryset(self, user):
         followers_prefetch = Prefetch('followers',
                                       queryset=Follow.objects.filter(following=user).select_related('follower'))
         following_prefetch = Prefetch('following',
                                       queryset=Follow.objects.filter(follower=user).select_related('following'))
+        return self.queryset.filter(pk=user.pk).prefetch_related(followers_prefetch, following_prefetch)
 
-        queryset = self.queryset.filter(pk=user.pk).prefetch_related(followers_prefetch, following_prefetch)
-        serializer = UserDetailSerializer(queryset.first())
+    @extend_schema(
+        parameters=[
+            OpenApiParameter(
+                "limit",
+                type=OpenApiTypes.INT,
+                description="Maximum number of suggestions to return (e.g., ?limit=10).",
+            ),
+        ],
+        responses=FollowRecommendationSerializer(many=True),
+    )
+    @action(detail=False, methods=['GET'], permission_classes=[IsAuthenticated()])
+    def recommendations(self, request):
+        """return the precomputed accounts the current authenticated user may want to follow"""
+        try:
+            limit = int(request.query_params.get("limit", settings.FOLLOW_RECOMMENDATIONS_PER_USER))
+        except ValueError:
+            return Response({"error": "limit must be an integer."}, status=status.HTTP_400_BAD_REQUEST)
+        limit = max(1, min(limit, settings.FOLLOW_RECOMMENDATIONS_PER_USER))
+
+        # suggestions are recomputed periodically, drop accounts followed since the last run
+        queryset = FollowRecommendation.objects.filter(user=request.user).exclude(
+            recommended__in=Follow.objects.filter(follower=request.user).values("following")
+        ).select_related("recommended").order_by("rank")[:limit]
+        serializer = FollowRecommendationSerializer(queryset, many=True, context={"request": request})
         return Response(serializer.data, status=status.HTTP_200_OK)
 
+    @extend_schema(parameters=[STREAM_PARAMETER])
     @action(detail=True, methods=['GET'], permission_classes=[IsAuthenticated()])
     def followers(self, request, pk=None):
         """return the data of the followers of the current authenticated user"""
+        if wants_stream(request):
+            user = get_object_or_404(self.queryset, pk=pk)
+            emails = Follow.objects.filter(following=user).order_by("pk").values_list("follower__email", flat=True)
+            return streaming_object_response({"email": user.email}, "followers", iterate(emails))
+
         followers_prefetch = Prefetch('followers',
                                       queryset=Follow.objects.filter(following__pk=pk).select_related('follower'))
         queryset = self.queryset.filter(pk=pk).prefetch_related(followers_prefetch)
@@ -123,9 +195,15 @@ class UserViewSet(viewsets.ModelViewSet):
             return Response(serializer.data, status=status.HTTP_200_OK)
         return Response(status=status.HTTP_404_NOT_FOUND)
 
+    @extend_schema(parameters=[STREAM_PARAMETER])
     @action(detail=True, methods=['GET'], permission_classes=[IsAuthenticated()])
     def following(self, request, pk=None):
         """return the data of the followings of the current authenticated user"""
+        if wants_stream(request):
+            user = get_object_or_404(self.queryset, pk=pk)
+            emails = Follow.objects.filter(follower=user).order_by("pk").values_list("following__email", flat=True)
+            return streaming_object_response({"email": user.email}, "following", iterate(emails))
+
         following_prefetch = Prefetch('following',
                                       queryset=Follow.objects.filter(follower__pk=pk).select_related('following'))
         queryset = self.queryset.filter(pk=pk).prefetch_related(following_prefetch)
@@ -133,9 +211,10 @@ class UserViewSet(viewsets.ModelViewSet):
         if user:
             serializer = UserFollowing(user)
             return Response(serializer.data, status=status.HTTP_200_OK)
-        Response(status=status.HTTP_404_NOT_FOUND)
+        return Response(status=status.HTTP_404_NOT_FOUND)
 
     @action(detail=True, methods=['POST'], permission_classes=[IsAuthenticated()])
+    @serialized_write
     def follow(self, request, pk=None):
         """follow user by their id"""
         user_to_follow = get_object_or_404(User, pk=pk)
@@ -147,11 +226,16 @@ class UserViewSet(viewsets.ModelViewSet):
         if Follow.objects.filter(follower=current_user, following=user_to_follow).exists():
             return Response({"error": "You are already following this user."}, status=status.HTTP_400_BAD_REQUEST)
 
-        Follow.objects.create(follower=current_user, following=user_to_follow)
+        try:
+            with transaction.atomic():
+                Follow.objects.create(follower=current_user, following=user_to_follow)
+        except IntegrityError:
+            return Response({"error": "You are already following this user."}, status=status.HTTP_400_BAD_REQUEST)
         return Response({"success": f"You are now following {user_to_follow.username}."},
                         status=status.HTTP_201_CREATED)
 
     @action(detail=True, methods=['POST'], permission_classes=[IsAuthenticated()])
+    @serialized_write
     def unfollow(self, request, pk=None):
         """unfollow user by their id"""
         user_to_unfollow = get_object_or_404(User, pk=pk)
@@ -164,6 +248,7 @@ class UserViewSet(viewsets.ModelViewSet):
         if not follow_instance:
             return Response({"error": "You are not following this user."}, status=status.HTTP_400_BAD_REQUEST)
 
-        follow_instance.delete()
+        with transaction.atomic():
+            follow_instance.delete()
         return Response({"success": f"You have unfollowed {user_to_unfollow.username}."},
                         status=status.HTTP_204_NO_CONTENT)